@@ -0,0 +1,31 @@
+"""
+Writes a synthetic Olist-shaped dataset for local runs and benchmarks.
+
+Usage:
+    python -m benchmarks.generate_data --rows 1000000 --output data/olist_customers_dataset.csv
+"""
+import argparse
+import logging
+import time
+
+from src.synthetic_data import write_synthetic_olist
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--output", default="data/olist_customers_dataset.csv",
+                        help="Destination .csv, .parquet or .feather file")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    start = time.perf_counter()
+    write_synthetic_olist(args.output, args.rows, args.seed, args.chunk_rows)
+    elapsed = time.perf_counter() - start
+    print(f"{args.rows} rows written to {args.output} in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
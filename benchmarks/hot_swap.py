@@ -0,0 +1,127 @@
+"""
+Checks that PredictionServer swaps and rolls back models under load without failed requests.
+
+Two models are trained on the synthetic dataset, a linear regression and a
+histogram gradient boosting model, and saved as MLflow models. The server
+starts on the first one and is load tested in closed loop, once without
+swaps and once while it is told every --swap-every seconds to swap to the
+other model and back, alternating POST /models/swap and
+POST /models/rollback. Every swap reports its background load and warm-up
+time; the errors of both runs should be 0, and a probe request checks that
+the predictions follow the active model.
+
+Usage:
+    python -m benchmarks.hot_swap --rows 200000 --load-seconds 6 --swap-every 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+
+async def load_test(server, args, swap_uri: str | None, probe: bytes) -> tuple[dict, list[dict], float]:
+    """
+    Serves in this event loop and load tests, optionally swapping meanwhile
+    Args:
+        server: PredictionServer: Server to run
+        args: argparse.Namespace: Benchmark options
+        swap_uri: str | None: Model swapped to and rolled back from, None for no swaps
+        probe: bytes: Single row request sent after the test
+    Returns:
+        tuple[dict, list[dict], float]: Load test summary, the model state
+            and round trip time after every swap or rollback, and the
+            probe's prediction
+    """
+    from src.load_test import HttpConnection, LoadGenerator, synthetic_payloads
+
+    task = asyncio.create_task(server.serve())
+    await asyncio.sleep(0.2)
+    generator = LoadGenerator(f"http://127.0.0.1:{args.port}/invocations", synthetic_payloads(1000),
+                              concurrency=args.concurrency)
+    events = []
+
+    async def swapper() -> None:
+        admin = HttpConnection("127.0.0.1", args.port)
+        body = json.dumps({"model_uri": swap_uri, "wait": True}).encode()
+        try:
+            for i in range(int(args.load_seconds / args.swap_every) - 1):
+                await asyncio.sleep(args.swap_every)
+                start = time.perf_counter()
+                path = "/models/swap" if i % 2 == 0 else "/models/rollback"
+                status, response = await admin.post(path, body)
+                events.append({"path": path, "status": status, "ms": (time.perf_counter() - start) * 1000,
+                               **json.loads(response)})
+        finally:
+            await admin.close()
+
+    swaps = asyncio.create_task(swapper()) if swap_uri is not None else None
+    result = await generator.run_closed(duration=args.load_seconds)
+    if swaps is not None:
+        await swaps
+    connection = HttpConnection("127.0.0.1", args.port)
+    _, response = await connection.post("/invocations", probe)
+    await connection.close()
+    task.cancel()
+    return result.summary(), events, json.loads(response)["predictions"][0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--data-dir", default=".cache/benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--load-seconds", type=float, default=6.0)
+    parser.add_argument("--swap-every", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    import mlflow.sklearn
+
+    from steps.ingest_data import IngestData
+    from src.batch_scoring import load_model
+    from src.data_cleaning import DataPreProcessingStrategy, IndexSplitStrategy
+    from src.load_test import synthetic_payloads
+    from src.model_dev import HistGradientBoostingModel, LinearRegressionModel
+    from src.schema import OLIST_SCHEMA
+    from src.serving import MicroBatcher, ModelVersion, PredictionServer, parse_features
+    from src.synthetic_data import write_synthetic_olist
+
+    data_path = os.path.join(args.data_dir, f"olist_{args.rows}_{args.seed}.parquet")
+    if not os.path.exists(data_path):
+        write_synthetic_olist(data_path, args.rows, args.seed)
+    processed = DataPreProcessingStrategy().handle_data(IngestData(data_path, schema=OLIST_SCHEMA).get_data())
+    split = IndexSplitStrategy(random_state=args.seed).handle_data(processed)
+    del processed
+    X_train, y_train = split.train()
+    models = [LinearRegressionModel().train_model(X_train, y_train),
+              HistGradientBoostingModel().train_model(X_train, y_train, max_iter=50)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uris = [os.path.join(tmp, f"model_{i}") for i in range(len(models))]
+        for model, uri in zip(models, uris):
+            mlflow.sklearn.save_model(model, uri)
+
+        payload = synthetic_payloads(1, seed=args.seed)[0]
+        versions = [ModelVersion.of(model, uri) for model, uri in zip(models, uris)]
+        row = parse_features(json.loads(payload), versions[0].feature_names)
+        expected = {uri: MicroBatcher.score(version, row)[0] for uri, version in zip(uris, versions)}
+        for name, swap_uri in [("steady", None), ("swapping", uris[1])]:
+            server = PredictionServer(load_model(uris[0]), port=args.port, model_uri=uris[0], loader=load_model)
+            summary, events, served = asyncio.run(load_test(server, args, swap_uri, payload))
+            print(f"{name}: {summary['requests_per_sec']} requests/s, p50 {summary['p50_ms']} ms, "
+                  f"p99 {summary['p99_ms']} ms, max {summary['max_ms']} ms, "
+                  f"requests {summary['requests']}, errors {summary['errors']}")
+            for event in events:
+                active = event["active"]
+                print(f"  {event['path']:<17} {event['status']} in {event['ms']:7.1f} ms, active "
+                      f"{os.path.basename(active['uri'])} loaded in {active['load_ms']} ms, "
+                      f"warmed in {active['warmup_ms']} ms")
+            active = server.batcher.active.uri
+            print(f"  probe served {served:.4f} by {os.path.basename(active)}, expected {expected[active]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
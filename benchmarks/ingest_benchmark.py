@@ -0,0 +1,114 @@
+"""
+Compares peak RSS and wall-clock time of the IngestData read paths.
+
+Every mode runs in a fresh interpreter so that the high-water mark of one
+read does not leak into the next. Peak RSS is reported relative to the RSS
+after imports, so the cost of importing zenml is not counted.
+
+Usage:
+    python -m benchmarks.ingest_benchmark --data-path data/olist_customers_dataset.csv
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from src.profiling import current_rss_mb, peak_rss_mb
+
+MODES : list[str] = [
+    "baseline",
+    "schema-c",
+    "schema-pyarrow",
+    "parquet",
+    "feather",
+    "chunked",
+]
+
+
+def run_mode(mode: str, data_path: str, chunksize: int) -> dict:
+    """
+    Runs a single read mode in the current process
+    Args:
+        mode: str: One of MODES
+        data_path: str: Path to the CSV file
+        chunksize: int: Rows per batch for the chunked mode
+    Returns:
+        dict: rows read, wall time and peak RSS above the post-import baseline
+    """
+    import pandas as pd
+    from steps.ingest_data import IngestData
+    from src.schema import OLIST_SCHEMA
+
+    stem = Path(data_path).with_suffix("")
+    baseline_rss = current_rss_mb()
+    start = time.perf_counter()
+    if mode == "baseline":
+        rows = len(pd.read_csv(data_path))
+    elif mode == "schema-c":
+        rows = len(IngestData(data_path, schema=OLIST_SCHEMA).get_data())
+    elif mode == "schema-pyarrow":
+        rows = len(IngestData(data_path, schema=OLIST_SCHEMA, engine="pyarrow").get_data())
+    elif mode == "parquet":
+        rows = len(IngestData(f"{stem}.parquet", schema=OLIST_SCHEMA).get_data())
+    elif mode == "feather":
+        rows = len(IngestData(f"{stem}.feather", schema=OLIST_SCHEMA).get_data())
+    elif mode == "chunked":
+        ingest = IngestData(data_path, schema=OLIST_SCHEMA, chunksize=chunksize)
+        rows = sum(len(chunk) for chunk in ingest.iter_chunks())
+    else:
+        raise ValueError(f"Unknown mode {mode}")
+    wall = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "rows": rows,
+        "wall_s": round(wall, 3),
+        "peak_rss_mb": round(peak_rss_mb() - baseline_rss, 1),
+    }
+
+
+def convert_inputs(data_path: str) -> None:
+    """
+    Writes Parquet and Feather copies of the CSV next to it if missing
+    Args:
+        data_path: str: Path to the CSV file
+    """
+    import pandas as pd
+
+    stem = Path(data_path).with_suffix("")
+    parquet_path, feather_path = Path(f"{stem}.parquet"), Path(f"{stem}.feather")
+    if parquet_path.exists() and feather_path.exists():
+        return
+    data = pd.read_csv(data_path)
+    data.to_parquet(parquet_path, index=False)
+    data.to_feather(feather_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data-path", required=True)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.data_path, args.chunksize)))
+        return
+
+    convert_inputs(args.data_path)
+    print(f"{'mode':<16}{'rows':>12}{'wall_s':>10}{'peak_rss_mb':>14}")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.ingest_benchmark",
+             "--data-path", args.data_path,
+             "--chunksize", str(args.chunksize),
+             "--mode", mode],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{result['mode']:<16}{result['rows']:>12}{result['wall_s']:>10}{result['peak_rss_mb']:>14}")
+
+
+if __name__ == "__main__":
+    main()
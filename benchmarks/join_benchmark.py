@@ -0,0 +1,113 @@
+"""
+Benchmarks the multi-table Olist ingestion at multiples of the public dataset.
+
+Synthetic tables are written once per scale, a scale of 1 having the
+public dataset's 99,441 orders. Every scale runs in a fresh interpreter,
+which reads the tables serially and on threads, and joins them with
+join_olist_tables and with chained DataFrame.merge calls for reference.
+Peak RSS of each phase is measured above the RSS before it.
+
+Usage:
+    python -m benchmarks.join_benchmark --scales 1 2 4 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from src.profiling import current_rss_mb, peak_rss_mb, reset_peak_rss
+
+
+def _measure(func) -> tuple:
+    reset_peak_rss()
+    baseline_rss = current_rss_mb()
+    start = time.perf_counter()
+    result = func()
+    return result, round(time.perf_counter() - start, 3), round(peak_rss_mb() - baseline_rss, 1)
+
+
+def merge_tables(tables: dict):
+    """
+    Joins the tables like join_olist_tables with pandas merges
+    Args:
+        tables: dict[str, pd.DataFrame]: Tables as read by read_olist_tables
+    Returns:
+        pd.DataFrame: The merged frame
+    """
+    return (tables["orders"]
+            .merge(tables["customers"], on="customer_id")
+            .merge(tables["items"], on="order_id")
+            .merge(tables["payments"], on="order_id")
+            .merge(tables["reviews"], on="order_id")
+            .merge(tables["products"], on="product_id", how="left")
+            .merge(tables["categories"], on="product_category_name", how="left"))
+
+
+def run_scale(tables_dir: str, engine: str) -> dict:
+    """
+    Reads and joins one directory of tables in the current process
+    Args:
+        tables_dir: str: Directory written by write_synthetic_olist_tables
+        engine: str: CSV parser
+    Returns:
+        dict: Rows and the time and peak RSS of every phase
+    """
+    from steps.ingest_data import read_olist_tables
+    from src.olist_tables import join_olist_tables
+
+    _, serial_s, _ = _measure(lambda: read_olist_tables(tables_dir, n_jobs=1, engine=engine))
+    tables, read_s, read_rss = _measure(lambda: read_olist_tables(tables_dir, engine=engine))
+    joined, join_s, join_rss = _measure(lambda: join_olist_tables(tables))
+    rows, joined_mb = len(joined), joined.memory_usage(index=False, deep=True).sum() / 1024 ** 2
+    del joined
+    merged, merge_s, merge_rss = _measure(lambda: merge_tables(tables))
+    merged_mb = merged.memory_usage(index=False, deep=True).sum() / 1024 ** 2
+    return {
+        "rows": rows,
+        "read_serial_s": serial_s,
+        "read_s": read_s,
+        "read_rss_mb": read_rss,
+        "join_s": join_s,
+        "join_rss_mb": join_rss,
+        "joined_mb": round(joined_mb, 1),
+        "merge_s": merge_s,
+        "merge_rss_mb": merge_rss,
+        "merged_mb": round(merged_mb, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--data-dir", default=".cache/benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--engine", default="c", choices=["c", "pyarrow"])
+    parser.add_argument("--tables-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.tables_dir:
+        print(json.dumps(run_scale(args.tables_dir, args.engine)))
+        return
+
+    from src.synthetic_data import write_synthetic_olist_tables
+
+    columns = ["scale", "rows", "read_serial_s", "read_s", "read_rss_mb", "join_s", "join_rss_mb", "joined_mb",
+               "merge_s", "merge_rss_mb", "merged_mb"]
+    print("".join(f"{col:>15}" for col in columns))
+    for scale in args.scales:
+        tables_dir = os.path.join(args.data_dir, f"olist_tables_{scale:g}_{args.seed}")
+        if not os.path.isdir(tables_dir):
+            write_synthetic_olist_tables(tables_dir, scale, args.seed)
+        output = subprocess.run(
+            [sys.executable, "-W", "ignore", "-m", "benchmarks.join_benchmark",
+             "--tables-dir", tables_dir, "--engine", args.engine],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = {"scale": f"{scale:g}", **json.loads(output.strip().splitlines()[-1])}
+        print("".join(f"{result[col]:>15}" for col in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Load tests a prediction endpoint with recorded or synthetic requests.
+
+Request bodies come from a JSON lines file, one scoring payload per line,
+or are generated as dataframe_split payloads of random features. They are
+replayed round robin in closed loop, with --concurrency requests in flight,
+or in open loop at --rate requests per second. Prints throughput, error
+rate, latency percentiles and a latency histogram; --output also writes
+the summary as JSON. Works against the MLflow scoring server (--deployed
+looks up its URL) and any server speaking the same protocol, e.g.
+`python run_deployment.py --config serve`.
+
+Usage:
+    python -m benchmarks.load_test --url http://127.0.0.1:8000/invocations --concurrency 16 --duration 30
+    python -m benchmarks.load_test --deployed --requests-file payloads.jsonl --mode open --rate 500 --requests 10000
+"""
+import argparse
+import asyncio
+import json
+
+
+def deployed_url() -> str:
+    """
+    Returns the prediction URL of the running MLflow deployment
+    """
+    from zenml.integrations.mlflow.model_deployers.mlflow_model_deployer import MLFlowModelDeployer
+
+    model_deployer = MLFlowModelDeployer.get_active_model_deployer()
+    services = model_deployer.find_model_server(
+        pipeline_name="continuous_deployment_pipeline",
+        pipeline_step_name="mlflow_model_deployer_step",
+        model_name="model",
+    )
+    if not services or not services[0].is_running:
+        raise SystemExit("No running MLflow deployment found, pass --url")
+    return services[0].prediction_url
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Endpoint, e.g. http://127.0.0.1:8000/invocations")
+    target.add_argument("--deployed", action="store_true", help="Use the running MLflow deployment")
+    parser.add_argument("--requests-file", help="JSON lines file of request bodies, synthetic when omitted")
+    parser.add_argument("--synthetic", type=int, default=1000, help="Distinct synthetic bodies")
+    parser.add_argument("--rows-per-request", type=int, default=1)
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=100.0, help="Requests per second in open loop")
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals in open loop")
+    parser.add_argument("--requests", type=int, default=None, help="Requests to send in total")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run without --requests")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON file the summary and histogram are written to")
+    args = parser.parse_args()
+
+    from src.load_test import LoadGenerator, load_payloads, synthetic_payloads
+
+    url = deployed_url() if args.deployed else args.url
+    payloads = (load_payloads(args.requests_file) if args.requests_file
+                else synthetic_payloads(args.synthetic, args.rows_per_request, args.seed))
+    generator = LoadGenerator(url, payloads, args.concurrency, args.timeout)
+    duration = None if args.requests is not None else args.duration
+    if args.mode == "closed":
+        result = asyncio.run(generator.run_closed(args.requests, duration))
+    else:
+        result = asyncio.run(generator.run_open(args.rate, args.requests, duration, args.poisson, args.seed))
+
+    summary = result.summary()
+    print(f"{url}: {json.dumps(summary)}")
+    print(result.format_histogram())
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"url": url, **summary, "histogram": dict(result.histogram())}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
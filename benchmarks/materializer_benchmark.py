@@ -0,0 +1,139 @@
+"""
+Compares the Arrow materializer with ZenML's pandas materializer.
+
+The four clean_df outputs of a synthetic dataset are saved to and loaded
+from the active stack's artifact store, each materializer in a fresh
+interpreter. Loading is reported in three phases: opening the artifacts, a
+first column-wise pass over X_train, which pages memory-mapped columns in,
+and building X_train's 2-D matrix as estimators do, which copies the
+per-column blocks of an Arrow-backed frame into one array. Peak RSS is
+measured above the RSS before each phase.
+
+Usage:
+    python -m benchmarks.materializer_benchmark --rows 1000000
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+
+from src.profiling import current_rss_mb, peak_rss_mb, reset_peak_rss
+
+MATERIALIZERS : dict[str, str] = {
+    "pandas": "zenml.integrations.pandas.materializers.pandas_materializer.PandasMaterializer",
+    "arrow": "materializers.arrow_materializer.ArrowMaterializer",
+}
+
+
+def _measure(func) -> tuple:
+    reset_peak_rss()
+    baseline_rss = current_rss_mb()
+    start = time.perf_counter()
+    result = func()
+    return result, round(time.perf_counter() - start, 3), round(peak_rss_mb() - baseline_rss, 1)
+
+
+def run_materializer(name: str, data_path: str) -> dict:
+    """
+    Saves and loads the clean_df outputs with one materializer
+    Args:
+        name: str: Key of MATERIALIZERS
+        data_path: str: Raw synthetic dataset
+    Returns:
+        dict: Artifact size and the time and peak RSS of every phase
+    """
+    import importlib
+
+    import pandas as pd
+    from zenml.client import Client
+
+    from steps.clean_data import split_data
+    from steps.config import CleanConfig
+    from steps.ingest_data import IngestData
+    from src.schema import OLIST_SCHEMA
+
+    module, _, cls = MATERIALIZERS[name].rpartition(".")
+    materializer_class = getattr(importlib.import_module(module), cls)
+    store = Client().active_stack.artifact_store
+    root = os.path.join(store.path, "benchmarks", uuid.uuid4().hex)
+
+    data = IngestData(data_path, schema=OLIST_SCHEMA).get_data()
+    fill_values_path = os.path.join(root, "fill_values.json")
+    outputs = dict(zip(("X_train", "X_test", "y_train", "y_test"),
+                       split_data(data, CleanConfig(fill_values_path=fill_values_path))))
+    del data
+    materializers = {key: materializer_class(os.path.join(root, key), artifact_store=store) for key in outputs}
+    # the step runner creates the artifact directories before saving
+    for materializer in materializers.values():
+        os.makedirs(materializer.uri)
+    try:
+        def save():
+            for key, value in outputs.items():
+                materializers[key].save(value)
+
+        def load():
+            return {key: materializer.load(pd.Series if key.startswith("y_") else pd.DataFrame)
+                    for key, materializer in materializers.items()}
+
+        _, save_s, save_rss = _measure(save)
+        artifact_bytes = sum(
+            os.path.getsize(os.path.join(directory, f))
+            for directory, _, files in os.walk(root) for f in files
+        )
+        outputs.clear()
+        loaded, load_s, load_rss = _measure(load)
+        _, pass_s, pass_rss = _measure(lambda: float(loaded["X_train"].sum().sum()))
+        _, matrix_s, matrix_rss = _measure(lambda: loaded["X_train"].to_numpy())
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return {
+        "materializer": name,
+        "artifact_mb": round(artifact_bytes / 1024 ** 2, 1),
+        "save_s": save_s,
+        "save_rss_mb": save_rss,
+        "load_s": load_s,
+        "load_rss_mb": load_rss,
+        "first_pass_s": pass_s,
+        "first_pass_rss_mb": pass_rss,
+        "matrix_s": matrix_s,
+        "matrix_rss_mb": matrix_rss,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--data-dir", default=".cache/benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--materializer", choices=MATERIALIZERS, help=argparse.SUPPRESS)
+    parser.add_argument("--data-path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.materializer:
+        print(json.dumps(run_materializer(args.materializer, args.data_path)))
+        return
+
+    from src.synthetic_data import write_synthetic_olist
+
+    data_path = os.path.join(args.data_dir, f"olist_{args.rows}_{args.seed}.parquet")
+    if not os.path.exists(data_path):
+        write_synthetic_olist(data_path, args.rows, args.seed)
+    columns = ["materializer", "artifact_mb", "save_s", "save_rss_mb", "load_s", "load_rss_mb",
+               "first_pass_s", "first_pass_rss_mb", "matrix_s", "matrix_rss_mb"]
+    print("".join(f"{col:>18}" for col in columns))
+    for name in MATERIALIZERS:
+        output = subprocess.run(
+            [sys.executable, "-W", "ignore", "-m", "benchmarks.materializer_benchmark",
+             "--materializer", name, "--data-path", data_path],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print("".join(f"{result[col]:>18}" for col in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Measures what drift monitoring adds to serving and checks that it sees drift.
+
+A linear regression and its drift reference are built from the synthetic
+dataset. A DriftMonitor update is timed next to MicroBatcher's predict
+call for several batch sizes, and a PredictionServer is load tested in
+closed loop without and with the monitor, twice in turn since one run is
+noisy. The live histograms are then filled with held-out rows, which should score a low
+PSI, and with the same rows with price scaled by --shift, which should
+flag price and the predictions.
+
+Usage:
+    python -m benchmarks.monitoring_overhead --rows 1000000 --batch-sizes 1 16 256 4096
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+def time_call(func, repeats: int) -> float:
+    """
+    Args:
+        func: Callable: Call to time
+        repeats: int: Times it is called
+    Returns:
+        float: Mean microseconds per call
+    """
+    func()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+async def load_test(model, monitor, port: int, seconds: float) -> dict:
+    """
+    Serves the model in this event loop and load tests it in closed loop
+    Args:
+        model: RegressorMixin: Model to serve
+        monitor: DriftMonitor | None: Monitor of the server
+        port: int: Port to bind
+        seconds: float: Duration of the test
+    Returns:
+        dict: Load test summary
+    """
+    from src.load_test import LoadGenerator, synthetic_payloads
+    from src.serving import PredictionServer
+
+    server = PredictionServer(model, port=port, monitor=monitor)
+    task = asyncio.create_task(server.serve())
+    await asyncio.sleep(0.2)
+    generator = LoadGenerator(f"http://127.0.0.1:{port}/invocations", synthetic_payloads(1000), concurrency=16)
+    result = await generator.run_closed(duration=seconds)
+    task.cancel()
+    return result.summary()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--data-dir", default=".cache/benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 256, 4096])
+    parser.add_argument("--repeats", type=int, default=2000)
+    parser.add_argument("--load-seconds", type=float, default=3.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--shift", type=float, default=2.0, help="Factor price is scaled by for the drift check")
+    args = parser.parse_args()
+
+    import numpy as np
+
+    from steps.ingest_data import IngestData
+    from src.data_cleaning import DataPreProcessingStrategy, IndexSplitStrategy
+    from src.model_dev import LinearRegressionModel
+    from src.monitoring import DriftMonitor, DriftReference
+    from src.schema import OLIST_SCHEMA
+    from src.serving import MicroBatcher
+    from src.synthetic_data import write_synthetic_olist
+
+    data_path = os.path.join(args.data_dir, f"olist_{args.rows}_{args.seed}.parquet")
+    if not os.path.exists(data_path):
+        write_synthetic_olist(data_path, args.rows, args.seed)
+    processed = DataPreProcessingStrategy().handle_data(IngestData(data_path, schema=OLIST_SCHEMA).get_data())
+    split = IndexSplitStrategy(random_state=args.seed).handle_data(processed)
+    del processed
+    X_train, y_train = split.train()
+    X_test, _ = split.test()
+    model = LinearRegressionModel().train_model(X_train, y_train)
+    reference = DriftReference.build(X_train, model.predict(X_train))
+    features = X_test.to_numpy(dtype=np.float64)
+
+    batcher, monitor = MicroBatcher(model), DriftMonitor(reference)
+    print(f"{'batch_rows':>10}{'predict_us':>12}{'monitor_us':>12}{'per_row_us':>12}{'overhead':>10}")
+    for size in args.batch_sizes:
+        repeats = max(10, args.repeats * 16 // max(size, 16))
+        batch = features[:size]
+        predictions = batcher._predict_batch(batch)
+        predict_us = time_call(lambda: batcher._predict_batch(batch), repeats)
+        monitor_us = time_call(lambda: monitor.update(batch, predictions), repeats)
+        print(f"{size:>10}{predict_us:>12.1f}{monitor_us:>12.1f}{monitor_us / size:>12.3f}"
+              f"{monitor_us / predict_us:>10.1%}")
+
+    for name, monitor in [("plain", None), ("monitored", DriftMonitor(reference))] * 2:
+        summary = asyncio.run(load_test(model, monitor, args.port, args.load_seconds))
+        print(f"{name} server: {summary['requests_per_sec']} requests/s, p50 {summary['p50_ms']} ms, "
+              f"p99 {summary['p99_ms']} ms, errors {summary['errors']}")
+
+    monitor = DriftMonitor(reference)
+    monitor.update(features, model.predict(X_test))
+    held_out = monitor.scores()
+    shifted = X_test.copy()
+    shifted["price"] *= args.shift
+    monitor.reset()
+    monitor.update(shifted.to_numpy(dtype=np.float64), model.predict(shifted))
+    drifted = monitor.scores()
+    print(f"held-out rows: max PSI {max(held_out['psi'].values()):.4f}, drifted {held_out['drifted']}")
+    print(f"price x {args.shift}: price PSI {drifted['psi']['price']:.4f}, "
+          f"prediction PSI {drifted['psi']['prediction']:.4f}, drifted {drifted['drifted']}")
+
+
+if __name__ == "__main__":
+    main()
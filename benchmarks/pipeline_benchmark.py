@@ -0,0 +1,204 @@
+"""
+Benchmarks the pipeline steps in isolation and end to end on synthetic data.
+
+For every row count a seeded synthetic dataset is generated once (see
+src/synthetic_data.py), then every stage runs in a fresh interpreter. The
+inputs a stage needs are prepared untimed, then wall time, peak RSS above
+the RSS before the stage and rows per second are measured for the stage
+alone. Prediction scores in process by default, so its peak RSS covers the
+model and the batches; with --scoring-workers the workers are not counted.
+
+Results are compared against a stored baseline; a stage regresses when its
+wall time or peak RSS grows beyond the tolerance, and the run then exits
+non-zero.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark --rows 100000 1000000
+    python -m benchmarks.pipeline_benchmark --rows 100000 --save-baseline
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.profiling import current_rss_mb, peak_rss_mb, reset_peak_rss
+
+STAGES : list[str] = ["ingest", "clean", "train", "eval", "predict", "end_to_end"]
+
+# Differences below these are noise, whatever the relative change.
+MIN_WALL_DELTA_S : float = 0.05
+MIN_RSS_DELTA_MB : float = 16.0
+
+
+def run_stage(stage: str, data_path: str, work_dir: str, scoring_workers: int) -> dict:
+    """
+    Runs a single stage in the current process
+    Args:
+        stage: str: One of STAGES
+        data_path: str: Raw synthetic dataset
+        work_dir: str: Scratch directory for fill values, models and predictions
+        scoring_workers: int: Worker processes of the predict stage, 0 scores in process
+    Returns:
+        dict: rows processed, wall time, peak RSS above the pre-stage RSS and rows per second
+    """
+    import mlflow
+    import mlflow.sklearn
+
+    from src.batch_scoring import BatchScorer
+    from src.data_cleaning import load_fill_values
+    from src.model_dev import get_model
+    from steps.clean_data import clean_df
+    from steps.config import CleanConfig, EvalConfig, ModelNameConfig
+    from steps.eval_model import eval_model
+    from steps.ingest_data import IngestData, ingest_df
+    from steps.model_train import train_model
+    from src.schema import OLIST_SCHEMA
+
+    work = Path(work_dir)
+    clean_config = CleanConfig(use_cache=False, fill_values_path=str(work / "fill_values.json"))
+    train_config = ModelNameConfig(compact_model_path=str(work / "model.olrm"),
+                                   fill_values_path=clean_config.fill_values_path)
+    model_dir = str(work / "model")
+    predictions_path = str(work / "predictions.parquet")
+    mlflow.set_tracking_uri((work / "mlruns").resolve().as_uri())
+
+    def predict() -> int:
+        scorer = BatchScorer(model_dir, load_fill_values(clean_config.fill_values_path), workers=scoring_workers)
+        return scorer.score_file(data_path, predictions_path)["rows"]
+
+    # inputs of the measured stage, prepared untimed
+    data = splits = model = None
+    if stage in ("clean", "train", "eval", "predict"):
+        data = IngestData(data_path, schema=OLIST_SCHEMA).get_data()
+    if stage in ("train", "eval", "predict"):
+        splits = clean_df.entrypoint(data=data, config=clean_config)
+        data = None
+    if stage in ("eval", "predict"):
+        model = get_model(train_config.model_name_field).train_model(splits[0], splits[2])
+    if stage == "predict":
+        mlflow.sklearn.save_model(model, model_dir)
+        splits = model = None
+
+    reset_peak_rss()
+    baseline_rss = current_rss_mb()
+    start = time.perf_counter()
+    if stage == "ingest":
+        rows = len(ingest_df.entrypoint(data_path))
+    elif stage == "clean":
+        rows = len(data)
+        splits = clean_df.entrypoint(data=data, config=clean_config)
+    elif stage == "train":
+        rows = len(splits[0])
+        train_model.entrypoint(splits[0], splits[2], train_config)
+    elif stage == "eval":
+        rows = len(splits[1])
+        eval_model.entrypoint(model, splits[1], splits[3], EvalConfig())
+    elif stage == "predict":
+        rows = predict()
+    elif stage == "end_to_end":
+        data = ingest_df.entrypoint(data_path)
+        rows = len(data)
+        X_train, X_test, y_train, y_test = clean_df.entrypoint(data=data, config=clean_config)
+        del data
+        model = train_model.entrypoint(X_train, y_train, train_config)
+        eval_model.entrypoint(model, X_test, y_test, EvalConfig())
+        mlflow.sklearn.save_model(model, model_dir)
+        predict()
+    else:
+        raise ValueError(f"Unknown stage {stage}")
+    wall = time.perf_counter() - start
+    return {
+        "stage": stage,
+        "rows": rows,
+        "wall_s": round(wall, 3),
+        "peak_rss_mb": round(peak_rss_mb() - baseline_rss, 1),
+        "rows_per_sec": round(rows / wall, 1) if wall else 0.0,
+    }
+
+
+def compare(result: dict, baseline: dict | None, tolerance: float) -> tuple[str, bool]:
+    """
+    Compares a result with its baseline
+    Args:
+        result: dict: Output of run_stage
+        baseline: dict | None: Stored result of the same stage and row count
+        tolerance: float: Allowed relative growth of wall time and peak RSS
+    Returns:
+        tuple[str, bool]: Change summary and whether the stage regressed
+    """
+    if baseline is None:
+        return "no baseline", False
+    wall_delta = result["wall_s"] - baseline["wall_s"]
+    rss_delta = result["peak_rss_mb"] - baseline["peak_rss_mb"]
+    slower = wall_delta > max(tolerance * baseline["wall_s"], MIN_WALL_DELTA_S)
+    bigger = rss_delta > max(tolerance * baseline["peak_rss_mb"], MIN_RSS_DELTA_MB)
+    summary = (f"wall {wall_delta / baseline['wall_s']:+.0%}" if baseline["wall_s"] else "wall n/a") + \
+        (f", rss {rss_delta / baseline['peak_rss_mb']:+.0%}" if baseline["peak_rss_mb"] else ", rss n/a")
+    if slower or bigger:
+        summary += " REGRESSION"
+    return summary, slower or bigger
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--format", choices=["csv", "parquet", "feather"], default="csv")
+    parser.add_argument("--data-dir", default=".cache/benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scoring-workers", type=int, default=0)
+    parser.add_argument("--baseline", default="benchmarks/baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--stage", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--data-path", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage:
+        print(json.dumps(run_stage(args.stage, args.data_path, args.work_dir, args.scoring_workers)))
+        return
+
+    from src.synthetic_data import write_synthetic_olist
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    results, regressions = {}, []
+    print(f"{'stage':<12}{'rows':>12}{'wall_s':>10}{'peak_rss_mb':>14}{'rows_per_sec':>16}  vs baseline")
+    for n_rows in args.rows:
+        data_path = Path(args.data_dir) / f"olist_{n_rows}_{args.seed}.{args.format}"
+        if not data_path.exists():
+            write_synthetic_olist(str(data_path), n_rows, args.seed)
+        for stage in args.stages:
+            with tempfile.TemporaryDirectory() as work_dir:
+                output = subprocess.run(
+                    [sys.executable, "-W", "ignore", "-m", "benchmarks.pipeline_benchmark",
+                     "--stage", stage,
+                     "--data-path", str(data_path),
+                     "--work-dir", work_dir,
+                     "--scoring-workers", str(args.scoring_workers)],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            key = f"{stage}@{n_rows}"
+            results[key] = result
+            summary, regressed = compare(result, baseline.get(key), args.tolerance)
+            if regressed:
+                regressions.append(key)
+            print(f"{stage:<12}{result['rows']:>12}{result['wall_s']:>10}{result['peak_rss_mb']:>14}"
+                  f"{result['rows_per_sec']:>16}  {summary}")
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {baseline_path}")
+    if regressions:
+        print(f"Regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmarks the hashed review text features against the numeric-only model.
+
+The synthetic dataset is read with review_comment_message, the numeric
+columns are preprocessed and both models are trained on the same holdout
+split: a linear regression on the dense numeric matrix and one on the
+sparse matrix of the numeric columns followed by the hashed text. Reports
+the time to hash every row with a plain HashingVectorizer and with
+hash_texts serially and on processes, the size of the sparse matrix next
+to the dense equivalent, and the test scores of both models.
+
+Usage:
+    python -m benchmarks.text_features --rows 1000000 --n-features 262144
+"""
+import argparse
+import os
+import time
+
+
+def _timed(func) -> tuple:
+    start = time.perf_counter()
+    result = func()
+    return result, round(time.perf_counter() - start, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--data-dir", default=".cache/benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--n-features", type=int, default=2 ** 18)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    import numpy as np
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    from steps.ingest_data import IngestData
+    from src.data_cleaning import DataPreProcessingStrategy, IndexSplitStrategy
+    from src.evaluation import MetricAccumulator
+    from src.model_dev import LinearRegressionModel
+    from src.schema import FEATURE_COLUMNS, TARGET_COLUMN, ColumnSchema
+    from src.synthetic_data import write_synthetic_olist
+    from src.text_features import MISSING_TEXT, TEXT_COLUMN, HashedTextFeatures, hash_texts
+
+    data_path = os.path.join(args.data_dir, f"olist_{args.rows}_{args.seed}.parquet")
+    if not os.path.exists(data_path):
+        write_synthetic_olist(data_path, args.rows, args.seed)
+    data = IngestData(data_path, schema=ColumnSchema(usecols=FEATURE_COLUMNS + [TARGET_COLUMN, TEXT_COLUMN])).get_data()
+    texts = data[TEXT_COLUMN].astype(object).fillna(MISSING_TEXT)
+
+    vectorizer = HashingVectorizer(n_features=args.n_features, dtype=np.float64)
+    _, plain_s = _timed(lambda: vectorizer.transform(texts))
+    _, serial_s = _timed(lambda: hash_texts(texts, args.n_features, n_jobs=1))
+    _, parallel_s = _timed(lambda: hash_texts(texts, args.n_features, n_jobs=args.n_jobs))
+    print(f"hashing {len(texts)} rows, {texts.nunique()} distinct: HashingVectorizer {plain_s}s, "
+          f"hash_texts serial {serial_s}s, on processes {parallel_s}s")
+
+    processed = DataPreProcessingStrategy().handle_data(data)
+    processed[TEXT_COLUMN] = data[TEXT_COLUMN]
+    split = IndexSplitStrategy().split(processed[FEATURE_COLUMNS], processed[TARGET_COLUMN])
+    train_rows, test_rows = split.train_index(), split.test_index()
+    del split
+    y = processed[TARGET_COLUMN].to_numpy()
+
+    X_dense = processed[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    X_sparse, build_s = _timed(lambda: HashedTextFeatures(FEATURE_COLUMNS, n_features=args.n_features,
+                                                          n_jobs=args.n_jobs).transform(processed))
+    sparse_mb = (X_sparse.data.nbytes + X_sparse.indices.nbytes + X_sparse.indptr.nbytes) / 1024 ** 2
+    dense_mb = X_sparse.shape[0] * X_sparse.shape[1] * 8 / 1024 ** 2
+    print(f"features {X_sparse.shape}, {X_sparse.nnz} stored values: {sparse_mb:.1f} MB as CSR, "
+          f"{dense_mb:,.0f} MB dense, built in {build_s}s")
+
+    for name, X in (("numeric", X_dense), ("numeric + text", X_sparse)):
+        model, fit_s = _timed(lambda: LinearRegressionModel().train_model(X[train_rows], y[train_rows]))
+        scores = MetricAccumulator().update(y[test_rows], model.predict(X[test_rows])).scores()
+        print(f"{name}: fit {fit_s}s, RMSE {scores['RMSE']:.6f}, MAE {scores['MAE']:.6f}, R2 {scores['R2']:.6f}")
+
+
+if __name__ == "__main__":
+    main()
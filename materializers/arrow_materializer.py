@@ -0,0 +1,61 @@
+import os
+from typing import Any, ClassVar, Tuple, Type
+
+import pandas as pd
+from zenml.enums import ArtifactType
+from zenml.integrations.pandas.materializers.pandas_materializer import PandasMaterializer
+from zenml.utils import io_utils
+
+from src.arrow_io import from_table, read_ipc, to_table, write_ipc
+
+IPC_FILENAME : str = "data.arrow"
+
+
+class ArrowMaterializer(PandasMaterializer):
+    """
+    Stores DataFrames and Series as uncompressed Arrow IPC files
+    On a local artifact store the file is memory-mapped on load, so the
+    numeric columns of the next step are views of the artifact instead of
+    a decoded copy. Remote artifact stores are read into one buffer that
+    the columns then share. Artifacts written by the pandas materializer
+    are still loaded, and metadata and visualizations are inherited from it.
+    """
+    ASSOCIATED_TYPES : ClassVar[Tuple[Type[Any], ...]] = (pd.DataFrame, pd.Series)
+    ASSOCIATED_ARTIFACT_TYPE : ClassVar[ArtifactType] = ArtifactType.DATA
+
+    def load(self, data_type: Type[Any]) -> pd.DataFrame | pd.Series:
+        """
+        Reads the artifact, memory-mapped when the artifact store is local
+        Args:
+            data_type: Type[Any]: pd.DataFrame or pd.Series
+        Returns:
+            pd.DataFrame | pd.Series: The stored data
+        """
+        import pyarrow as pa
+
+        path = os.path.join(self.uri, IPC_FILENAME)
+        if not self.artifact_store.exists(path):
+            return super().load(data_type)
+        series = issubclass(data_type, pd.Series)
+        if not io_utils.is_remote(path):
+            return read_ipc(path, series)
+        with self.artifact_store.open(path, mode="rb") as f:
+            table = pa.ipc.open_file(pa.py_buffer(f.read())).read_all()
+        return from_table(table, series)
+
+    def save(self, data: pd.DataFrame | pd.Series) -> None:
+        """
+        Writes the data as an Arrow IPC file
+        Args:
+            data: pd.DataFrame | pd.Series: Data to store
+        """
+        import pyarrow as pa
+
+        path = os.path.join(self.uri, IPC_FILENAME)
+        if not io_utils.is_remote(path):
+            write_ipc(path, data)
+            return
+        table = to_table(data)
+        with self.artifact_store.open(path, mode="wb") as f:
+            with pa.ipc.new_file(pa.PythonFile(f, mode="w"), table.schema) as writer:
+                writer.write_table(table)
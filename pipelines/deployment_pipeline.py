@@ -1,69 +1,59 @@
-import pandas as pd
-from pydantic import BaseModel
+import logging
 
-from zenml import pipeline , step  
+from zenml import pipeline
 from zenml.config import DockerSettings
 from zenml.constants import DEFAULT_SERVICE_START_STOP_TIMEOUT
 from zenml.integrations.constants import MLFLOW
-from zenml.integrations.mlflow.steps.mlflow_deployer import mlflow_model_deployer_step
 
-from steps.clean_data import clean_df
-from steps.model_train import train_model
-from steps.ingest_data import ingest_df
-from steps.eval_model import eval_model
+from steps.config import FeatureStoreConfig
 
 
 docker_settings = DockerSettings(required_integrations=[MLFLOW])
 
-class DeploymentTriggerConfig(BaseModel):
-    """
-    Parameters for deployment trigger.
-    """
-    min_accuracy: float = 0
-
-@step
-def trigger_deployment( accuracy : float , config: DeploymentTriggerConfig) -> bool:
-    """
-    Step to check if the model accuracy is above a certain threshold.
-    Args:
-        accuracy: Model accuracy.
-        config: Deployment trigger configuration.
-    Returns:
-        bool: True if model accuracy is above the threshold.
-    """
-    return accuracy >= config.min_accuracy
-
 @pipeline(enable_cache=False, settings={"docker": docker_settings})
 def continuous_deployment_pipeline(
+                                   data_path : str = "data/olist_customers_dataset.csv",
                                    min_accuracy : float = 0,
                                    workers : int = 1,
-                                   timeout : int = DEFAULT_SERVICE_START_STOP_TIMEOUT
+                                   timeout : int = DEFAULT_SERVICE_START_STOP_TIMEOUT,
+                                   feature_store : FeatureStoreConfig = FeatureStoreConfig()
                                    ) -> None:
     """
     Continuous deployment pipeline.
     """
-    try:
-        df : pd.DataFrame = ingest_df()
-        X_train , X_test , y_train , y_test = clean_df(df)
-        model = train_model(X_train , y_train)
-        r2 , mse = eval_model(model , X_test , y_test)
-        print(mse)
+    # imports mlflow and sklearn, so only pay for them when the pipeline is composed
+    from zenml.integrations.mlflow.steps.mlflow_deployer import mlflow_model_deployer_step
+    from steps.clean_data import clean_df
+    from steps.config import DeploymentTriggerConfig
+    from steps.deployment_trigger import trigger_deployment
+    from steps.eval_model import eval_model
+    from steps.feature_store import update_feature_store
+    from steps.model_train import train_model
+    from steps.tracking import with_experiment_tracker
 
-        deployment_decision = trigger_deployment(
+    try:
+        # the split is served from the dataset cache while the input file is unchanged
+        X_train , X_test , y_train , y_test = with_experiment_tracker(clean_df)(data_path=data_path)
+        model = with_experiment_tracker(train_model)(X_train , y_train , data_path=data_path)
+        r2 , _ = with_experiment_tracker(eval_model)(model , X_test , y_test , data_path=data_path)
+        if feature_store.enabled:
+            update_feature_store(data_path=data_path, config=feature_store, after="clean_df")
+
+        deployment_decision = with_experiment_tracker(trigger_deployment)(
                                 accuracy=r2,
-                                config=DeploymentTriggerConfig()
+                                model=model,
+                                X_test=X_test,
+                                y_test=y_test,
+                                config=DeploymentTriggerConfig(min_accuracy=min_accuracy)
                                 )
-        print(1)
         try:
             mlflow_model_deployer_step(model=model,
-                                    deploy_decision=True,
+                                    deploy_decision=deployment_decision,
                                     workers=workers,
                                     timeout=timeout
                                     )
-            print(2)
         except Exception as e:
-            print(e)
-        print(3)
+            logging.error(f"Error in composing the deployer step: {e}")
     except Exception as e:
-        print(f"Error in pipeline: {e}")
+        logging.error(f"Error in pipeline: {e}")
         raise 
\ No newline at end of file
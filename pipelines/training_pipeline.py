@@ -1,14 +1,38 @@
+from typing import TYPE_CHECKING
+
 from zenml import pipeline
-import pandas as pd
 
-from steps.ingest_data import ingest_df
-from steps.clean_data import clean_df
-from steps.model_train import train_model
-from steps.eval_model import eval_model
+from steps.config import FeatureStoreConfig
+
+# only annotates local variables, which are never evaluated
+if TYPE_CHECKING:
+    import pandas as pd
 
 @pipeline()
-def train_pipeline(data_path : str) -> None:
-    df : pd.DataFrame = ingest_df(data_path)
-    X_tarin , X_test , y_train , y_test = clean_df(df)
-    model = train_model(X_tarin , y_train)
-    r2 , mse = eval_model(model , X_test , y_test)
+def train_pipeline(data_path : str , tables_dir : str | None = None , text_features : bool = False ,
+                   feature_store : FeatureStoreConfig = FeatureStoreConfig()) -> None:
+    # the steps import sklearn, so only pay for it when the pipeline is composed
+    from steps.ingest_data import ingest_df , ingest_olist_tables
+    from steps.clean_data import clean_df
+    from steps.model_train import train_model
+    from steps.eval_model import eval_model
+    from steps.feature_store import update_feature_store
+    from steps.text_model import train_text_model
+    from steps.tracking import with_experiment_tracker
+
+    # the public dataset's separate tables are joined when tables_dir is given
+    if tables_dir:
+        df : pd.DataFrame = with_experiment_tracker(ingest_olist_tables)(tables_dir)
+    else:
+        df : pd.DataFrame = with_experiment_tracker(ingest_df)(data_path)
+    X_tarin , X_test , y_train , y_test = with_experiment_tracker(clean_df)(df)
+    # incremental training, segment metrics, the feature store and the text model
+    # read their columns from the ingested data, which keeps every column
+    model = with_experiment_tracker(train_model)(X_tarin , y_train , data=df)
+    r2 , mse = with_experiment_tracker(eval_model)(model , X_test , y_test , data=df)
+    # runs after clean_df, which saves the imputation values the store is filled with
+    if feature_store.enabled:
+        update_feature_store(data=df, config=feature_store, after="clean_df")
+    # the hashed review text model is trained and scored next to the numeric one
+    if text_features:
+        with_experiment_tracker(train_text_model)(data=df, after="clean_df")
@@ -1,43 +1,183 @@
-from typing import cast
+import asyncio
+from typing import TYPE_CHECKING, cast
 import click
 from rich import print
 
-from zenml.integrations.mlflow.mlflow_utils import get_tracking_uri
-from zenml.integrations.mlflow.model_deployers.mlflow_model_deployer import MLFlowModelDeployer
-from zenml.integrations.mlflow.services.mlflow_deployment import MLFlowDeploymentService
-
-from pipelines.deployment_pipeline import continuous_deployment_pipeline
+if TYPE_CHECKING:
+    from zenml.integrations.mlflow.model_deployers.mlflow_model_deployer import MLFlowModelDeployer
 
 # constants for deployment configuration
 DEPLOY : str = "deploy"
 PREDICT : str = "predict"
 DEPLOY_AND_PREDICT : str = "deploy_and_predict"
+SERVE : str = "serve"
+
+
+def resolve_model_uri(model_deployer : "MLFlowModelDeployer", model_uri : str | None) -> str | None:
+    """
+    Returns model_uri, or the model URI of the deployed MLflow service.
+    Args:
+        model_deployer: Active MLflow model deployer.
+        model_uri: Explicit model URI, if any.
+    """
+    from zenml.integrations.mlflow.services.mlflow_deployment import MLFlowDeploymentService
+
+    if model_uri is not None:
+        return model_uri
+    services = model_deployer.find_model_server(
+        pipeline_name="continuous_deployment_pipeline",
+        pipeline_step_name="mlflow_model_deployer_step",
+        model_name="model",
+    )
+    if not services:
+        return None
+    return cast(MLFlowDeploymentService, services[0]).config.model_uri
+
 
 @click.command()
 @click.option("--config" , "-c",
-              type=click.Choice([DEPLOY , PREDICT , DEPLOY_AND_PREDICT]),
+              type=click.Choice([DEPLOY , PREDICT , DEPLOY_AND_PREDICT, SERVE]),
               default=DEPLOY_AND_PREDICT,
               help="Deployment configuration"
               "Optionally deploy the model, predict using the model or both."
-              "Default is deploy and predict.",
+              "Default is deploy and predict. 'serve' runs the in-process"
+              " micro-batching server instead of the MLflow one.",
             )
 @click.option(
     "--min-accuracy", 
     type=float, 
     default=0, 
     help="Minimum accuracy for deployment.")
+@click.option(
+    "--input-path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="CSV, Parquet or JSON lines file to batch score.")
+@click.option(
+    "--output-path",
+    default="predictions.parquet",
+    help="Where batch predictions are written (.parquet, .csv or .jsonl).")
+@click.option(
+    "--model-uri",
+    default=None,
+    help="MLflow model URI to score with. Defaults to the deployed model.")
+@click.option(
+    "--batch-size",
+    type=int,
+    default=100_000,
+    help="Rows per scoring micro-batch.")
+@click.option(
+    "--scoring-workers",
+    type=int,
+    default=None,
+    help="Scoring processes, defaults to the number of cores.")
+@click.option("--host", default="127.0.0.1", help="Interface the local server binds.")
+@click.option("--port", type=int, default=8000, help="Port the local server binds.")
+@click.option(
+    "--max-batch-rows",
+    type=int,
+    default=4096,
+    help="Rows at which the local server scores a batch without waiting.")
+@click.option(
+    "--max-wait-ms",
+    type=float,
+    default=2.0,
+    help="Milliseconds the local server waits to fill a batch.")
+@click.option(
+    "--feature-store",
+    default=None,
+    help="Feature store directory, lets the local server score {\"ids\": [...]} payloads.")
+@click.option(
+    "--drift-reference",
+    default=None,
+    help="Training histograms saved by train_model, the local server then reports drift on GET /drift.")
+@click.option(
+    "--watch-seconds",
+    type=float,
+    default=0,
+    help="Seconds between checks of the deployed model URI, the local server hot swaps"
+    " to every newly deployed model. 0 disables the checks.")
+@click.option(
+    "--model-pointer",
+    default=None,
+    help="File the local server workers share the served model URI through; swaps and"
+    " rollbacks sent to one worker reach the others within --watch-seconds, or a second"
+    " when it is 0. Checked instead of the deployed model URI.")
 
-def run_deployment(config : str, min_accuracy : float) -> None:
+def run_deployment(config : str, min_accuracy : float,
+                   input_path : str | None, output_path : str,
+                   model_uri : str | None, batch_size : int,
+                   scoring_workers : int | None, host : str, port : int,
+                   max_batch_rows : int, max_wait_ms : float,
+                   feature_store : str | None, drift_reference : str | None,
+                   watch_seconds : float, model_pointer : str | None) -> None:
     """
     Run the MLFlow deployment pipeline.
     Args:
         config: Deployment configuration.
         min_accuracy: Minimum accuracy for deployment.
+        input_path: File to batch score.
+        output_path: Where batch predictions are written.
+        model_uri: MLflow model URI to score with.
+        batch_size: Rows per scoring micro-batch.
+        scoring_workers: Scoring processes.
+        host: Interface the local server binds.
+        port: Port the local server binds.
+        max_batch_rows: Rows at which the local server scores a batch.
+        max_wait_ms: Milliseconds the local server waits to fill a batch.
+        feature_store: Feature store directory ID payloads are looked up in.
+        drift_reference: Training histograms served rows are compared with.
+        watch_seconds: Seconds between checks of the deployed model URI.
+        model_pointer: File the server workers share the served model URI through.
     """
+    # zenml, mlflow and the pipelines take seconds to import, keep them out of --help
+    from zenml.integrations.mlflow.mlflow_utils import get_tracking_uri
+    from zenml.integrations.mlflow.model_deployers.mlflow_model_deployer import MLFlowModelDeployer
+    from zenml.integrations.mlflow.services.mlflow_deployment import MLFlowDeploymentService
+
+    from pipelines.deployment_pipeline import continuous_deployment_pipeline
+    from src.batch_scoring import BatchScorer, load_model
+    from src.data_cleaning import load_fill_values
+    from src.feature_store import FeatureStore
+    from src.monitoring import DriftMonitor, DriftReference
+    from src.serving import PredictionServer
+    from steps.config import CleanConfig
+
     mlflow_model_deployer_component = MLFlowModelDeployer.get_active_model_deployer()
     if not mlflow_model_deployer_component:
         print("No active MLFlow model deployer found.")
         return
+
+    if config == SERVE:
+        model_uri = resolve_model_uri(mlflow_model_deployer_component, model_uri)
+        if model_uri is None:
+            print("No deployed model found, pass --model-uri to serve.")
+            return
+        monitor = None
+        if drift_reference:
+            reference = DriftReference.load(drift_reference)
+            if reference is None:
+                print(f"No drift reference at {drift_reference}.")
+                return
+            monitor = DriftMonitor(reference)
+        server = PredictionServer(load_model(model_uri), host, port,
+                                  max_batch_rows=max_batch_rows,
+                                  max_wait=max_wait_ms / 1000,
+                                  feature_store=FeatureStore(feature_store) if feature_store else None,
+                                  monitor=monitor,
+                                  model_uri=model_uri,
+                                  loader=load_model,
+                                  model_source=(lambda: resolve_model_uri(mlflow_model_deployer_component, None))
+                                  if watch_seconds > 0 else None,
+                                  watch_interval=watch_seconds if watch_seconds > 0 else 1.0,
+                                  model_pointer=model_pointer)
+        print(f"Serving {model_uri} on http://{host}:{port}/invocations, Ctrl+C to stop.")
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            pass
+        print(f"Served: {server.tracker.summary()}")
+        return
     
     deploy = config == DEPLOY or config == DEPLOY_AND_PREDICT
     predict = config == PREDICT or config == DEPLOY_AND_PREDICT
@@ -53,6 +193,20 @@ def run_deployment(config : str, min_accuracy : float) -> None:
 
     if predict:
         print("Predicting using the model...")
+        if input_path is None:
+            print("No --input-path given, skipping batch scoring.")
+        else:
+            model_uri = resolve_model_uri(mlflow_model_deployer_component, model_uri)
+            if model_uri is None:
+                print("No deployed model found, pass --model-uri to score with.")
+                return
+            scorer = BatchScorer(model_uri,
+                                 fill_values=load_fill_values(CleanConfig().fill_values_path),
+                                 batch_size=batch_size,
+                                 workers=scoring_workers)
+            report = scorer.score_file(input_path, output_path)
+            print(f"Scored {report['rows']} rows into {output_path} "
+                  f"in {report['seconds']}s ({report['rows_per_sec']} rows/sec).")
         print("Prediction done.")
     print(
         "You can run:\n "
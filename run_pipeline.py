@@ -1,13 +1,38 @@
-from zenml.client import Client
+import click
 
-from pipelines.training_pipeline import train_pipeline
 
+@click.command()
+@click.option(
+    "--data-path",
+    default="data/olist_customers_dataset.csv",
+    help="Merged Olist export to train on (CSV, Parquet or Feather).")
+@click.option(
+    "--tables-dir",
+    default=None,
+    help="Directory of the public dataset's separate CSV tables, joined instead of reading --data-path.")
+@click.option(
+    "--text-features",
+    is_flag=True,
+    default=False,
+    help="Also train and score the hashed review text model.")
+def run_pipeline(data_path : str, tables_dir : str | None, text_features : bool) -> None:
+    """
+    Run the training pipeline.
+    Args:
+        data_path: Merged Olist export to train on.
+        tables_dir: Directory of the separate Olist tables.
+        text_features: Whether to train the review text model.
+    """
+    # zenml and the pipelines take seconds to import, keep them out of --help
+    from zenml.client import Client
 
-if __name__ == "__main__":
-    # Path to the data
-    data_path = "data/olist_customers_dataset.csv"
+    from pipelines.training_pipeline import train_pipeline
 
     print(Client().active_stack.experiment_tracker.get_tracking_uri())
-    
+
     # Run the pipeline
-    train_pipeline(data_path)
+    train_pipeline(data_path, tables_dir=tables_dir, text_features=text_features)
+
+
+if __name__ == "__main__":
+    run_pipeline()
@@ -0,0 +1,73 @@
+import pandas as pd
+
+# Column name a Series is stored under when it has no name of its own.
+UNNAMED_SERIES : str = "__series__"
+
+
+def to_table(data: pd.DataFrame | pd.Series):
+    """
+    Converts a DataFrame or Series, with its index, to an Arrow table
+    Args:
+        data: pd.DataFrame | pd.Series: Data to convert
+    Returns:
+        pa.Table: The data, a Series as its single column
+    """
+    import pyarrow as pa
+
+    if isinstance(data, pd.Series):
+        data = data.to_frame(name=data.name if data.name is not None else UNNAMED_SERIES)
+    return pa.Table.from_pandas(data, preserve_index=True)
+
+
+def from_table(table, series: bool = False) -> pd.DataFrame | pd.Series:
+    """
+    Converts an Arrow table written by to_table back to pandas
+    Numeric columns without nulls are views of the table's buffers, so a
+    table read from a memory-mapped file is not copied.
+    Args:
+        table: pa.Table: Table to convert
+        series: bool: Return the single column as a Series
+    Returns:
+        pd.DataFrame | pd.Series: The data
+    """
+    frame = table.to_pandas(split_blocks=True)
+    if not series:
+        return frame
+    column = frame.iloc[:, 0]
+    if column.name == UNNAMED_SERIES:
+        column.name = None
+    return column
+
+
+def write_ipc(path: str, data: pd.DataFrame | pd.Series) -> None:
+    """
+    Writes a DataFrame or Series as an uncompressed Arrow IPC file
+    Args:
+        path: str: Destination file
+        data: pd.DataFrame | pd.Series: Data to write
+    """
+    import pyarrow as pa
+
+    table = to_table(data)
+    with pa.OSFile(str(path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_ipc(path: str, series: bool = False) -> pd.DataFrame | pd.Series:
+    """
+    Opens an Arrow IPC file memory-mapped as a DataFrame or Series
+    Numeric columns without nulls are views of the mapped file, read-only
+    and paged in on first access, instead of being copied into memory.
+    Args:
+        path: str: File written by write_ipc
+        series: bool: Return the single column as a Series
+    Returns:
+        pd.DataFrame | pd.Series: The stored data
+    """
+    import pyarrow as pa
+
+    # the mapping stays alive as long as the returned columns reference it
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return from_table(table, series)
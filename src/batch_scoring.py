@@ -0,0 +1,180 @@
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import DataPreProcessingStrategy
+from src.schema import FEATURE_COLUMNS
+
+ID_COLUMNS : tuple[str, ...] = ("order_id", "customer_id")
+
+# Model and preprocessing of the current worker, set once by _init_worker.
+_WORKER_STATE : dict = {}
+
+
+def load_model(model_uri: str):
+    """
+    Loads a trained regressor from an MLflow model URI or local model directory
+    Args:
+        model_uri: str: e.g. "runs:/<run_id>/model" or a local path
+    Returns:
+        RegressorMixin: The trained model
+    """
+    import mlflow.sklearn
+
+    return mlflow.sklearn.load_model(model_uri)
+
+
+def _init_worker(model_uri: str, fill_values: dict[str, float] | None) -> None:
+    _WORKER_STATE["model"] = load_model(model_uri)
+    _WORKER_STATE["fill_values"] = fill_values
+
+
+def score_batch(batch: pd.DataFrame, model=None, fill_values: dict[str, float] | None = None) -> pd.DataFrame:
+    """
+    Preprocesses a raw batch like DataPreProcessingStrategy and scores it
+    Args:
+        batch: pd.DataFrame: Raw rows, with the id columns if present
+        model: RegressorMixin | None: Model to use, defaults to the worker's model
+        fill_values: dict[str, float] | None: Imputation values fitted at
+            training time, defaults to the worker's
+    Returns:
+        pd.DataFrame: The id columns present in batch and a "prediction" column
+    """
+    model = model if model is not None else _WORKER_STATE["model"]
+    fill_values = fill_values if fill_values is not None else _WORKER_STATE.get("fill_values")
+    features = DataPreProcessingStrategy(fill_values).handle_data(batch)
+    feature_names = list(getattr(model, "feature_names_in_", FEATURE_COLUMNS))
+    features = features.reindex(columns=feature_names)
+    result = batch[[col for col in ID_COLUMNS if col in batch.columns]].copy()
+    result["prediction"] = np.asarray(model.predict(features), dtype=np.float64)
+    return result
+
+
+class ResultWriter():
+    """
+    Appends scored batches to a CSV, Parquet or JSON lines file
+    """
+    def __init__(self, output_path: str):
+        """
+        Constructor for ResultWriter
+        Args:
+            output_path: str: Destination, the format follows the suffix
+        """
+        self.output_path = output_path
+        self.suffix = Path(output_path).suffix.lower()
+        if self.suffix not in (".csv", ".parquet", ".jsonl"):
+            raise ValueError(f"Unsupported output format: {output_path}")
+        self._parquet_writer = None
+        self._started = False
+
+    def write(self, batch: pd.DataFrame) -> None:
+        """
+        Appends a batch to the output file
+        Args:
+            batch: pd.DataFrame: Scored rows
+        """
+        if self.suffix == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(batch, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._parquet_writer.write_table(table)
+        elif self.suffix == ".csv":
+            batch.to_csv(self.output_path, mode="a" if self._started else "w", header=not self._started, index=False)
+        else:
+            with open(self.output_path, "a" if self._started else "w") as f:
+                batch.to_json(f, orient="records", lines=True)
+        self._started = True
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+class BatchScorer():
+    """
+    Scores large files in vectorized micro-batches across a process pool
+    Batches are read in order, preprocessed and scored by the workers and
+    written back in input order as soon as they complete, so only a bounded
+    number of batches is ever held in memory.
+    """
+    def __init__(self, model_uri: str,
+                 fill_values: dict[str, float] | None = None,
+                 batch_size: int = 100_000,
+                 workers: int | None = None):
+        """
+        Constructor for BatchScorer
+        Args:
+            model_uri: str: MLflow model URI or local model directory
+            fill_values: dict[str, float] | None: Imputation values fitted at
+                training time, each batch's medians are used when None
+            batch_size: int: Rows per micro-batch
+            workers: int | None: Worker processes, defaults to the number of
+                cores, 0 scores in this process
+        """
+        self.model_uri = model_uri
+        self.fill_values = fill_values
+        self.batch_size = batch_size
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+
+    def score_file(self, input_path: str, output_path: str) -> dict:
+        """
+        Scores every row of a CSV, Parquet or JSON lines file
+        Args:
+            input_path: str: Raw rows to score
+            output_path: str: Where predictions are written, by suffix
+        Returns:
+            dict: rows scored, elapsed seconds and rows per second
+        """
+        from steps.ingest_data import IngestData
+
+        if self.fill_values is None:
+            logging.warning("No fitted imputation values given, imputing with each batch's medians")
+        batches = IngestData(input_path, chunksize=self.batch_size).iter_chunks()
+        writer = ResultWriter(output_path)
+        rows = 0
+        start = time.perf_counter()
+        try:
+            for scored in self._score_batches(batches):
+                writer.write(scored)
+                rows += len(scored)
+        finally:
+            writer.close()
+        elapsed = time.perf_counter() - start
+        report = {"rows": rows, "seconds": round(elapsed, 3), "rows_per_sec": round(rows / elapsed, 1) if elapsed else 0.0}
+        logging.info(f"Scored {input_path} into {output_path}: {report}")
+        return report
+
+    def _score_batches(self, batches):
+        # ship only what scoring reads to the workers
+        keep = list(FEATURE_COLUMNS) + list(ID_COLUMNS)
+        if self.workers == 0:
+            model = load_model(self.model_uri)
+            for batch in batches:
+                yield score_batch(batch, model, self.fill_values)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_uri, self.fill_values),
+        ) as pool:
+            # at most two batches per worker in flight bounds the memory held
+            pending : deque[Future] = deque()
+            for batch in batches:
+                batch = batch[[col for col in keep if col in batch.columns]]
+                pending.append(pool.submit(score_batch, batch))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
@@ -0,0 +1,114 @@
+"""
+Compact binary artifact for linear regressors and a NumPy-only predictor.
+
+Layout, little-endian:
+    16 byte header   magic b"OLRM", format version (uint16), reserved (uint16),
+                     number of features (uint32), metadata length (uint32)
+    metadata         UTF-8 JSON with the feature order, padded to 8 bytes
+    float64[n]       coefficients in feature order
+    float64[1]       intercept
+    float64[n]       imputation constant per feature, NaN when not imputed
+
+This module only imports numpy, so loading a predictor does not pull in
+sklearn, pandas or mlflow.
+"""
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+
+MAGIC : bytes = b"OLRM"
+FORMAT_VERSION : int = 1
+_HEADER = struct.Struct("<4sHHII")
+
+
+def export_linear_model(model, path: str,
+                        fill_values: dict[str, float] | None = None,
+                        validation_X=None) -> "CompactLinearPredictor":
+    """
+    Writes a fitted linear regressor as a compact artifact
+    Args:
+        model: LinearRegression: Fitted model with a 1-D coef_ and scalar intercept_
+        path: str: Destination file
+        fill_values: dict[str, float] | None: Imputation constant per feature
+        validation_X: pd.DataFrame | np.ndarray | None: Rows on which the
+            artifact must reproduce model.predict bit for bit
+    Returns:
+        CompactLinearPredictor: Predictor memory-mapping the written file
+    Raises:
+        ValueError: If the model is not a single-output linear model, or the
+            predictions on validation_X are not identical
+    """
+    coef = np.asarray(getattr(model, "coef_", None), dtype=np.float64)
+    if coef.ndim != 1 or np.ndim(getattr(model, "intercept_", None)) != 0:
+        raise ValueError(f"{type(model).__name__} is not a single-output linear model")
+    feature_names = [str(name) for name in getattr(model, "feature_names_in_", range(coef.size))]
+    fill_values = fill_values or {}
+    fills = np.array([fill_values.get(name, np.nan) for name in feature_names], dtype=np.float64)
+
+    metadata = json.dumps({"feature_names": feature_names, "model": type(model).__name__}).encode()
+    metadata += b" " * (-len(metadata) % 8)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, coef.size, len(metadata)))
+        f.write(metadata)
+        f.write(coef.astype("<f8").tobytes())
+        f.write(np.array([model.intercept_], dtype="<f8").tobytes())
+        f.write(fills.astype("<f8").tobytes())
+
+    predictor = CompactLinearPredictor(path)
+    if validation_X is not None:
+        expected = np.asarray(model.predict(validation_X))
+        actual = predictor.predict(validation_X, impute=False)
+        if not np.array_equal(expected, actual):
+            raise ValueError("Compact predictor does not reproduce the model's predictions")
+    return predictor
+
+
+class CompactLinearPredictor():
+    """
+    Memory-mapped predictor for artifacts written by export_linear_model
+    """
+    def __init__(self, path: str):
+        """
+        Constructor for CompactLinearPredictor
+        Args:
+            path: str: Artifact written by export_linear_model
+        """
+        with open(path, "rb") as f:
+            magic, version, _, n_features, metadata_length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a compact model artifact")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported compact model version {version}")
+            metadata = json.loads(f.read(metadata_length))
+        self.path = path
+        self.version = version
+        self.feature_names : list[str] = metadata["feature_names"]
+        values = np.asarray(np.memmap(path, dtype="<f8", mode="r", offset=_HEADER.size + metadata_length,
+                                      shape=(2 * n_features + 1,)))
+        self.coef = values[:n_features]
+        self.intercept = values[n_features]
+        self.fill_values = values[n_features + 1:]
+        self._imputed = ~np.isnan(self.fill_values)
+
+    def predict(self, X, impute: bool = True) -> np.ndarray:
+        """
+        Predicts with the same arithmetic as LinearRegression.predict
+        Args:
+            X: np.ndarray | pd.DataFrame: (rows, n_features) matrix in feature order
+            impute: bool: Replace NaN in imputed features with their constant
+        Returns:
+            np.ndarray: One prediction per row
+        """
+        if hasattr(X, "columns") and list(X.columns) != self.feature_names:
+            X = X[self.feature_names]
+        X = np.asarray(X)
+        if X.dtype.kind != "f":
+            X = X.astype(np.float64)
+        if impute and self._imputed.any():
+            missing = np.isnan(X) & self._imputed
+            if missing.any():
+                X = np.where(missing, self.fill_values.astype(X.dtype), X)
+        return X @ self.coef + self.intercept
@@ -1,9 +1,30 @@
+import json
 import logging
+import os
 from abc import ABC, abstractmethod 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
 
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+
+from src.quantile_sketch import QuantileSketch
+from src.schema import MEDIAN_IMPUTED_COLUMNS
+
+# Columns DataPreProcessingStrategy never keeps as features.
+DROPPED_COLUMNS : list[str] = [
+    "order_approved_at",
+    "order_delivered_carrier_date",
+    "order_delivered_customer_date",
+    "order_estimated_delivery_date",
+    "order_purchase_timestamp",
+    "customer_zip_code_prefix",
+    "order_item_id",
+]
+
+# Largest integer magnitude float32 represents exactly.
+FLOAT32_EXACT_INT : int = 2 ** 24
 
 
 class DataStrategy(ABC):
@@ -26,6 +47,65 @@ class DataPreProcessingStrategy(DataStrategy):
     """"
     Startegy for data preprocessing uses DataStrategy interface
     """
+    def __init__(self, fill_values: dict[str, float] | None = None, compact: bool = False):
+        """
+        :param fill_values: Imputation values fitted on the training data,
+            the medians of the handled data are used when None.
+        :param compact: Return the numeric columns as one contiguous float32
+            matrix, written in a single allocation, instead of a copy of
+            their original dtypes.
+        """
+        self.fill_values = fill_values
+        self.compact = compact
+        self.fitted_fill_values : dict[str, float] | None = None
+        self.memory_report : dict[str, float] | None = None
+
+    @staticmethod
+    def feature_columns(data: pd.DataFrame) -> list[str]:
+        """
+        :param data: Raw data.
+        :return: The numeric columns the preprocessing keeps, in data's order.
+        """
+        dropped = set(DROPPED_COLUMNS)
+        # selecting on the empty frame only looks at the dtypes, without copying rows
+        return [col for col in data.iloc[:0].select_dtypes(include=[np.number]).columns if col not in dropped]
+
+    @staticmethod
+    def compact_dtype(data: pd.DataFrame, columns: list[str]) -> np.dtype:
+        """
+        :param data: Raw data.
+        :param columns: Columns of the matrix.
+        :return: float32, or float64 when an integer column holds values
+            float32 cannot represent exactly.
+        """
+        for col in columns:
+            values = data[col]
+            if values.dtype.kind in "iu" and values.size and max(-values.min(), values.max()) > FLOAT32_EXACT_INT:
+                return np.dtype(np.float64)
+        return np.dtype(np.float32)
+
+    def fit_fill_values(self, data: pd.DataFrame) -> dict[str, float]:
+        """
+        :param data: Raw data.
+        :return: The given imputation values, or the medians of data.
+        """
+        return self.fill_values or {col: float(data[col].median()) for col in MEDIAN_IMPUTED_COLUMNS}
+
+    def write_compact(self, data: pd.DataFrame, columns: list[str], fill_values: dict[str, float], out: np.ndarray) -> None:
+        """
+        Writes the imputed columns of data into a preallocated matrix.
+
+        :param data: Raw data.
+        :param columns: Columns to write, one per column of out.
+        :param fill_values: Imputation values of the median imputed columns.
+        :param out: Matrix of len(data) rows, written in place.
+        """
+        for j, col in enumerate(columns):
+            out[:, j] = data[col].to_numpy()
+            if col in fill_values:
+                target = out[:, j]
+                np.copyto(target, np.asarray(fill_values[col], dtype=out.dtype), where=np.isnan(target))
+
     def handle_data(self, data: pd.DataFrame) -> pd.DataFrame | pd.Series:
         """
         Handle the data according to the strategy.
@@ -34,50 +114,277 @@ class DataPreProcessingStrategy(DataStrategy):
         :return: The preprocessed data.
         """
         try:
-            data = data.drop([
-                "order_approved_at",
-                "order_delivered_carrier_date",
-                "order_delivered_customer_date",
-                "order_estimated_delivery_date",
-                "order_purchase_timestamp",
-            ], 
-            axis=1)
-            data["product_weight_g"].fillna(data["product_weight_g"].median(), inplace=True)
-            data["product_length_cm"].fillna(data["product_length_cm"].median(), inplace=True)
-            data["product_height_cm"].fillna(data["product_height_cm"].median(), inplace=True)
-            data["product_width_cm"].fillna(data["product_width_cm"].median(), inplace=True)
-            data["review_comment_message"].fillna("No Review", inplace=True)
-
-            data = data.select_dtypes(include=[np.number])
-            cols_to_drop : list[str] = ["customer_zip_code_prefix", "order_item_id"]
-            data = data.drop(cols_to_drop, axis=1)
-            return data
+            columns = self.feature_columns(data)
+            fill_values = self.fit_fill_values(data)
+            self.fitted_fill_values = fill_values
+            if not self.compact:
+                # one copy of the kept columns, imputed in place; reindex, unlike
+                # data[columns], is not flagged as a slice of data
+                processed = data.reindex(columns=columns)
+                processed.fillna({col: fill_values[col] for col in MEDIAN_IMPUTED_COLUMNS}, inplace=True)
+                return processed
+
+            out = np.empty((len(data), len(columns)), dtype=self.compact_dtype(data, columns))
+            self.write_compact(data, columns, fill_values, out)
+            processed = pd.DataFrame(out, columns=columns, index=data.index, copy=False)
+            self.report_memory(data, columns, processed)
+            return processed
         except Exception as e:
             logging.error(f"Error in preprocessing data: {e}")
             raise e
-        
-class DataDivideStrategy(DataStrategy):
+
+    def report_memory(self, data: pd.DataFrame, columns: list[str], after: pd.DataFrame) -> None:
+        """
+        Logs and keeps the size of the kept columns before and after compaction.
+
+        :param data: Raw data.
+        :param columns: The kept columns.
+        :param after: The compact matrix.
+        """
+        self.memory_report = {
+            "before_mb": float(sum(data[col].memory_usage(index=False, deep=False) for col in columns)) / 1024 ** 2,
+            "after_mb": float(after.memory_usage(index=False, deep=False).sum()) / 1024 ** 2,
+        }
+        logging.info(f"Compact features: {self.memory_report['before_mb']:.1f} MB -> {self.memory_report['after_mb']:.1f} MB")
+
+
+class PartitionedPreProcessingStrategy(DataPreProcessingStrategy):
     """
-    Strategy for data splitting uses DataStrategy interface
+    Preprocessing of row partitions in parallel, with approximate medians.
+
+    The medians are fitted in one pass: every partition summarises its
+    imputed columns in a QuantileSketch of bounded size, and the merged
+    sketches give values whose rank is within error_bound of the exact
+    median with high probability. The partitions are then cleaned with
+    those values and concatenated. Partitions are slices of the same
+    DataFrame, so they run on threads, which numpy's sort and pandas'
+    column kernels do not hold the GIL in.
     """
+    def __init__(self, fill_values: dict[str, float] | None = None, n_partitions: int | None = None,
+                 error_bound: float = 0.001, compact: bool = False):
+        """
+        :param fill_values: Imputation values fitted on the training data,
+            the approximate medians of the handled data are used when None.
+        :param compact: Write the partitions into one contiguous float32 matrix.
+        :param n_partitions: Row partitions and threads, defaults to the
+            number of cores.
+        :param error_bound: Rank error of the medians as a fraction of the rows.
+        """
+        super().__init__(fill_values, compact)
+        self.n_partitions = n_partitions or os.cpu_count() or 1
+        self.error_bound = error_bound
+
+    def _sketch(self, part: pd.DataFrame) -> dict[str, QuantileSketch]:
+        return {col: QuantileSketch(self.error_bound).update(part[col].to_numpy()) for col in MEDIAN_IMPUTED_COLUMNS}
+
     def handle_data(self, data: pd.DataFrame) -> pd.DataFrame | pd.Series:
         """
         Handle the data according to the strategy.
 
         :param data: The data to handle.
-        :return: test and train.
+        :return: The preprocessed data.
         """
         try:
-            X = data.drop("review_score", axis=1)
-            y = data["review_score"]
+            bounds = np.linspace(0, len(data), min(self.n_partitions, max(len(data), 1)) + 1).astype(int)
+            parts = [data.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+            with ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix="preprocess") as pool:
+                fill_values = self.fill_values
+                if fill_values is None:
+                    sketches = list(pool.map(self._sketch, parts))
+                    for other in sketches[1:]:
+                        for col, sketch in other.items():
+                            sketches[0][col].merge(sketch)
+                    fill_values = {col: sketch.median() for col, sketch in sketches[0].items()}
+                self.fitted_fill_values = fill_values
+                if self.compact:
+                    # every partition writes its own rows of the one matrix
+                    columns = self.feature_columns(data)
+                    out = np.empty((len(data), len(columns)), dtype=self.compact_dtype(data, columns))
+                    list(pool.map(lambda bound: self.write_compact(data.iloc[bound[0]:bound[1]], columns, fill_values,
+                                                                   out[bound[0]:bound[1]]),
+                                  zip(bounds[:-1], bounds[1:])))
+                    processed = pd.DataFrame(out, columns=columns, index=data.index, copy=False)
+                    self.report_memory(data, columns, processed)
+                    return processed
+                part_strategy = DataPreProcessingStrategy(fill_values)
+                processed = list(pool.map(part_strategy.handle_data, parts))
+            return pd.concat(processed) if len(processed) > 1 else processed[0]
+        except Exception as e:
+            logging.error(f"Error in preprocessing data: {e}")
+            raise e
+        
+@dataclass
+class Fold:
+    """
+    Row ranges of one train/test split, in the base order of an IndexSplit
+    """
+    train : list[tuple[int, int]]
+    test : tuple[int, int]
 
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-            return X_train, X_test, y_train, y_test
+class IndexSplit:
+    """
+    Train/test splits over a single reordered copy of the data.
+
+    The rows are copied once into a base matrix, shuffled or sorted by time,
+    so that every test set is one contiguous block of the base and every
+    training set at most two. Splits are then slices of the base, views
+    instead of copies, and the rows they hold are compact index arrays
+    into the original data.
+    """
+    def __init__(self, X: pd.DataFrame, y: pd.Series, order: np.ndarray, folds: list[Fold], exclude: str | None = None):
+        """
+        :param X: Features, columns named exclude are skipped.
+        :param y: Labels aligned with X.
+        :param order: Row positions of X in base order.
+        :param folds: Splits as row ranges of the base.
+        :param exclude: Column of X that is not a feature, e.g. the label.
+        """
+        self.columns = [col for col in X.columns if col != exclude]
+        dtype = np.result_type(*(X[col].dtype for col in self.columns))
+        # one column at a time, so no intermediate copy of X is built
+        self.X = np.empty((len(order), len(self.columns)), dtype=dtype)
+        for j, col in enumerate(self.columns):
+            self.X[:, j] = X[col].to_numpy()[order]
+        self.y = np.asarray(y)[order]
+        self.y_name = getattr(y, "name", None)
+        self.index = X.index[order]
+        self.order = order
+        self.folds = folds
+
+    @property
+    def n_splits(self) -> int:
+        return len(self.folds)
+
+    def train_index(self, fold: int = 0) -> np.ndarray:
+        """
+        :param fold: Split number.
+        :return: Positions of the training rows in the original data.
+        """
+        return np.concatenate([self.order[start:stop] for start, stop in self.folds[fold].train])
+
+    def test_index(self, fold: int = 0) -> np.ndarray:
+        """
+        :param fold: Split number.
+        :return: Positions of the test rows in the original data.
+        """
+        start, stop = self.folds[fold].test
+        return self.order[start:stop]
+
+    def rows(self, start: int, stop: int) -> tuple[pd.DataFrame, pd.Series]:
+        """
+        :param start: First base row.
+        :param stop: Base row after the last one.
+        :return: Features and labels of the base rows, views of the base.
+        """
+        index = self.index[start:stop]
+        X = pd.DataFrame(self.X[start:stop], columns=self.columns, index=index, copy=False)
+        return X, pd.Series(self.y[start:stop], index=index, name=self.y_name, copy=False)
+
+    def train_parts(self, fold: int = 0) -> list[tuple[pd.DataFrame, pd.Series]]:
+        """
+        :param fold: Split number.
+        :return: The one or two contiguous blocks of training rows, as views.
+        """
+        return [self.rows(start, stop) for start, stop in self.folds[fold].train]
+
+    def train(self, fold: int = 0) -> tuple[pd.DataFrame, pd.Series]:
+        """
+        :param fold: Split number.
+        :return: Training features and labels, a view unless the training
+            rows span two blocks, which are then concatenated.
+        """
+        parts = self.train_parts(fold)
+        if len(parts) == 1:
+            return parts[0]
+        return pd.concat([X for X, _ in parts]), pd.concat([y for _, y in parts])
+
+    def test(self, fold: int = 0) -> tuple[pd.DataFrame, pd.Series]:
+        """
+        :param fold: Split number.
+        :return: Test features and labels, views of the base.
+        """
+        return self.rows(*self.folds[fold].test)
+
+
+class IndexSplitStrategy(DataStrategy):
+    """
+    Strategy for holdout, k-fold and time based splitting into an IndexSplit
+    """
+    def __init__(self, method: str = "holdout", test_size: float = 0.2, n_splits: int = 5,
+                 random_state: int = 42, time_values: pd.Series | np.ndarray | None = None):
+        """
+        :param method: "holdout" for one shuffled split with the rows of
+            sklearn's train_test_split, "kfold" for n_splits
+            shuffled folds, "time" for splits ordered by time_values, where
+            the test rows always come after the training rows.
+        :param test_size: Test fraction of holdout and single time splits.
+        :param n_splits: Folds of "kfold"; "time" uses expanding windows
+            when n_splits > 1 and one split of test_size otherwise.
+        :param random_state: Seed of the shuffle.
+        :param time_values: Timestamps aligned by position with the data,
+            required by "time".
+        """
+        if method not in ("holdout", "kfold", "time"):
+            raise ValueError(f"Unknown split method {method}")
+        if method == "time" and time_values is None:
+            raise ValueError("Time based splits need time_values")
+        self.method = method
+        self.test_size = test_size
+        self.n_splits = n_splits
+        self.random_state = random_state
+        self.time_values = time_values
+
+    def handle_data(self, data: pd.DataFrame) -> IndexSplit:
+        """
+        Handle the data according to the strategy.
+
+        :param data: The data to split, labels in the review_score column.
+        :return: The splits over one reordered copy of the data.
+        """
+        try:
+            return self.split(data, data["review_score"], exclude="review_score")
         except Exception as e:
             logging.error(f"Error in dividing data: {e}")
             raise e
-        
+
+    def split(self, X: pd.DataFrame, y: pd.Series, exclude: str | None = None) -> IndexSplit:
+        """
+        :param X: Features.
+        :param y: Labels aligned with X.
+        :param exclude: Column of X that is not a feature.
+        :return: The splits over one reordered copy of X and y.
+        """
+        n = len(X)
+        n_test = int(np.ceil(n * self.test_size))
+        if self.method == "time":
+            # NaT is the smallest int64, so rows without a timestamp only ever train
+            timestamps = pd.to_datetime(np.asarray(self.time_values), errors="coerce").asi8
+            order = np.argsort(timestamps, kind="stable")
+        elif self.method == "holdout":
+            # the permutation of train_test_split, which puts the test rows first,
+            # so a seed selects the same rows, in the same order, as it always did
+            permutation = np.random.RandomState(self.random_state).permutation(n)
+            order = np.concatenate([permutation[n_test:], permutation[:n_test]])
+        else:
+            order = np.random.default_rng(self.random_state).permutation(n)
+
+        if self.method == "kfold":
+            bounds = np.linspace(0, n, self.n_splits + 1).astype(int)
+            folds = [
+                Fold([(start, stop) for start, stop in ((0, bounds[k]), (bounds[k + 1], n)) if stop > start],
+                     (bounds[k], bounds[k + 1]))
+                for k in range(self.n_splits)
+            ]
+        elif self.method == "time" and self.n_splits > 1:
+            # expanding windows: fold k trains on every block before its test block
+            block = n // (self.n_splits + 1)
+            starts = [n - (self.n_splits - k) * block for k in range(self.n_splits)]
+            folds = [Fold([(0, start)], (start, start + block)) for start in starts]
+        else:
+            folds = [Fold([(0, n - n_test)], (n - n_test, n))]
+        return IndexSplit(X, y, order, folds, exclude)
+
 
 class DataCleaning(DataStrategy):
     """
@@ -93,7 +400,33 @@ class DataCleaning(DataStrategy):
         except Exception as e:
             logging.error(f"Error in handling data: {e}")
             raise e
-        
+
+
+def save_fill_values(path: str, fill_values: dict[str, float]) -> None:
+    """
+    Persists the imputation values fitted by DataPreProcessingStrategy
+
+    :param path: Destination JSON file.
+    :param fill_values: Column name to imputation value.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(fill_values, f)
+
+
+def load_fill_values(path: str) -> dict[str, float] | None:
+    """
+    Loads imputation values persisted with save_fill_values
+
+    :param path: JSON file written by save_fill_values.
+    :return: Column name to imputation value, None if the file does not exist.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
 # if __name__ == "__main__":
 #     data = pd.read_csv("data/olist_order_items_dataset.csv")
 #     data_cleaning = DataCleaning(data, DataPreProcessingStrategy())
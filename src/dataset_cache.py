@@ -0,0 +1,197 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from src.arrow_io import read_ipc, write_ipc
+
+CACHE_FORMAT_VERSION : int = 2
+SAMPLE_BYTES : int = 1 << 20
+SPLIT_NAMES : tuple[str, ...] = ("X_train", "X_test", "y_train", "y_test")
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Cheap content fingerprint of a file
+    Hashes the size, modification time and the first and last MiB of the
+    file, so a multi-GB export is fingerprinted without reading it fully.
+    Args:
+        path: str: Path to the file
+    Returns:
+        str: Hex digest identifying the file contents
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(SAMPLE_BYTES))
+        if stat.st_size > SAMPLE_BYTES:
+            f.seek(max(stat.st_size - SAMPLE_BYTES, SAMPLE_BYTES))
+            digest.update(f.read(SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+class DatasetCache():
+    """
+    Local on-disk cache of cleaned and split datasets
+    Every entry is a directory holding one uncompressed Arrow IPC file per
+    split, which is opened memory-mapped on a hit. Entries are evicted least
+    recently used first once the cache grows beyond max_bytes.
+    """
+    def __init__(self, cache_dir: str = ".cache/datasets", max_bytes: int = 10 * 1024 ** 3):
+        """
+        Constructor for DatasetCache
+        Args:
+            cache_dir: str: Directory holding the cache entries
+            max_bytes: int: Size above which the least recently used entries are evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, data_path: str, config: dict) -> str:
+        """
+        Builds the cache key of a dataset
+        Args:
+            data_path: str: Path to the raw input file
+            config: dict: Cleaning and splitting configuration
+        Returns:
+            str: Hex digest of the input fingerprint and the configuration
+        """
+        payload = json.dumps(
+            {
+                "version": CACHE_FORMAT_VERSION,
+                "fingerprint": file_fingerprint(data_path),
+                "config": config,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> tuple | None:
+        """
+        Loads the splits stored under key
+        Args:
+            key: str: Cache key
+        Returns:
+            tuple | None: X_train, X_test, y_train, y_test or None on a miss
+        """
+        entry = self.cache_dir / key
+        if not (entry / "meta.json").exists():
+            self._count("misses")
+            return None
+        try:
+            splits = tuple(read_ipc(entry / f"{name}.arrow", series=name.startswith("y_")) for name in SPLIT_NAMES)
+        except Exception as e:
+            logging.warning(f"Dropping unreadable cache entry {key}: {e}")
+            shutil.rmtree(entry, ignore_errors=True)
+            self._count("misses")
+            return None
+        os.utime(entry / "meta.json")
+        self._count("hits")
+        return splits
+
+    def put(self, key: str, X_train: pd.DataFrame, X_test: pd.DataFrame,
+            y_train: pd.Series, y_test: pd.Series, metadata: dict | None = None) -> None:
+        """
+        Stores the splits under key and evicts old entries if needed
+        Args:
+            key: str: Cache key
+            X_train: pd.DataFrame: Training data
+            X_test: pd.DataFrame: Testing data
+            y_train: pd.Series: Training labels
+            y_test: pd.Series: Testing labels
+            metadata: dict | None: JSON serializable values stored with the entry
+        """
+        splits = dict(zip(SPLIT_NAMES, (X_train, X_test, y_train, y_test)))
+        # write into a private directory and rename, so readers never see partial entries
+        staging = self.cache_dir / f".tmp-{uuid.uuid4().hex}"
+        staging.mkdir()
+        try:
+            for name, frame in splits.items():
+                write_ipc(staging / f"{name}.arrow", frame)
+            with open(staging / "meta.json", "w") as f:
+                json.dump({
+                    "created_at": time.time(),
+                    "rows": len(X_train) + len(X_test),
+                    **(metadata or {}),
+                }, f)
+            os.replace(staging, self.cache_dir / key)
+        except OSError as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            if (self.cache_dir / key / "meta.json").exists():
+                logging.info(f"Dataset cache entry {key[:12]} was stored by another run first")
+            else:
+                logging.warning(f"Dataset cache entry {key[:12]} not stored: {e}")
+        self.evict()
+
+    def metadata(self, key: str) -> dict:
+        """
+        Returns the metadata stored with an entry
+        Args:
+            key: str: Cache key
+        Returns:
+            dict: Contents of the entry's meta.json
+        """
+        with open(self.cache_dir / key / "meta.json") as f:
+            return json.load(f)
+
+    def evict(self) -> list[str]:
+        """
+        Removes least recently used entries until the cache fits in max_bytes
+        Returns:
+            list[str]: Keys of the evicted entries
+        """
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            meta = entry / "meta.json"
+            if not meta.exists():
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append((meta.stat().st_mtime, size, entry))
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            evicted.append(entry.name)
+            self._count("evictions")
+        return evicted
+
+    def stats(self) -> dict:
+        """
+        Returns the persisted hit, miss and eviction counters and the cache size
+        Returns:
+            dict: Counters plus the number of entries and their size in bytes
+        """
+        stats = self._load_stats()
+        entries = [e for e in self.cache_dir.iterdir() if e.is_dir() and not e.name.startswith(".")]
+        stats["entries"] = len(entries)
+        stats["bytes"] = sum(f.stat().st_size for e in entries for f in e.iterdir())
+        return stats
+
+    def _load_stats(self) -> dict:
+        try:
+            with open(self.cache_dir / "stats.json") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _count(self, counter: str) -> None:
+        stats = self._load_stats()
+        stats[counter] = stats.get(counter, 0) + 1
+        tmp_path = self.cache_dir / f".stats-{uuid.uuid4().hex}"
+        with open(tmp_path, "w") as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, self.cache_dir / "stats.json")
@@ -0,0 +1,204 @@
+import logging
+import pickle
+import time
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from src.evaluation import MetricAccumulator
+from src.profiling import Profiler
+
+
+@dataclass
+class PerformanceProfile:
+    """
+    Serving cost of a model on a fixed request sample
+    """
+    p50_ms : float = 0.0
+    p99_ms : float = 0.0
+    rows_per_sec : float = 0.0
+    model_mb : float = 0.0
+    predict_rss_mb : float = 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return asdict(self)
+
+
+@dataclass
+class GateDecision:
+    """
+    Outcome of the deployment gate, reasons lists every failed check
+    """
+    deploy : bool
+    reasons : list[str] = field(default_factory=list)
+    accuracy : float = 0.0
+    candidate : PerformanceProfile | None = None
+    baseline_accuracy : float | None = None
+    baseline : PerformanceProfile | None = None
+
+    def metrics(self) -> dict[str, float]:
+        """
+        Returns:
+            dict[str, float]: The accuracies and the profile of every model,
+                keyed like "candidate_p99_ms", without the deployed model's
+                when there was none
+        """
+        metrics = {"candidate_r2": self.accuracy}
+        if self.baseline_accuracy is not None:
+            metrics["baseline_r2"] = self.baseline_accuracy
+        for name, profile in (("candidate", self.candidate), ("baseline", self.baseline)):
+            if profile is not None:
+                metrics.update({f"{name}_{key}": value for key, value in profile.as_dict().items()})
+        return metrics
+
+
+def request_sample(X: pd.DataFrame, n_rows: int = 1000, random_state: int = 42) -> pd.DataFrame:
+    """
+    Draws the rows replayed as requests, the same rows for every model
+    Args:
+        X: pd.DataFrame: Test features
+        n_rows: int: Rows in the sample
+        random_state: int: Seed of the draw
+    Returns:
+        pd.DataFrame: The sampled rows, in their original order
+    """
+    if len(X) <= n_rows:
+        return X
+    rows = np.sort(np.random.default_rng(random_state).choice(len(X), n_rows, replace=False))
+    return X.iloc[rows]
+
+
+def profile_models(models: list, sample: pd.DataFrame, single_row_requests: int = 1000,
+                   min_seconds: float = 0.5) -> list[PerformanceProfile]:
+    """
+    Replays the sample against models loaded in process
+    Every single-row request is one predict call on one row of the sample,
+    cycling through it, and the models take turns on every row, so noise
+    from the rest of the machine hits them alike. Throughput is measured by
+    predicting the whole sample as one batch, the models again taking
+    turns, until each has scored for min_seconds; the memory is the pickled
+    model and the peak RSS growth while scoring a batch.
+    Args:
+        models: list[RegressorMixin]: Models to profile, e.g. candidate and deployed
+        sample: pd.DataFrame: Request rows, see request_sample
+        single_row_requests: int: Single-row predict calls timed per model
+        min_seconds: float: Shortest batch scoring time measured per model
+    Returns:
+        list[PerformanceProfile]: Latency percentiles, throughput and memory,
+            one per model
+    """
+    # the first calls pay for lazy imports and validation caches
+    for model in models:
+        model.predict(sample.iloc[:1])
+    latencies = np.empty((len(models), single_row_requests), dtype=np.float64)
+    for i in range(single_row_requests):
+        row = sample.iloc[i % len(sample):i % len(sample) + 1]
+        for m, model in enumerate(models):
+            start = time.perf_counter()
+            model.predict(row)
+            latencies[m, i] = time.perf_counter() - start
+
+    # the first batch of every model also measures its scoring memory
+    rss = []
+    for model in models:
+        with Profiler() as profiler:
+            model.predict(sample)
+        rss.append(profiler.profile.peak_rss_growth_mb)
+    batch_seconds = np.zeros(len(models))
+    batches = 0
+    while batches == 0 or batch_seconds.min() < min_seconds:
+        for m, model in enumerate(models):
+            start = time.perf_counter()
+            model.predict(sample)
+            batch_seconds[m] += time.perf_counter() - start
+        batches += 1
+
+    profiles = []
+    for m, model in enumerate(models):
+        p50, p99 = np.percentile(latencies[m] * 1000, [50, 99])
+        profiles.append(PerformanceProfile(
+            p50_ms=round(float(p50), 4),
+            p99_ms=round(float(p99), 4),
+            rows_per_sec=round(float(batches * len(sample) / batch_seconds[m]), 1),
+            model_mb=round(len(pickle.dumps(model)) / 1024 ** 2, 4),
+            predict_rss_mb=round(rss[m], 1),
+        ))
+    return profiles
+
+
+def score_r2(model, X: pd.DataFrame, y: pd.Series) -> float:
+    """
+    Args:
+        model: RegressorMixin: Model to score
+        X: pd.DataFrame: Test features
+        y: pd.Series: Test labels
+    Returns:
+        float: R2 of the model's predictions
+    """
+    return MetricAccumulator().update(y, model.predict(X)).scores()["R2"]
+
+
+def gate_decision(accuracy: float, candidate: PerformanceProfile,
+                  baseline_accuracy: float | None = None, baseline: PerformanceProfile | None = None,
+                  min_accuracy: float = 0.0, max_accuracy_drop: float = 0.01,
+                  max_slowdown: float = 1.2, latency_slack_ms: float = 0.05,
+                  max_memory_growth: float = 1.5, max_p99_ms: float | None = None,
+                  memory_slack_mb: float = 16.0, max_predict_rss_mb: float | None = None) -> GateDecision:
+    """
+    Combines the accuracy and performance checks into one decision
+    Without a deployed model only min_accuracy, max_p99_ms and
+    max_predict_rss_mb apply. Latencies may grow by max_slowdown plus
+    latency_slack_ms, which keeps timer noise on sub-millisecond predictions
+    from failing the gate; the scoring memory likewise may grow by
+    max_memory_growth plus memory_slack_mb, as peak RSS moves by a few MB
+    with the allocator.
+    Args:
+        accuracy: float: R2 of the candidate
+        candidate: PerformanceProfile: Profile of the candidate
+        baseline_accuracy: float | None: R2 of the deployed model on the same rows
+        baseline: PerformanceProfile | None: Profile of the deployed model
+        min_accuracy: float: Lowest R2 deployed
+        max_accuracy_drop: float: Largest R2 loss against the deployed model
+        max_slowdown: float: Largest latency ratio, and throughput loss ratio,
+            against the deployed model
+        latency_slack_ms: float: Latency growth always allowed
+        max_memory_growth: float: Largest model size ratio, and scoring memory
+            ratio, against the deployed model
+        max_p99_ms: float | None: Absolute single-row p99 limit
+        memory_slack_mb: float: Scoring memory growth always allowed
+        max_predict_rss_mb: float | None: Absolute limit of the memory used to score the sample
+    Returns:
+        GateDecision: Whether to deploy and why not
+    """
+    reasons = []
+    if accuracy < min_accuracy:
+        reasons.append(f"R2 {accuracy:.4f} is below {min_accuracy:.4f}")
+    if max_p99_ms is not None and candidate.p99_ms > max_p99_ms:
+        reasons.append(f"p99 {candidate.p99_ms:.3f} ms is above {max_p99_ms:.3f} ms")
+    if max_predict_rss_mb is not None and candidate.predict_rss_mb > max_predict_rss_mb:
+        reasons.append(f"scoring memory {candidate.predict_rss_mb:.1f} MB is above {max_predict_rss_mb:.1f} MB")
+    if baseline_accuracy is not None and accuracy < baseline_accuracy - max_accuracy_drop:
+        reasons.append(f"R2 {accuracy:.4f} is below the deployed {baseline_accuracy:.4f}")
+    if baseline is not None:
+        for metric in ("p50_ms", "p99_ms"):
+            limit = getattr(baseline, metric) * max_slowdown + latency_slack_ms
+            if getattr(candidate, metric) > limit:
+                reasons.append(f"{metric} {getattr(candidate, metric):.3f} is above {limit:.3f}, "
+                               f"deployed {getattr(baseline, metric):.3f}")
+        if candidate.rows_per_sec * max_slowdown < baseline.rows_per_sec:
+            reasons.append(f"throughput {candidate.rows_per_sec:.0f} rows/s is below the deployed "
+                           f"{baseline.rows_per_sec:.0f} rows/s / {max_slowdown}")
+        if candidate.model_mb > baseline.model_mb * max_memory_growth:
+            reasons.append(f"model size {candidate.model_mb:.3f} MB is above {max_memory_growth}x "
+                           f"the deployed {baseline.model_mb:.3f} MB")
+        rss_limit = baseline.predict_rss_mb * max_memory_growth + memory_slack_mb
+        if candidate.predict_rss_mb > rss_limit:
+            reasons.append(f"scoring memory {candidate.predict_rss_mb:.1f} MB is above {rss_limit:.1f} MB, "
+                           f"deployed {baseline.predict_rss_mb:.1f} MB")
+    decision = GateDecision(not reasons, reasons, accuracy, candidate, baseline_accuracy, baseline)
+    if decision.deploy:
+        logging.info(f"Deployment gate passed: {candidate.as_dict()}")
+    else:
+        logging.warning(f"Deployment gate failed: {'; '.join(reasons)}")
+    return decision
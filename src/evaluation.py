@@ -2,6 +2,7 @@ import logging
 from abc import ABC, abstractmethod
 
 import numpy as np
+import pandas as pd
 from sklearn.metrics import mean_squared_error , r2_score , root_mean_squared_error
 
 class Evaluation(ABC):
@@ -82,4 +83,258 @@ class  RMSE(Evaluation):
             logging.info(f"Root Mean Squared Error: {rmse}")
             return rmse
         except Exception as e:
-            logging.error(f"Error in calculating RMSE: {e}")
\ No newline at end of file
+            logging.error(f"Error in calculating RMSE: {e}")
+            raise e
+
+
+class MetricAccumulator():
+    """
+    Mergeable running sums for regression metrics
+    Holds the count, the running mean and centred sum of squares of y_true
+    and the sums of squared and absolute errors, all in float64. Batches are
+    folded in with one vectorized pass each, and accumulators built on
+    disjoint rows, e.g. by parallel workers, are combined with merge.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean_true = 0.0
+        self.m2_true = 0.0
+        self.sse = 0.0
+        self.sae = 0.0
+
+    def update(self, y_true, y_pred) -> "MetricAccumulator":
+        """
+        Folds a batch of labels and predictions into the sums
+        Args:
+            y_true: np.ndarray: True labels
+            y_pred: np.ndarray: Predicted labels
+        Returns:
+            MetricAccumulator: self
+        """
+        y_true = np.asarray(y_true, dtype=np.float64).ravel()
+        y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+        if y_true.shape != y_pred.shape:
+            raise ValueError(f"y_true and y_pred differ in length: {y_true.shape} vs {y_pred.shape}")
+        if y_true.size == 0:
+            return self
+        batch = MetricAccumulator()
+        batch.count = y_true.size
+        batch.mean_true = float(y_true.mean())
+        centred = y_true - batch.mean_true
+        batch.m2_true = float(centred @ centred)
+        errors = y_true - y_pred
+        batch.sse = float(errors @ errors)
+        batch.sae = float(np.abs(errors).sum())
+        return self.merge(batch)
+
+    def merge(self, other: "MetricAccumulator") -> "MetricAccumulator":
+        """
+        Merges the sums of another accumulator built on disjoint rows
+        Args:
+            other: MetricAccumulator: Accumulator to merge in
+        Returns:
+            MetricAccumulator: self
+        """
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean_true - self.mean_true
+        self.m2_true += other.m2_true + delta * delta * self.count * other.count / total
+        self.mean_true += delta * other.count / total
+        self.count = total
+        self.sse += other.sse
+        self.sae += other.sae
+        return self
+
+    @property
+    def mse(self) -> float:
+        return self.sse / self.count
+
+    @property
+    def rmse(self) -> float:
+        return float(np.sqrt(self.mse))
+
+    @property
+    def mae(self) -> float:
+        return self.sae / self.count
+
+    @property
+    def r2(self) -> float:
+        # same convention as sklearn for a constant y_true
+        if self.m2_true == 0:
+            return 1.0 if self.sse == 0 else 0.0
+        return 1.0 - self.sse / self.m2_true
+
+    def scores(self) -> dict:
+        """
+        Returns every metric computed from the sums
+        Returns:
+            dict: MSE, RMSE, MAE and R2
+        """
+        if self.count == 0:
+            raise ValueError("No rows have been folded into the accumulator")
+        return {"MSE": self.mse, "RMSE": self.rmse, "MAE": self.mae, "R2": self.r2}
+
+
+class RegressionMetrics(Evaluation):
+    """
+    Class to calculate every regression metric in a single pass
+    """
+    def __init__(self, chunksize: int | None = None):
+        """
+        Constructor for RegressionMetrics
+        Args:
+            chunksize: int | None: Rows per vectorized batch, None uses one batch
+        """
+        self.chunksize = chunksize
+
+    def calculate_scores(self, y_true : np.ndarray, y_pred : np.ndarray) -> dict :
+        """
+        Calculate MSE, RMSE, MAE and R2 with one pass over the data
+        Args:
+            y_true: np.ndarray: True labels
+            y_pred: np.ndarray: Predicted labels
+        Returns:
+            dict: Dictionary containing the scores
+        """
+        try:
+            logging.info('Calculating regression metrics')
+            y_true, y_pred = np.asarray(y_true), np.asarray(y_pred)
+            chunksize = self.chunksize or max(len(y_true), 1)
+            accumulator = MetricAccumulator()
+            for start in range(0, len(y_true), chunksize):
+                accumulator.update(y_true[start:start + chunksize], y_pred[start:start + chunksize])
+            scores = accumulator.scores()
+            logging.info(f"Regression metrics: {scores}")
+            return scores
+        except Exception as e:
+            logging.error(f"Error in calculating regression metrics: {e}")
+            raise e
+
+
+def evaluate_stream(model, chunks) -> MetricAccumulator:
+    """
+    Scores a model on (X, y) chunks without holding all predictions
+    Args:
+        model: RegressorMixin: Fitted model
+        chunks: Iterable[tuple]: (X_chunk, y_chunk) pairs
+    Returns:
+        MetricAccumulator: Sums over every chunk, merge with other workers' results
+    """
+    accumulator = MetricAccumulator()
+    for X_chunk, y_chunk in chunks:
+        accumulator.update(y_chunk, model.predict(X_chunk))
+    return accumulator
+
+
+def grouped_scores(y_true: np.ndarray, y_pred: np.ndarray, groups: np.ndarray, n_groups: int) -> dict:
+    """
+    Computes every regression metric per group in one vectorized pass
+    Args:
+        y_true: np.ndarray: True labels
+        y_pred: np.ndarray: Predicted labels
+        groups: np.ndarray: Integer group code of every row, in [0, n_groups)
+        n_groups: int: Number of groups
+    Returns:
+        dict: count, MSE, RMSE, MAE and R2 arrays of length n_groups,
+            NaN for groups without rows
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    errors = y_true - np.asarray(y_pred, dtype=np.float64)
+    count = np.bincount(groups, minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_true = np.bincount(groups, y_true, minlength=n_groups) / count
+        # centre on the group mean before squaring, raw sums of y^2 cancel badly
+        sst = np.bincount(groups, (y_true - mean_true[groups]) ** 2, minlength=n_groups)
+        sse = np.bincount(groups, errors * errors, minlength=n_groups)
+        sae = np.bincount(groups, np.abs(errors), minlength=n_groups)
+        mse = sse / count
+        r2 = np.where(sst > 0, 1.0 - sse / sst, np.where(sse == 0, 1.0, 0.0))
+    r2[count == 0] = np.nan
+    return {"count": count, "MSE": mse, "RMSE": np.sqrt(mse), "MAE": sae / count, "R2": r2}
+
+
+class SegmentedEvaluation(Evaluation):
+    """
+    Class to calculate regression metrics per segment with bootstrap intervals
+    """
+    def __init__(self, segments, n_resamples: int = 0, confidence: float = 0.95,
+                 random_state: int = 42, max_batch_elements: int = 1 << 22):
+        """
+        Constructor for SegmentedEvaluation
+        Args:
+            segments: pd.Series | np.ndarray: Segment label of every row, e.g. customer_state
+            n_resamples: int: Bootstrap resamples, 0 skips the intervals
+            confidence: float: Coverage of the percentile intervals
+            random_state: int: Seed of the resampling
+            max_batch_elements: int: Resamples are drawn as a (batch, n) index
+                matrix holding at most this many elements
+        """
+        self.segments = segments
+        self.n_resamples = n_resamples
+        self.confidence = confidence
+        self.random_state = random_state
+        self.max_batch_elements = max_batch_elements
+
+    def calculate_scores(self, y_true : np.ndarray, y_pred : np.ndarray) -> pd.DataFrame :
+        """
+        Calculate the metrics for every segment and for all rows
+        Args:
+            y_true: np.ndarray: True labels
+            y_pred: np.ndarray: Predicted labels
+        Returns:
+            pd.DataFrame: One row per segment plus "ALL", with count, MSE, RMSE,
+                MAE, R2 and, when resampling, <metric>_lo / <metric>_hi bounds
+        """
+        try:
+            logging.info('Calculating segment metrics')
+            y_true = np.asarray(y_true, dtype=np.float64)
+            y_pred = np.asarray(y_pred, dtype=np.float64)
+            codes, labels = pd.factorize(np.asarray(self.segments), use_na_sentinel=False)
+            segment_scores = grouped_scores(y_true, y_pred, codes, len(labels))
+            overall_scores = grouped_scores(y_true, y_pred, np.zeros(len(codes), dtype=np.intp), 1)
+            scores = {metric: np.concatenate([segment_scores[metric], overall_scores[metric]]) for metric in segment_scores}
+            result = pd.DataFrame(scores, index=pd.Index([str(label) for label in labels] + ["ALL"], name="segment"))
+            if self.n_resamples:
+                bounds = self._bootstrap(y_true, y_pred, codes, len(labels))
+                result = result.join(pd.DataFrame(bounds, index=result.index))
+            logging.info(f"Segment metrics for {len(labels)} segments")
+            return result
+        except Exception as e:
+            logging.error(f"Error in calculating segment metrics: {e}")
+            raise e
+
+    def _bootstrap(self, y_true: np.ndarray, y_pred: np.ndarray, codes: np.ndarray, n_segments: int) -> dict:
+        """
+        Percentile intervals from batched resampling matrices
+        Every batch draws a (batch, n) index matrix, and resample r of the
+        batch is scored per segment by offsetting its segment codes by
+        r * n_segments, so one bincount scores the whole batch.
+        """
+        n = len(y_true)
+        rng = np.random.default_rng(self.random_state)
+        batch_size = max(1, min(self.n_resamples, self.max_batch_elements // max(n, 1)))
+        samples = {metric: [] for metric in ("MSE", "RMSE", "MAE", "R2")}
+        for start in range(0, self.n_resamples, batch_size):
+            batch = min(batch_size, self.n_resamples - start)
+            index = rng.integers(0, n, size=(batch, n))
+            resample_true, resample_pred = y_true[index].ravel(), y_pred[index].ravel()
+            resample_ids = np.repeat(np.arange(batch), n)
+            segment_scores = grouped_scores(
+                resample_true, resample_pred,
+                (codes[index] + (np.arange(batch) * n_segments)[:, None]).ravel(),
+                batch * n_segments,
+            )
+            overall_scores = grouped_scores(resample_true, resample_pred, resample_ids, batch)
+            for metric in samples:
+                samples[metric].append(np.column_stack([
+                    segment_scores[metric].reshape(batch, n_segments),
+                    overall_scores[metric],
+                ]))
+        alpha = (1 - self.confidence) / 2
+        bounds = {}
+        for metric, batches in samples.items():
+            stacked = np.concatenate(batches)
+            low, high = np.nanquantile(stacked, [alpha, 1 - alpha], axis=0)
+            bounds[f"{metric}_lo"], bounds[f"{metric}_hi"] = low, high
+        return bounds
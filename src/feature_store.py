@@ -0,0 +1,256 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FEATURE_STORE_VERSION : int = 1
+# Fraction of hash slots that may be taken before the slot table is doubled.
+MAX_LOAD_FACTOR : float = 0.5
+EMPTY_SLOT : int = -1
+
+
+def key_digests(keys) -> np.ndarray:
+    """
+    Hashes IDs to 128-bit digests, stored as two uint64 words per ID
+    Args:
+        keys: Iterable: IDs, e.g. customer_id values, compared as strings
+    Returns:
+        np.ndarray: (n, 2) uint64 digests, the first word picks the hash slot
+    """
+    digests = b"".join(hashlib.blake2b(str(key).encode(), digest_size=16).digest() for key in keys)
+    return np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+
+
+class FeatureStore():
+    """
+    Memory-mapped feature rows indexed by an ID, e.g. customer_id
+    A store is a directory of flat binary files: the float32 feature
+    matrix, the 128-bit digest of every row's ID and an open addressing
+    hash table from digests to rows, plus meta.json. Lookups hash the IDs
+    and probe the memory-mapped table, so only the pages of the requested
+    rows are read. Upserts overwrite the rows of known IDs in place and
+    append the others, growing the files by doubling instead of rebuilding
+    the store; meta.json is replaced last and refresh picks it up.
+    """
+    def __init__(self, path: str):
+        """
+        Constructor for FeatureStore, opens an existing store read-only
+        Args:
+            path: str: Store directory
+        """
+        self.path = Path(path)
+        self._open()
+
+    def _open(self) -> None:
+        with open(self.path / "meta.json") as f:
+            self.meta = json.load(f)
+        if self.meta["version"] != FEATURE_STORE_VERSION:
+            raise ValueError(f"Unsupported feature store version {self.meta['version']}")
+        self.columns : list[str] = self.meta["columns"]
+        self.count : int = self.meta["count"]
+        self._meta_mtime = os.stat(self.path / "meta.json").st_mtime_ns
+        self._map("r")
+
+    def _map(self, mode: str) -> None:
+        capacity, n_slots = self.meta["capacity"], self.meta["n_slots"]
+        # the hash table is only ever replaced, never written in place
+        self.slots = np.memmap(self.path / "slots.bin", dtype=np.int64, mode="r", shape=(n_slots,))
+        self.features = np.memmap(self.path / "features.bin", dtype=np.float32, mode=mode,
+                                  shape=(capacity, len(self.columns)))
+        self.keys = np.memmap(self.path / "keys.bin", dtype=np.uint64, mode=mode, shape=(capacity, 2))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @staticmethod
+    def create(path: str, columns: list[str], capacity: int = 1024) -> "FeatureStore":
+        """
+        Creates an empty store
+        Args:
+            path: str: Store directory
+            columns: list[str]: Feature columns, in model order
+            capacity: int: Rows allocated up front
+        Returns:
+            FeatureStore: The empty store
+        """
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        capacity = max(capacity, 1)
+        n_slots = 1 << int(np.ceil(np.log2(capacity / MAX_LOAD_FACTOR)))
+        for name, size in (("features.bin", capacity * len(columns) * 4), ("keys.bin", capacity * 16)):
+            with open(directory / name, "wb") as f:
+                f.truncate(size)
+        np.full(n_slots, EMPTY_SLOT, dtype=np.int64).tofile(directory / "slots.bin")
+        meta = {"version": FEATURE_STORE_VERSION, "columns": list(columns), "count": 0,
+                "capacity": capacity, "n_slots": n_slots}
+        _write_meta(directory, meta)
+        return FeatureStore(path)
+
+    @staticmethod
+    def open_or_create(path: str, columns: list[str], capacity: int = 1024) -> "FeatureStore":
+        """
+        Opens the store at path, or creates it when there is none
+        Args:
+            path: str: Store directory
+            columns: list[str]: Feature columns, must match an existing store
+            capacity: int: Rows allocated when the store is created
+        Returns:
+            FeatureStore: The store
+        """
+        if not (Path(path) / "meta.json").exists():
+            return FeatureStore.create(path, columns, capacity)
+        store = FeatureStore(path)
+        if store.columns != list(columns):
+            raise ValueError(f"Feature store {path} holds columns {store.columns}, not {list(columns)}")
+        return store
+
+    def _find(self, digests: np.ndarray) -> np.ndarray:
+        """
+        Probes the hash table for digests
+        Args:
+            digests: np.ndarray: (n, 2) digests of the IDs
+        Returns:
+            np.ndarray: Row of every digest, -1 when absent
+        """
+        mask = np.uint64(len(self.slots) - 1)
+        position = (digests[:, 0] & mask).astype(np.int64)
+        rows = np.full(len(digests), EMPTY_SLOT, dtype=np.int64)
+        pending = np.arange(len(digests))
+        while pending.size:
+            candidate = np.asarray(self.slots[position[pending]])
+            empty = candidate == EMPTY_SLOT
+            hit = np.zeros(pending.size, dtype=bool)
+            filled = ~empty
+            hit[filled] = (np.asarray(self.keys[candidate[filled]]) == digests[pending[filled]]).all(axis=1)
+            rows[pending[hit]] = candidate[hit]
+            pending = pending[~(empty | hit)]
+            position[pending] = (position[pending] + 1) & (len(self.slots) - 1)
+        return rows
+
+    def lookup(self, ids) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Fetches the feature rows of a batch of IDs
+        Args:
+            ids: Iterable: IDs to look up
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (n, n_features) float32 features,
+                NaN for unknown IDs, and whether each ID was found
+        """
+        rows = self._find(key_digests(ids))
+        found = rows >= 0
+        features = np.full((len(rows), len(self.columns)), np.nan, dtype=np.float32)
+        features[found] = self.features[rows[found]]
+        return features, found
+
+    def refresh(self) -> None:
+        """
+        Reopens the store when another process has upserted since it was opened
+        """
+        if os.stat(self.path / "meta.json").st_mtime_ns != self._meta_mtime:
+            self._open()
+
+    def upsert(self, ids, features: np.ndarray) -> tuple[int, int]:
+        """
+        Inserts or overwrites the feature rows of IDs
+        When an ID repeats in the batch its last row wins. New rows are
+        written past the rows readers know of, and the hash table is
+        replaced as a new file, so open readers keep a consistent view;
+        overwritten rows change in place.
+        Args:
+            ids: Iterable: IDs of the rows
+            features: np.ndarray: (n, n_features) matrix in store column order
+        Returns:
+            tuple[int, int]: Rows updated and rows inserted
+        """
+        digests = key_digests(ids)
+        features = np.asarray(features, dtype=np.float32)
+        if features.shape != (len(digests), len(self.columns)):
+            raise ValueError(f"Expected {len(digests)} rows of {len(self.columns)} features, got {features.shape}")
+        # keep the last occurrence of every ID
+        _, last = np.unique(digests[::-1], axis=0, return_index=True)
+        keep = np.sort(len(digests) - 1 - last)
+        digests, features = digests[keep], features[keep]
+
+        rows = self._find(digests)
+        known = rows >= 0
+        new = np.flatnonzero(~known)
+        count = self.count + new.size
+        capacity = self.meta["capacity"]
+        while capacity < count:
+            capacity *= 2
+        if capacity != self.meta["capacity"]:
+            # growing the files leaves the pages mapped by readers in place
+            for name, row_bytes in (("features.bin", len(self.columns) * 4), ("keys.bin", 16)):
+                with open(self.path / name, "r+b") as f:
+                    f.truncate(capacity * row_bytes)
+            self.meta["capacity"] = capacity
+        self._map("r+")
+        new_rows = np.arange(self.count, count)
+        self.features[rows[known]] = features[known]
+        self.features[new_rows] = features[new]
+        self.keys[new_rows] = digests[new]
+        self.features.flush()
+        self.keys.flush()
+
+        n_slots = self.meta["n_slots"]
+        while count > n_slots * MAX_LOAD_FACTOR:
+            n_slots *= 2
+        if n_slots != self.meta["n_slots"]:
+            # rehashed from the stored digests, no features are read
+            slots = np.full(n_slots, EMPTY_SLOT, dtype=np.int64)
+            _insert_slots(slots, np.asarray(self.keys[:count]), np.arange(count))
+        else:
+            slots = np.array(self.slots)
+            _insert_slots(slots, digests[new], new_rows)
+        slots.tofile(self.path / "slots.bin.tmp")
+        os.replace(self.path / "slots.bin.tmp", self.path / "slots.bin")
+
+        self.meta.update(count=count, n_slots=n_slots)
+        _write_meta(self.path, self.meta)
+        self._open()
+        logging.info(f"Feature store {self.path}: {int(known.sum())} rows updated, {new.size} inserted, {count} total")
+        return int(known.sum()), int(new.size)
+
+
+def _insert_slots(slots: np.ndarray, digests: np.ndarray, rows: np.ndarray) -> None:
+    mask = len(slots) - 1
+    position = (digests[:, 0] & np.uint64(mask)).astype(np.int64)
+    pending = np.arange(len(digests))
+    while pending.size:
+        free = pending[slots[position[pending]] == EMPTY_SLOT]
+        # of several digests probing the same free slot, the first takes it
+        _, first = np.unique(position[free], return_index=True)
+        placed = free[first]
+        slots[position[placed]] = rows[placed]
+        taken = np.zeros(len(digests), dtype=bool)
+        taken[placed] = True
+        pending = pending[~taken[pending]]
+        position[pending] = (position[pending] + 1) & mask
+
+
+def _write_meta(directory: Path, meta: dict) -> None:
+    tmp_path = directory / "meta.json.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, directory / "meta.json")
+
+
+def build_feature_rows(data: pd.DataFrame, key_column: str, features: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs preprocessed feature rows with the IDs of their raw rows
+    The preprocessing keeps the raw row labels as index, so the IDs are
+    aligned by index; rows without an ID are skipped.
+    Args:
+        data: pd.DataFrame: Raw rows holding key_column
+        key_column: str: ID column, e.g. "customer_id"
+        features: pd.DataFrame: Preprocessed features of the same rows
+    Returns:
+        tuple[np.ndarray, np.ndarray]: IDs and the (n, n_features) float32 matrix
+    """
+    ids = data[key_column].reindex(features.index)
+    present = ids.notna().to_numpy()
+    return ids.to_numpy(dtype=object)[present], features.to_numpy(dtype=np.float32)[present]
@@ -0,0 +1,291 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from src.schema import FEATURE_COLUMNS
+
+# Upper bounds of the latency histogram buckets in ms, the last one is open.
+LATENCY_BUCKETS_MS : list[float] = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+def load_payloads(path: str) -> list[bytes]:
+    """
+    Reads request bodies to replay, one JSON document per line
+    Args:
+        path: str: JSON lines file, e.g. {"dataframe_split": {...}} per line
+    Returns:
+        list[bytes]: Encoded bodies, blank lines are skipped
+    """
+    with open(path, "rb") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def synthetic_payloads(n_payloads: int, rows_per_request: int = 1, seed: int = 42,
+                       feature_names: list[str] = FEATURE_COLUMNS) -> list[bytes]:
+    """
+    Builds dataframe_split bodies with random non-negative features
+    Args:
+        n_payloads: int: Distinct bodies, replayed round robin
+        rows_per_request: int: Rows in every body
+        seed: int: Seed of the values
+        feature_names: list[str]: Columns of every body
+    Returns:
+        list[bytes]: Encoded bodies
+    """
+    rng = np.random.default_rng(seed)
+    data = np.round(rng.gamma(2.0, 50.0, size=(n_payloads, rows_per_request, len(feature_names))), 2)
+    return [json.dumps({"dataframe_split": {"columns": feature_names, "data": rows.tolist()}}).encode()
+            for rows in data]
+
+
+class HttpConnection():
+    """
+    Keep-alive HTTP/1.1 connection posting JSON bodies
+    Responses are read by Content-Length or chunked encoding, which covers
+    the MLflow scoring server and PredictionServer.
+    """
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader : asyncio.StreamReader | None = None
+        self._writer : asyncio.StreamWriter | None = None
+
+    async def post(self, path: str, body: bytes) -> tuple[int, bytes]:
+        """
+        Posts a body, reconnecting when the server closed the connection
+        Args:
+            path: str: Request path, e.g. "/invocations"
+            body: bytes: JSON body
+        Returns:
+            tuple[int, bytes]: Status code and response body
+        """
+        if self._writer is None or self._writer.is_closing():
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await self._writer.drain()
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Server closed the connection")
+        status = int(status_line.split(b" ", 2)[1])
+        headers = {}
+        while (line := await self._reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while (size := int((await self._reader.readline()).strip(), 16)) > 0:
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+            await self._reader.readline()
+            response = b"".join(chunks)
+        else:
+            response = await self._reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, response
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+@dataclass
+class LoadResult:
+    """
+    Latencies and outcomes of one load test
+    """
+    mode : str
+    duration_s : float = 0.0
+    latencies_ms : list[float] = field(default_factory=list)
+    errors : dict[str, int] = field(default_factory=dict)
+
+    def record_error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def summary(self) -> dict:
+        """
+        Returns throughput, error rate and latency percentiles of the successful requests
+        Returns:
+            dict: Counts, requests per second, error rate and p50/p90/p99/max in ms
+        """
+        latencies = np.asarray(self.latencies_ms, dtype=np.float64)
+        n_errors = sum(self.errors.values())
+        total = latencies.size + n_errors
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if latencies.size else (0.0, 0.0, 0.0)
+        return {
+            "mode": self.mode,
+            "requests": total,
+            "ok": int(latencies.size),
+            "errors": dict(self.errors),
+            "error_rate": round(n_errors / total, 4) if total else 0.0,
+            "duration_s": round(self.duration_s, 3),
+            "requests_per_sec": round(latencies.size / self.duration_s, 1) if self.duration_s else 0.0,
+            "p50_ms": round(float(p50), 3),
+            "p90_ms": round(float(p90), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(latencies.max()), 3) if latencies.size else 0.0,
+        }
+
+    def histogram(self) -> list[tuple[str, int]]:
+        """
+        Counts the latencies per LATENCY_BUCKETS_MS bucket
+        Returns:
+            list[tuple[str, int]]: Bucket label, e.g. "<= 5 ms", and count
+        """
+        counts = np.bincount(np.searchsorted(LATENCY_BUCKETS_MS, self.latencies_ms, side="left"),
+                             minlength=len(LATENCY_BUCKETS_MS) + 1)
+        labels = [f"<= {bound:g} ms" for bound in LATENCY_BUCKETS_MS] + [f"> {LATENCY_BUCKETS_MS[-1]:g} ms"]
+        return list(zip(labels, counts.tolist()))
+
+    def format_histogram(self, width: int = 40) -> str:
+        buckets = self.histogram()
+        peak = max(count for _, count in buckets) or 1
+        return "\n".join(f"{label:>12} {count:>8} {'#' * round(width * count / peak)}"
+                         for label, count in buckets if count)
+
+
+class LoadGenerator():
+    """
+    Replays request bodies against a prediction endpoint
+    Closed loop keeps concurrency requests in flight, each connection
+    sending its next request when the previous one returns, and measures
+    what the server sustains. Open loop sends requests on a fixed schedule
+    of rate per second, or Poisson arrivals, whatever the server does;
+    latency then counts from the scheduled send time, so time spent waiting
+    for one of the concurrency connections is not hidden when the server
+    falls behind.
+    """
+    def __init__(self, url: str, payloads: list[bytes], concurrency: int = 8,
+                 timeout: float = 30.0):
+        """
+        Constructor for LoadGenerator
+        Args:
+            url: str: Endpoint, e.g. "http://127.0.0.1:8000/invocations"
+            payloads: list[bytes]: Bodies, replayed round robin
+            concurrency: int: Connections, and requests in flight in closed loop
+            timeout: float: Seconds before a request counts as timed out
+        """
+        if not payloads:
+            raise ValueError("No request payloads to replay")
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError(f"Only http:// endpoints are supported, got {url}")
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.path = parts.path or "/"
+        self.payloads = payloads
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    async def _send(self, connection: HttpConnection, body: bytes, started: float, result: LoadResult) -> None:
+        try:
+            status, _ = await asyncio.wait_for(connection.post(self.path, body), self.timeout)
+        except asyncio.TimeoutError:
+            # the response may still arrive, so the connection cannot be reused
+            await connection.close()
+            result.record_error("timeout")
+            return
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            await connection.close()
+            result.record_error(type(e).__name__)
+            return
+        if 200 <= status < 300:
+            result.latencies_ms.append((time.perf_counter() - started) * 1000)
+        else:
+            result.record_error(f"http_{status}")
+
+    async def run_closed(self, n_requests: int | None = None, duration: float | None = None) -> LoadResult:
+        """
+        Runs a closed loop test
+        Args:
+            n_requests: int | None: Requests to send in total
+            duration: float | None: Seconds to run, when n_requests is None
+        Returns:
+            LoadResult: The recorded requests
+        """
+        if n_requests is None and duration is None:
+            raise ValueError("Either n_requests or duration must be given")
+        result = LoadResult("closed")
+        counter = iter(range(n_requests)) if n_requests is not None else itertools.count()
+        start = time.perf_counter()
+        deadline = start + duration if duration is not None else float("inf")
+
+        async def worker() -> None:
+            connection = HttpConnection(self.host, self.port)
+            try:
+                for i in counter:
+                    if time.perf_counter() >= deadline:
+                        break
+                    await self._send(connection, self.payloads[i % len(self.payloads)], time.perf_counter(), result)
+            finally:
+                await connection.close()
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        result.duration_s = time.perf_counter() - start
+        return result
+
+    async def run_open(self, rate: float, n_requests: int | None = None, duration: float | None = None,
+                       poisson: bool = False, seed: int = 42) -> LoadResult:
+        """
+        Runs an open loop test
+        Args:
+            rate: float: Requests per second
+            n_requests: int | None: Requests to send in total
+            duration: float | None: Seconds to send for, when n_requests is None
+            poisson: bool: Exponential gaps between requests instead of fixed ones
+            seed: int: Seed of the Poisson gaps
+        Returns:
+            LoadResult: The recorded requests
+        Raises:
+            ValueError: If rate is not positive or no request would be sent
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if n_requests is None:
+            if duration is None:
+                raise ValueError("Either n_requests or duration must be given")
+            n_requests = int(rate * duration)
+            if n_requests < 1:
+                raise ValueError(f"{rate} requests/s for {duration}s schedule no request")
+        if n_requests < 1:
+            raise ValueError(f"n_requests must be at least 1, got {n_requests}")
+        gaps = (np.random.default_rng(seed).exponential(1 / rate, n_requests) if poisson
+                else np.full(n_requests, 1 / rate))
+        schedule = np.cumsum(gaps) - gaps[0]
+        result = LoadResult("open")
+        connections : asyncio.Queue = asyncio.Queue()
+        for _ in range(self.concurrency):
+            connections.put_nowait(HttpConnection(self.host, self.port))
+
+        async def request(i: int, started: float) -> None:
+            connection = await connections.get()
+            try:
+                await self._send(connection, self.payloads[i % len(self.payloads)], started, result)
+            finally:
+                connections.put_nowait(connection)
+
+        start = time.perf_counter()
+        tasks = []
+        for i, offset in enumerate(schedule):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(request(i, start + offset)))
+        await asyncio.gather(*tasks)
+        result.duration_s = time.perf_counter() - start
+        while not connections.empty():
+            await connections.get_nowait().close()
+        logging.info(f"Open loop at {rate} requests/s finished {result.duration_s - schedule[-1]:.3f}s "
+                     f"after the last scheduled request")
+        return result
+
@@ -1,17 +1,79 @@
 import logging
 from abc import ABC, abstractmethod
-from typing import Tuple 
+from pathlib import Path
+from typing import Iterable, Iterator, Tuple 
 # from typing_extensions import Annotated
 
-from sklearn.linear_model import LinearRegression
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from sklearn.linear_model import LinearRegression, Ridge, SGDRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.base import BaseEstimator
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+def iter_xy_chunks(X, y, chunksize: int) -> Iterator[tuple]:
+    """
+    Splits features and labels into aligned row chunks without copying
+    Args:
+        X: pd.DataFrame | np.ndarray: Features
+        y: pd.Series | np.ndarray: Labels
+        chunksize: int: Rows per chunk
+    Yields:
+        tuple: (X_chunk, y_chunk) slices of at most chunksize rows
+    """
+    for start in range(0, len(X), chunksize):
+        stop = start + chunksize
+        yield (X.iloc[start:stop] if hasattr(X, "iloc") else X[start:stop],
+               y.iloc[start:stop] if hasattr(y, "iloc") else y[start:stop])
+
+
+def _has_float32(X) -> bool:
+    if sp.issparse(X):
+        return False
+    dtypes = X.dtypes if hasattr(X, "columns") else [np.asarray(X).dtype]
+    return any(dtype == np.float32 for dtype in dtypes)
+
+
+def as_float64(X):
+    """
+    Casts float32 features to float64 for fitting
+    The schema stores the features as float32, but sklearn solves float32
+    input in float32, which loses accuracy on these badly scaled columns.
+    The cast copy only lives while the model is fitted.
+    Args:
+        X: pd.DataFrame | np.ndarray | sp.spmatrix: Features
+    Returns:
+        pd.DataFrame | np.ndarray | sp.spmatrix: X, as float64 if it held float32 columns
+    """
+    if not _has_float32(X):
+        return X
+    return X.astype(np.float64) if hasattr(X, "columns") else np.asarray(X, dtype=np.float64)
 
 
 class Model(ABC):
+    # whether train_model_stream is implemented, check it before handing over chunks
+    supports_streaming : bool = False
+
     @abstractmethod
     def train_model(self, X_train: Tuple, y_train: Tuple) -> None:
         pass
 
+    def train_model_stream(self, chunks: Iterable[tuple], **kwargs) -> BaseEstimator|None:
+        """
+        Trains the model on an iterator of (X, y) chunks at bounded memory
+        Only models with supports_streaming implement it; callers pass the
+        chunks of a source they read incrementally, e.g. IngestData.iter_chunks.
+        Args:
+            chunks: Iterable[tuple]: (X_chunk, y_chunk) pairs
+            **kwargs: Any additional arguments to be passed to the model
+        Returns:
+            BaseEstimator: Trained model
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming training")
+
     # @abstractmethod
     # def predict(self, X_test: Tuple) -> Tuple:
     #     pass
@@ -21,9 +83,16 @@ class LinearRegressionModel(Model):
     """
     This class is used to train a Linear Regression model
     """
+    supports_streaming = True
+
     def train_model(self, X_train, y_train , **kwargs) -> BaseEstimator|None:
         """
         Trains the Linear Regression model
+        float32 features, e.g. the compact matrix, are cast to float64 for
+        the fit, so it is as accurate as on float64 input and still goes
+        through fit, which MLflow autologging records.
+        Sparse matrices, e.g. with hashed text features, are fitted directly
+        by sklearn's sparse least squares solver.
         Args:
             X_train: Tuple: Training data
             y_train: Tuple: Training labels
@@ -33,10 +102,394 @@ class LinearRegressionModel(Model):
         """
         try:
             reg  = LinearRegression(**kwargs)
-            reg.fit(X_train, y_train)
+            reg.fit(as_float64(X_train), y_train)
             logging.info("Model Trained")
             return reg
         except Exception as e:
             logging.error(f"Error in training model: {e}")
             raise e
-        
\ No newline at end of file
+
+    def train_model_stream(self, chunks: Iterable[tuple], **kwargs) -> BaseEstimator|None:
+        """
+        Trains the Linear Regression model with a chunked least squares accumulator
+        Only the (p + 1) x (p + 1) statistics are kept in memory, and the
+        coefficients match a full in-memory fit.
+        Args:
+            chunks: Iterable[tuple]: (X_chunk, y_chunk) pairs
+            **kwargs: Any additional arguments to be passed to the model
+        Returns:
+            LinearRegression: Trained model
+        """
+        try:
+            stats = None
+            for X_chunk, y_chunk in chunks:
+                if stats is None:
+                    feature_names = [str(col) for col in X_chunk.columns] if hasattr(X_chunk, "columns") else None
+                    stats = SufficientStatistics(X_chunk.shape[1], feature_names)
+                stats.update(X_chunk, y_chunk)
+            if stats is None:
+                raise ValueError("No training chunks were provided")
+            reg = linear_regression_from_statistics(stats, **kwargs)
+            logging.info(f"Model Trained on {stats.count} streamed rows")
+            return reg
+        except Exception as e:
+            logging.error(f"Error in training model: {e}")
+            raise e
+
+
+class SGDRegressorModel(Model):
+    """
+    This class is used to train a linear model by stochastic gradient descent
+    """
+    supports_streaming = True
+
+    def train_model(self, X_train, y_train , **kwargs) -> BaseEstimator|None:
+        """
+        Trains the SGD regressor on in-memory data
+        Args:
+            X_train: pd.DataFrame: Training data
+            y_train: pd.Series: Training labels
+            **kwargs: Any additional arguments to be passed to the model
+        Returns:
+            Pipeline: Standard scaler followed by the trained SGDRegressor
+        """
+        try:
+            reg = Pipeline([("scaler", StandardScaler()), ("sgd", SGDRegressor(**kwargs))])
+            reg.fit(as_float64(X_train), y_train)
+            logging.info("Model Trained")
+            return reg
+        except Exception as e:
+            logging.error(f"Error in training model: {e}")
+            raise e
+
+    def train_model_stream(self, chunks: Iterable[tuple], **kwargs) -> BaseEstimator|None:
+        """
+        Trains the SGD regressor with partial_fit, one chunk at a time
+        The scaler statistics are updated with each chunk before the
+        regressor sees it, so no pass over the full data is needed.
+        Args:
+            chunks: Iterable[tuple]: (X_chunk, y_chunk) pairs
+            **kwargs: Any additional arguments to be passed to the model
+        Returns:
+            Pipeline: Standard scaler followed by the trained SGDRegressor
+        """
+        try:
+            scaler, sgd = StandardScaler(), SGDRegressor(**kwargs)
+            rows = 0
+            for X_chunk, y_chunk in chunks:
+                X_chunk = as_float64(X_chunk)
+                scaler.partial_fit(X_chunk)
+                sgd.partial_fit(scaler.transform(X_chunk), np.asarray(y_chunk))
+                rows += len(X_chunk)
+            if rows == 0:
+                raise ValueError("No training chunks were provided")
+            logging.info(f"Model Trained on {rows} streamed rows")
+            return Pipeline([("scaler", scaler), ("sgd", sgd)])
+        except Exception as e:
+            logging.error(f"Error in training model: {e}")
+            raise e
+
+
+class RidgeModel(Model):
+    """
+    This class is used to train a Ridge regression model
+    """
+    def train_model(self, X_train, y_train , **kwargs) -> BaseEstimator|None:
+        """
+        Trains the Ridge model
+        Args:
+            X_train: pd.DataFrame: Training data
+            y_train: pd.Series: Training labels
+            **kwargs: Any additional arguments to be passed to the model
+        Returns:
+            Ridge: Trained model
+        """
+        try:
+            reg = Ridge(**kwargs)
+            reg.fit(as_float64(X_train), y_train)
+            logging.info("Model Trained")
+            return reg
+        except Exception as e:
+            logging.error(f"Error in training model: {e}")
+            raise e
+
+
+class HistGradientBoostingModel(Model):
+    """
+    This class is used to train a histogram gradient boosting model
+    """
+    def train_model(self, X_train, y_train , **kwargs) -> BaseEstimator|None:
+        """
+        Trains the HistGradientBoostingRegressor model
+        Args:
+            X_train: pd.DataFrame: Training data
+            y_train: pd.Series: Training labels
+            **kwargs: Any additional arguments to be passed to the model
+        Returns:
+            HistGradientBoostingRegressor: Trained model
+        """
+        try:
+            reg = HistGradientBoostingRegressor(**kwargs)
+            reg.fit(as_float64(X_train), y_train)
+            logging.info("Model Trained")
+            return reg
+        except Exception as e:
+            logging.error(f"Error in training model: {e}")
+            raise e
+
+
+class SufficientStatistics():
+    """
+    Mergeable sufficient statistics of the least squares problem
+    Keeps the row count, the column means and the centred scatter matrix of
+    the joint [X | y] matrix, which hold X^T X, X^T y and y^T y around the
+    means. Batches are folded in with the pairwise update of Chan et al., so
+    the result does not depend on how the rows were split into batches.
+    """
+    def __init__(self, n_features: int, feature_names: list[str] | None = None):
+        """
+        Constructor for SufficientStatistics
+        Args:
+            n_features: int: Number of feature columns
+            feature_names: list[str] | None: Feature names, checked on every update
+        """
+        self.count = 0
+        self.mean = np.zeros(n_features + 1)
+        self.scatter = np.zeros((n_features + 1, n_features + 1))
+        self.feature_names = feature_names
+        self.watermark = None
+
+    @property
+    def n_features(self) -> int:
+        return self.mean.shape[0] - 1
+
+    def update(self, X, y) -> "SufficientStatistics":
+        """
+        Folds a batch of rows into the statistics
+        Args:
+            X: pd.DataFrame | np.ndarray: Batch features
+            y: pd.Series | np.ndarray: Batch labels
+        Returns:
+            SufficientStatistics: self
+        """
+        if self.feature_names is not None and hasattr(X, "columns"):
+            if list(X.columns) != self.feature_names:
+                raise ValueError("Feature columns differ from the stored statistics")
+        Z = np.column_stack([np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)])
+        if len(Z) == 0:
+            return self
+        batch = SufficientStatistics(self.n_features)
+        batch.count = len(Z)
+        batch.mean = Z.mean(axis=0)
+        centred = Z - batch.mean
+        batch.scatter = centred.T @ centred
+        return self.merge(batch)
+
+    def merge(self, other: "SufficientStatistics") -> "SufficientStatistics":
+        """
+        Merges the statistics of another, disjoint set of rows into these
+        Args:
+            other: SufficientStatistics: Statistics of the other rows
+        Returns:
+            SufficientStatistics: self
+        """
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.scatter += other.scatter + np.outer(delta, delta) * (self.count * other.count / total)
+        self.mean += delta * (other.count / total)
+        self.count = total
+        return self
+
+    def solve(self, fit_intercept: bool = True) -> tuple[np.ndarray, float]:
+        """
+        Solves the normal equations for the coefficients and the intercept
+        Uses the minimum norm solution, like LinearRegression, when the
+        scatter matrix is singular. Without an intercept the uncentred
+        moments, scatter + count * mean mean^T, are solved instead.
+        Args:
+            fit_intercept: bool: Whether to fit an intercept, like LinearRegression
+        Returns:
+            tuple[np.ndarray, float]: Coefficients and intercept, 0.0 without one
+        """
+        if self.count == 0:
+            raise ValueError("No rows have been folded into the statistics")
+        p = self.n_features
+        moments = self.scatter
+        if not fit_intercept:
+            moments = self.scatter + self.count * np.outer(self.mean, self.mean)
+        coef = np.linalg.lstsq(moments[:p, :p], moments[:p, p], rcond=None)[0]
+        if not fit_intercept:
+            return coef, 0.0
+        intercept = float(self.mean[p] - self.mean[:p] @ coef)
+        return coef, intercept
+
+    def save(self, path: str) -> None:
+        """
+        Persists the statistics as an .npz file
+        Args:
+            path: str: Destination path
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                count=self.count,
+                mean=self.mean,
+                scatter=self.scatter,
+                feature_names=np.array(self.feature_names or [], dtype=str),
+                watermark=np.array([] if self.watermark is None else [self.watermark]),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "SufficientStatistics":
+        """
+        Loads statistics persisted with save
+        Args:
+            path: str: Path to the .npz file
+        Returns:
+            SufficientStatistics: The loaded statistics
+        """
+        with np.load(path, allow_pickle=False) as state:
+            feature_names = [str(name) for name in state["feature_names"]] or None
+            stats = cls(state["mean"].shape[0] - 1, feature_names)
+            stats.count = int(state["count"])
+            stats.mean = state["mean"].copy()
+            stats.scatter = state["scatter"].copy()
+            if state["watermark"].size:
+                stats.watermark = state["watermark"][0].item()
+        return stats
+
+
+def watermark_values(values) -> np.ndarray:
+    """
+    Converts ingestion watermarks to comparable numbers
+    Sequence numbers are kept as they are, timestamps, including the
+    string timestamps of the Olist export, become nanoseconds since the epoch.
+    Args:
+        values: pd.Series | np.ndarray: Ingestion timestamp or sequence number per row
+    Returns:
+        np.ndarray: Numeric watermark per row
+    Raises:
+        ValueError: If a watermark is missing
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    if values.isna().any():
+        raise ValueError("Watermarks must not be missing")
+    if not pd.api.types.is_numeric_dtype(values):
+        values = pd.to_datetime(values).astype("int64")
+    return values.to_numpy()
+
+
+class IncrementalLinearRegressionModel(Model):
+    """
+    This class is used to retrain a Linear Regression model incrementally
+    Only the rows newer than the stored watermark are folded into the
+    persisted sufficient statistics, and the coefficients are solved from
+    them, so they match a full refit on every row folded in so far.
+    """
+    def __init__(self, state_path: str):
+        """
+        Constructor for IncrementalLinearRegressionModel
+        Args:
+            state_path: str: Where the sufficient statistics are persisted
+        """
+        self.state_path = state_path
+
+    def train_model(self, X_train, y_train, watermarks, ingested_watermarks=None, **kwargs) -> BaseEstimator|None:
+        """
+        Folds the new rows into the statistics and solves for the model
+        The stored watermark then advances to the newest ingested row, not
+        the newest training row, so rows a random split held out for testing
+        are not folded in by a later run either.
+        Args:
+            X_train: pd.DataFrame: Training data
+            y_train: pd.Series: Training labels
+            watermarks: pd.Series | np.ndarray: Ingestion timestamp or sequence
+                number of every training row, read from the raw data before the split
+            ingested_watermarks: pd.Series | np.ndarray | None: Watermarks of every
+                ingested row, training and test, defaults to watermarks
+            **kwargs: Any additional arguments to be passed to the model
+        Returns:
+            LinearRegression: Model with the solved coefficients
+        """
+        try:
+            watermarks = watermark_values(watermarks)
+            if len(watermarks) != len(y_train):
+                raise ValueError(f"Got {len(watermarks)} watermarks for {len(y_train)} training rows")
+            ingested = watermarks if ingested_watermarks is None else watermark_values(ingested_watermarks)
+            feature_names = [str(col) for col in X_train.columns] if hasattr(X_train, "columns") else None
+
+            if Path(self.state_path).exists():
+                stats = SufficientStatistics.load(self.state_path)
+            else:
+                stats = SufficientStatistics(X_train.shape[1], feature_names)
+
+            new_rows = np.ones(len(watermarks), dtype=bool)
+            if stats.watermark is not None:
+                new_rows = watermarks > stats.watermark
+            if new_rows.any():
+                stats.update(X_train[new_rows], np.asarray(y_train)[new_rows])
+            high = np.concatenate([watermarks, ingested]).max().item()
+            if new_rows.any() or high > stats.watermark:
+                stats.watermark = high if stats.watermark is None else max(stats.watermark, high)
+                stats.save(self.state_path)
+            logging.info(f"Folded {int(new_rows.sum())} new rows, {stats.count} rows in total")
+
+            reg = linear_regression_from_statistics(stats, **kwargs)
+            logging.info("Model Trained")
+            return reg
+        except Exception as e:
+            logging.error(f"Error in training model: {e}")
+            raise e
+
+
+def linear_regression_from_statistics(stats: SufficientStatistics, **kwargs) -> LinearRegression:
+    """
+    Builds a fitted LinearRegression from accumulated sufficient statistics
+    fit_intercept is honoured; positive needs the data itself, so it is
+    rejected, and copy_X, n_jobs and tol, which only tune sklearn's own
+    solver, are kept on the model without effect.
+    Args:
+        stats: SufficientStatistics: Statistics of the training rows
+        **kwargs: Any additional arguments to be passed to the model
+    Returns:
+        LinearRegression: Model with the solved coefficients
+    Raises:
+        ValueError: If an argument cannot be honoured from the statistics
+    """
+    reg = LinearRegression(**kwargs)
+    if reg.positive:
+        raise ValueError("positive=True cannot be solved from sufficient statistics")
+    coef, intercept = stats.solve(fit_intercept=reg.fit_intercept)
+    reg.coef_ = coef
+    reg.intercept_ = intercept
+    reg.n_features_in_ = stats.n_features
+    if stats.feature_names is not None:
+        reg.feature_names_in_ = np.array(stats.feature_names, dtype=object)
+    return reg
+
+
+MODEL_REGISTRY : dict[str, type[Model]] = {
+    "LinearRegressionModel": LinearRegressionModel,
+    "SGDRegressorModel": SGDRegressorModel,
+    "RidgeModel": RidgeModel,
+    "HistGradientBoostingModel": HistGradientBoostingModel,
+}
+
+
+def get_model(model_name: str) -> Model:
+    """
+    Looks a model up in the registry
+    Args:
+        model_name: str: Registered model name, e.g. "LinearRegressionModel"
+    Returns:
+        Model: A new instance of the registered model
+    Raises:
+        ValueError: If no model is registered under model_name
+    """
+    if model_name not in MODEL_REGISTRY:
+        logging.error(f"Model {model_name} not found")
+        raise ValueError(f"Model {model_name} not supported, choose from {sorted(MODEL_REGISTRY)}")
+    return MODEL_REGISTRY[model_name]()
@@ -0,0 +1,237 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator
+from sklearn.metrics import r2_score
+from sklearn.model_selection import ParameterGrid
+
+from src.data_cleaning import Fold, IndexSplit
+from src.model_dev import LinearRegressionModel, get_model
+
+
+@dataclass
+class SweepCandidate:
+    """
+    One model family and parameter combination of a sweep
+    """
+    model_name : str
+    params : dict = field(default_factory=dict)
+
+
+@dataclass
+class SweepResult:
+    """
+    Outcome of training and scoring one candidate
+    """
+    candidate : SweepCandidate
+    fit_time : float
+    score : float
+    model : BaseEstimator | None = None
+
+
+@dataclass
+class FoldResult:
+    """
+    Outcome of training and scoring one cross-validation fold
+    """
+    fold : int
+    fit_time : float
+    scores : dict
+
+
+def expand_search_space(search_space: dict[str, dict[str, list]]) -> list[SweepCandidate]:
+    """
+    Expands per-model parameter grids into individual candidates
+    Args:
+        search_space: dict[str, dict[str, list]]: Registered model name to a
+            grid of parameter values, e.g. {"RidgeModel": {"alpha": [0.1, 1.0]}}
+    Returns:
+        list[SweepCandidate]: One candidate per model and parameter combination
+    """
+    return [
+        SweepCandidate(model_name, params)
+        for model_name, grid in search_space.items()
+        for params in ParameterGrid(grid or {})
+    ]
+
+
+# Shared arrays of the current worker, set once by _attach_shared_data.
+_WORKER_DATA : dict = {}
+
+
+def _share_array(array: np.ndarray) -> tuple[SharedMemory, tuple]:
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach_array(spec: tuple) -> tuple[SharedMemory, np.ndarray]:
+    name, shape, dtype = spec
+    # spawned workers share the parent's resource tracker, which unlinks the segment
+    shm = SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _attach_shared_data(X_spec: tuple, y_spec: tuple, columns: list[str], n_train: int) -> None:
+    from threadpoolctl import threadpool_limits
+
+    # one BLAS thread per worker, the pool already uses every core
+    _WORKER_DATA["limits"] = threadpool_limits(limits=1)
+    X_shm, X = _attach_array(X_spec)
+    y_shm, y = _attach_array(y_spec)
+    _WORKER_DATA.update(
+        segments=(X_shm, y_shm),
+        X_train=pd.DataFrame(X[:n_train], columns=columns, copy=False),
+        X_val=pd.DataFrame(X[n_train:], columns=columns, copy=False),
+        y_train=y[:n_train],
+        y_val=y[n_train:],
+    )
+
+
+def _fit_candidate(candidate: SweepCandidate) -> SweepResult:
+    data = _WORKER_DATA
+    start = time.perf_counter()
+    model = get_model(candidate.model_name).train_model(data["X_train"], data["y_train"], **candidate.params)
+    fit_time = time.perf_counter() - start
+    score = float(r2_score(data["y_val"], model.predict(data["X_val"])))
+    # only the winner is needed, and it is refit in the parent
+    return SweepResult(candidate, fit_time, score)
+
+
+def run_sweep(X_train: pd.DataFrame,
+              y_train: pd.Series,
+              candidates: list[SweepCandidate],
+              validation_size: float = 0.2,
+              n_jobs: int | None = None,
+              random_state: int = 42,
+              ) -> tuple[list[SweepResult], SweepResult]:
+    """
+    Trains and scores every candidate concurrently on a process pool
+    The training data is copied once, shuffled, into shared memory; workers
+    map it as zero-copy train and validation views instead of receiving a
+    pickled copy per task. Candidates are scored by R2 on the validation
+    rows and the best one is refit on all of X_train.
+    Args:
+        X_train: pd.DataFrame: Training data
+        y_train: pd.Series: Training labels
+        candidates: list[SweepCandidate]: Candidates to train
+        validation_size: float: Fraction of rows held out for scoring
+        n_jobs: int | None: Worker processes, defaults to the number of cores
+        random_state: int: Seed of the train/validation shuffle
+    Returns:
+        tuple[list[SweepResult], SweepResult]: Per-candidate results and the
+            best candidate with its model refit on all of X_train
+    """
+    if not candidates:
+        raise ValueError("The sweep needs at least one candidate")
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(candidates))
+    order = np.random.default_rng(random_state).permutation(len(X_train))
+    n_train = len(order) - int(len(order) * validation_size)
+    columns = [str(col) for col in X_train.columns]
+
+    X_shm, X_spec = _share_array(np.ascontiguousarray(X_train.to_numpy()[order]))
+    y_shm, y_spec = _share_array(np.ascontiguousarray(y_train.to_numpy()[order]))
+    try:
+        logging.info(f"Sweeping {len(candidates)} candidates on {n_jobs} workers")
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach_shared_data,
+            initargs=(X_spec, y_spec, columns, n_train),
+        ) as pool:
+            results = list(pool.map(_fit_candidate, candidates))
+    finally:
+        X_shm.close()
+        X_shm.unlink()
+        y_shm.close()
+        y_shm.unlink()
+
+    for result in results:
+        logging.info(f"{result.candidate}: R2 {result.score:.4f} in {result.fit_time:.2f}s")
+    best = max(results, key=lambda result: result.score)
+    start = time.perf_counter()
+    model = get_model(best.candidate.model_name).train_model(X_train, y_train, **best.candidate.params)
+    refit = SweepResult(best.candidate, time.perf_counter() - start, best.score, model)
+    return results, refit
+
+
+def _attach_split(X_spec: tuple, y_spec: tuple, columns: list[str]) -> None:
+    from threadpoolctl import threadpool_limits
+
+    _WORKER_DATA["limits"] = threadpool_limits(limits=1)
+    X_shm, X = _attach_array(X_spec)
+    y_shm, y = _attach_array(y_spec)
+    _WORKER_DATA.update(segments=(X_shm, y_shm), X=X, y=y, columns=columns)
+
+
+def _fold_rows(start: int, stop: int) -> tuple[pd.DataFrame, np.ndarray]:
+    data = _WORKER_DATA
+    return pd.DataFrame(data["X"][start:stop], columns=data["columns"], copy=False), data["y"][start:stop]
+
+
+def _fit_fold(task: tuple[int, Fold, str, dict]) -> FoldResult:
+    from src.evaluation import MetricAccumulator
+
+    k, fold, model_name, params = task
+    model = get_model(model_name)
+    parts = [_fold_rows(start, stop) for start, stop in fold.train]
+    start = time.perf_counter()
+    if len(parts) == 1:
+        trained = model.train_model(*parts[0], **params)
+    elif isinstance(model, LinearRegressionModel) and not params.get("positive"):
+        # the chunked least squares fit is exact, so the two blocks are never joined
+        trained = model.train_model_stream(parts, **params)
+    else:
+        trained = model.train_model(pd.concat([X for X, _ in parts]), np.concatenate([y for _, y in parts]), **params)
+    fit_time = time.perf_counter() - start
+    X_test, y_test = _fold_rows(*fold.test)
+    scores = MetricAccumulator().update(y_test, trained.predict(X_test)).scores()
+    return FoldResult(k, fit_time, scores)
+
+
+def cross_validate(split: IndexSplit,
+                   model_name: str,
+                   params: dict | None = None,
+                   n_jobs: int | None = None,
+                   ) -> list[FoldResult]:
+    """
+    Trains and scores one model on every fold of a split concurrently
+    The base matrix of the split is placed in shared memory once, and each
+    worker slices its training and test rows out of it as views; only the
+    folds' row ranges are sent with the tasks.
+    Args:
+        split: IndexSplit: Folds over one reordered copy of the data
+        model_name: str: Registered model name
+        params: dict | None: Model parameters
+        n_jobs: int | None: Worker processes, defaults to the number of cores
+    Returns:
+        list[FoldResult]: Fit time and MSE, RMSE, MAE and R2 of every fold
+    """
+    n_jobs = min(n_jobs or os.cpu_count() or 1, split.n_splits)
+    tasks = [(k, fold, model_name, params or {}) for k, fold in enumerate(split.folds)]
+    X_shm, X_spec = _share_array(split.X)
+    y_shm, y_spec = _share_array(split.y)
+    try:
+        logging.info(f"Cross-validating {model_name} on {split.n_splits} folds with {n_jobs} workers")
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach_split,
+            initargs=(X_spec, y_spec, split.columns),
+        ) as pool:
+            results = list(pool.map(_fit_fold, tasks))
+    finally:
+        X_shm.close()
+        X_shm.unlink()
+        y_shm.close()
+        y_shm.unlink()
+    for result in results:
+        logging.info(f"Fold {result.fold}: R2 {result.scores['R2']:.4f} in {result.fit_time:.2f}s")
+    return results
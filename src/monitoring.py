@@ -0,0 +1,202 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Bins of every feature and of the predictions, cut at reference quantiles.
+DRIFT_BINS : int = 20
+# Fraction standing in for empty bins, so the PSI stays finite.
+PSI_EPSILON : float = 1e-4
+# PSI above which a distribution is commonly considered shifted.
+PSI_ALERT : float = 0.2
+PREDICTION_KEY : str = "prediction"
+# Batches up to this many rows are binned by comparing with every edge.
+SMALL_BATCH_ROWS : int = 64
+
+
+def _bin_edges(values: np.ndarray, n_bins: int) -> np.ndarray:
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.empty(0)
+    # discrete columns repeat quantiles, their bins are merged
+    return np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+
+
+def _sorted_bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    # bin k holds the values with k edges <= value, the last bin counts NaN,
+    # which sorts last; locating the edges in sorted values beats locating
+    # every value among the edges
+    n_valid = values.size - int(np.count_nonzero(np.isnan(values)))
+    bounds = np.searchsorted(values[:n_valid], edges, side="left")
+    return np.diff(np.r_[0, bounds, n_valid, values.size])
+
+
+def population_stability(expected: np.ndarray, actual: np.ndarray) -> float:
+    """
+    Population stability index of two histograms over the same bins
+    Args:
+        expected: np.ndarray: Reference counts
+        actual: np.ndarray: Live counts
+    Returns:
+        float: sum((a - e) * ln(a / e)) over the bin fractions, 0 when no live rows were seen
+    """
+    if actual.sum() == 0 or expected.sum() == 0:
+        return 0.0
+    e = np.maximum(expected / expected.sum(), PSI_EPSILON)
+    a = np.maximum(actual / actual.sum(), PSI_EPSILON)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+class DriftReference():
+    """
+    Histograms of the training features and predictions
+    Every feature is cut into DRIFT_BINS bins at the quantiles of the
+    training rows, plus a bin for missing values; live traffic is counted
+    in the same bins.
+    """
+    def __init__(self, edges: dict[str, np.ndarray], counts: dict[str, np.ndarray]):
+        """
+        Constructor for DriftReference
+        Args:
+            edges: dict[str, np.ndarray]: Inner bin edges per feature and PREDICTION_KEY
+            counts: dict[str, np.ndarray]: Reference counts per bin, NaN bin last
+        """
+        self.edges = edges
+        self.counts = counts
+
+    @property
+    def feature_names(self) -> list[str]:
+        return [name for name in self.edges if name != PREDICTION_KEY]
+
+    @staticmethod
+    def build(X: pd.DataFrame, predictions: np.ndarray, n_bins: int = DRIFT_BINS) -> "DriftReference":
+        """
+        Builds the reference from the training rows and the model's predictions on them
+        Args:
+            X: pd.DataFrame: Training features
+            predictions: np.ndarray: Predictions for X
+            n_bins: int: Bins per feature, fewer for discrete columns
+        Returns:
+            DriftReference: The reference histograms
+        """
+        columns = {str(col): X[col].to_numpy(dtype=np.float64) for col in X.columns}
+        columns[PREDICTION_KEY] = np.asarray(predictions, dtype=np.float64)
+        edges = {name: _bin_edges(values, n_bins) for name, values in columns.items()}
+        counts = {name: _sorted_bin_counts(np.sort(values), edges[name]) for name, values in columns.items()}
+        return DriftReference(edges, counts)
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({name: {"edges": self.edges[name].tolist(), "counts": self.counts[name].tolist()}
+                       for name in self.edges}, f)
+
+    @staticmethod
+    def load(path: str) -> "DriftReference | None":
+        """
+        Loads a reference written by save
+        Args:
+            path: str: JSON file
+        Returns:
+            DriftReference | None: The reference, None if the file does not exist
+        """
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return None
+        return DriftReference(
+            {name: np.asarray(entry["edges"], dtype=np.float64) for name, entry in saved.items()},
+            {name: np.asarray(entry["counts"], dtype=np.int64) for name, entry in saved.items()},
+        )
+
+
+class DriftMonitor():
+    """
+    Fixed-memory histograms of served features and predictions
+    Memory is (features + 1) x (bins + 2) counters whatever the traffic.
+    A batch is folded in with vectorized work over all its columns, e.g.
+    from MicroBatcher's scoring thread, so the cost is per batch rather
+    than per request: small batches compare every value with every edge
+    at once, larger ones sort each column and locate the edges in it.
+    """
+    def __init__(self, reference: DriftReference, feature_names: list[str] | None = None):
+        """
+        Constructor for DriftMonitor
+        Args:
+            reference: DriftReference: Training histograms
+            feature_names: list[str] | None: Column order of the batches,
+                defaults to the reference's
+        """
+        self.reference = reference
+        self.feature_names = feature_names or reference.feature_names
+        missing = set(self.feature_names) - set(reference.edges)
+        if missing:
+            raise ValueError(f"No reference histograms for {sorted(missing)}")
+        self.names = self.feature_names + [PREDICTION_KEY]
+        width = max(len(reference.edges[name]) for name in self.names)
+        # padded with inf, so the bins past a column's own edges stay empty
+        self._edges = np.full((len(self.names), width), np.inf)
+        for i, name in enumerate(self.names):
+            self._edges[i, :len(reference.edges[name])] = reference.edges[name]
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Starts a new monitoring window
+        """
+        # one row of value bins per column, then its NaN bin
+        self._counts = np.zeros((len(self.names), self._edges.shape[1] + 2), dtype=np.int64)
+        self.rows = 0
+        self.batches = 0
+
+    def update(self, features: np.ndarray, predictions: np.ndarray) -> None:
+        """
+        Folds a scored batch into the live histograms
+        Args:
+            features: np.ndarray: (rows, n_features) matrix in feature_names order
+            predictions: np.ndarray: One prediction per row
+        """
+        values = np.column_stack([np.asarray(features, dtype=np.float64),
+                                  np.asarray(predictions, dtype=np.float64)])
+        n_rows, width = len(values), self._edges.shape[1]
+        if n_rows <= SMALL_BATCH_ROWS:
+            bins = (values[:, :, None] >= self._edges[None]).sum(axis=2)
+            bins[np.isnan(values)] = width + 1
+            bins += np.arange(len(self.names)) * (width + 2)
+            self._counts += np.bincount(bins.ravel(), minlength=self._counts.size).reshape(self._counts.shape)
+        else:
+            columns = np.sort(values.T, axis=1)
+            n_valid = n_rows - np.count_nonzero(np.isnan(columns), axis=1)
+            for i in range(len(self.names)):
+                bounds = np.searchsorted(columns[i, :n_valid[i]], self._edges[i], side="left")
+                self._counts[i, 0] += bounds[0]
+                self._counts[i, 1:width] += np.diff(bounds)
+                self._counts[i, width] += n_valid[i] - bounds[-1]
+                self._counts[i, width + 1] += n_rows - n_valid[i]
+        self.rows += n_rows
+        self.batches += 1
+
+    @property
+    def counts(self) -> dict[str, np.ndarray]:
+        """
+        Live counts per column, in the layout of the reference's counts
+        """
+        counts = {}
+        for i, name in enumerate(self.names):
+            k = len(self.reference.edges[name])
+            counts[name] = np.r_[self._counts[i, :k + 1], self._counts[i, -1]]
+        return counts
+
+    def scores(self) -> dict:
+        """
+        Compares the live histograms with the reference
+        Returns:
+            dict: Rows and batches seen, PSI per feature and of the
+                predictions, and the names above PSI_ALERT
+        """
+        psi = {name: round(population_stability(self.reference.counts[name], counts), 6)
+               for name, counts in self.counts.items()}
+        drifted = sorted(name for name, value in psi.items() if value > PSI_ALERT)
+        return {"rows": self.rows, "batches": self.batches, "psi": psi, "drifted": drifted}
@@ -0,0 +1,116 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.schema import OLIST_DTYPES
+
+
+def _unique_on(table: pd.DataFrame, key: str, name: str) -> pd.DataFrame:
+    duplicated = table[key].duplicated()
+    if duplicated.any():
+        logging.warning(f"Dropping {int(duplicated.sum())} rows of {name} with a repeated {key}")
+        table = table[~duplicated]
+    return table
+
+
+def _key_index(table: pd.DataFrame, key: str) -> pd.Index:
+    # a plain object index hashes strings and categoricals alike
+    return pd.Index(table[key].to_numpy(dtype=object))
+
+
+def _expand(left_codes: np.ndarray, right_codes: np.ndarray, n_keys: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Inner join of two arrays of dense key codes, duplicates on both sides
+    The right rows are bucketed by code with a counting sort, and every
+    left row is repeated once per right row of its code.
+    Args:
+        left_codes: np.ndarray: Codes of the left rows, in [0, n_keys)
+        right_codes: np.ndarray: Codes of the right rows, -1 for no key
+        n_keys: int: Number of distinct keys
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Positions of the matched left and
+            right rows, in left order
+    """
+    matched = right_codes >= 0
+    right_rows = np.flatnonzero(matched)
+    right_rows = right_rows[np.argsort(right_codes[matched], kind="stable")]
+    counts = np.bincount(right_codes[matched], minlength=n_keys)
+    starts = np.cumsum(counts) - counts
+    repeats = counts[left_codes]
+    left = np.repeat(np.arange(len(left_codes)), repeats)
+    offsets = np.arange(len(left)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    return left, right_rows[starts[left_codes[left]] + offsets]
+
+
+def _take(column: pd.Series, positions: np.ndarray):
+    # -1 marks rows without a match in a left join
+    return column.array.take(positions, allow_fill=True)
+
+
+def join_olist_tables(tables: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Denormalizes the Olist tables into the flat frame of the merged export
+    Orders are inner joined with their customer, items, payments and
+    reviews, and the items left joined with their product and category
+    translation, so an order yields one row per item, payment and review.
+    Every key is looked up once in a hash index of its table, and the joins
+    then run on the integer positions; the columns are gathered once at the
+    end. order_id, customer_id and product_id are categoricals whose
+    dictionary is the key column of their table.
+    Args:
+        tables: dict[str, pd.DataFrame]: Table name of OLIST_TABLE_FILES to
+            its columns of OLIST_TABLE_COLUMNS
+    Returns:
+        pd.DataFrame: Columns of OLIST_DTYPES, in that order, with a RangeIndex
+    """
+    orders = _unique_on(tables["orders"], "order_id", "orders")
+    customers = _unique_on(tables["customers"], "customer_id", "customers")
+    products = _unique_on(tables["products"], "product_id", "products")
+    categories = _unique_on(tables["categories"], "product_category_name", "categories")
+    items, payments, reviews = tables["items"], tables["payments"], tables["reviews"]
+
+    order_index = _key_index(orders, "order_id")
+    n_orders = len(order_index)
+    customer_of_order = _key_index(customers, "customer_id").get_indexer(orders["customer_id"].to_numpy(dtype=object))
+    order_rows = np.flatnonzero(customer_of_order >= 0)
+    positions = {"orders": order_rows, "customers": customer_of_order[order_rows]}
+
+    for name, table in (("items", items), ("payments", payments), ("reviews", reviews)):
+        codes = order_index.get_indexer(table["order_id"].to_numpy(dtype=object))
+        left, right = _expand(positions["orders"], codes, n_orders)
+        positions = {key: rows[left] for key, rows in positions.items()}
+        positions[name] = right
+
+    product_codes, product_ids = pd.factorize(items["product_id"].to_numpy(dtype=object))
+    product_of_item = _key_index(products, "product_id").get_indexer(product_ids)[product_codes]
+    product_of_item = np.where(product_codes >= 0, product_of_item, -1)
+    positions["products"] = product_of_item[positions["items"]]
+    category_of_product = _key_index(categories, "product_category_name").get_indexer(
+        products["product_category_name"].to_numpy(dtype=object))
+    category_of_product = np.where(products["product_category_name"].isna().to_numpy(), -1, category_of_product)
+    positions["categories"] = np.where(positions["products"] >= 0,
+                                       category_of_product[np.maximum(positions["products"], 0)], -1)
+
+    keys = {
+        "order_id": pd.Categorical.from_codes(positions["orders"], categories=order_index),
+        "customer_id": pd.Categorical.from_codes(positions["customers"], categories=_key_index(customers, "customer_id")),
+        "product_id": pd.Categorical.from_codes(product_codes[positions["items"]], categories=pd.Index(product_ids)),
+    }
+    frames = {"orders": orders, "customers": customers, "items": items, "payments": payments,
+              "reviews": reviews, "products": products, "categories": categories}
+    # a column shared by two tables, e.g. product_category_name, comes from the first
+    sources = {}
+    for name, table in frames.items():
+        for col in table.columns:
+            sources.setdefault(col, name)
+    columns = {}
+    for col in OLIST_DTYPES:
+        if col in keys:
+            columns[col] = keys[col]
+        elif col in sources:
+            name = sources[col]
+            columns[col] = _take(frames[name][col], positions[name])
+    joined = pd.DataFrame(columns, copy=False)
+    logging.info(f"Joined {n_orders} orders into {len(joined)} rows")
+    return joined
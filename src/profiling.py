@@ -0,0 +1,169 @@
+import os
+import time
+from dataclasses import asdict, dataclass
+
+
+def _proc_status_mb(field: str) -> float:
+    # VmHWM is reset on exec, unlike ru_maxrss which children inherit
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+
+def current_rss_mb() -> float:
+    """
+    Returns the resident set size of this process in MiB
+    """
+    try:
+        return _proc_status_mb("VmRSS")
+    except (OSError, KeyError):
+        return 0.0
+
+
+def peak_rss_mb() -> float:
+    """
+    Returns the peak resident set size of this process in MiB
+    Uses VmHWM on Linux, so reset_peak_rss can scope it to a code section,
+    and falls back to ru_maxrss elsewhere.
+    """
+    try:
+        return _proc_status_mb("VmHWM")
+    except (OSError, KeyError):
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, KiB on Linux
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def reset_peak_rss() -> bool:
+    """
+    Resets the peak resident set size to the current one
+    Returns:
+        bool: Whether the kernel supports it (Linux >= 4.0)
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def data_size(value) -> tuple[int, int]:
+    """
+    Counts the rows and bytes of a step input or output
+    Only the shallow memory of DataFrames is counted, deep introspection of
+    object columns would cost more than the steps being measured.
+    Args:
+        value: Any: DataFrame, Series, ndarray, or a tuple or list of them
+    Returns:
+        tuple[int, int]: Rows and bytes, summed over tuples and lists. Series
+            next to DataFrames are their labels, so only the frames' rows count
+    """
+    if isinstance(value, (tuple, list)):
+        sizes = [data_size(item) for item in value]
+        frame_rows = [size[0] for item, size in zip(value, sizes) if hasattr(item, "columns")]
+        rows = sum(frame_rows) if frame_rows else sum(rows for rows, _ in sizes)
+        return rows, sum(nbytes for _, nbytes in sizes)
+    if hasattr(value, "memory_usage") and hasattr(value, "__len__"):
+        usage = value.memory_usage(index=True, deep=False)
+        return len(value), int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(value, "nbytes") and hasattr(value, "shape"):
+        return (value.shape[0] if value.shape else 1), int(value.nbytes)
+    return 0, 0
+
+
+@dataclass
+class StepProfile:
+    """
+    Resource usage of one step execution
+    peak_rss_growth_mb is the peak RSS while the step ran minus the RSS it
+    started with, on every platform, see Profiler.
+    """
+    wall_s : float = 0.0
+    cpu_s : float = 0.0
+    peak_rss_growth_mb : float = 0.0
+    input_rows : int = 0
+    input_bytes : int = 0
+    output_rows : int = 0
+    output_bytes : int = 0
+    rows_per_sec : float = 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return asdict(self)
+
+
+class Profiler():
+    """
+    Measures wall time, CPU time and peak RSS growth of a code section
+    CPU time includes the reaped child processes, so work done in a process
+    pool is counted once the pool has shut down.
+    On Linux the kernel's peak RSS is reset when a section starts. It is one
+    value per process, so a nested Profiler, e.g. the gate's inside an
+    instrumented step, first folds the peak so far into the enclosing ones,
+    which combine it with the peak they read when they exit. Elsewhere the
+    peak cannot be reset and only covers the whole process lifetime: the
+    growth is exact when the section raises it, otherwise the RSS at exit
+    bounds it from below. Sections must not run concurrently in threads.
+    """
+    # profilers entered and not exited yet, innermost last
+    _active : list["Profiler"] = []
+
+    def __init__(self):
+        self.profile = StepProfile()
+
+    def __enter__(self) -> "Profiler":
+        self._fold_peak(peak_rss_mb())
+        self._scoped = reset_peak_rss()
+        self._baseline_rss = current_rss_mb()
+        self._peak_seen = 0.0
+        self._lifetime_peak = 0.0 if self._scoped else peak_rss_mb()
+        Profiler._active.append(self)
+        self._cpu = self._cpu_seconds()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.profile.wall_s = time.perf_counter() - self._start
+        self.profile.cpu_s = self._cpu_seconds() - self._cpu
+        Profiler._active.remove(self)
+        peak = peak_rss_mb()
+        if self._scoped:
+            peak = max(peak, self._peak_seen)
+            self._fold_peak(peak)
+        elif peak <= self._lifetime_peak:
+            # the lifetime peak predates the section
+            peak = current_rss_mb()
+        self.profile.peak_rss_growth_mb = max(0.0, peak - self._baseline_rss)
+
+    @staticmethod
+    def _fold_peak(peak: float) -> None:
+        # only scoped profilers lose their peak when a nested one resets it
+        for outer in Profiler._active:
+            if outer._scoped:
+                outer._peak_seen = max(outer._peak_seen, peak)
+
+    def record_data(self, inputs, outputs) -> StepProfile:
+        """
+        Adds the input and output sizes and the throughput
+        Args:
+            inputs: Any: Values passed to the section
+            outputs: Any: Values returned by the section
+        Returns:
+            StepProfile: The completed profile
+        """
+        profile = self.profile
+        profile.input_rows, profile.input_bytes = data_size(inputs)
+        profile.output_rows, profile.output_bytes = data_size(outputs)
+        rows = profile.input_rows or profile.output_rows
+        profile.rows_per_sec = rows / profile.wall_s if profile.wall_s else 0.0
+        return profile
+
+    @staticmethod
+    def _cpu_seconds() -> float:
+        times = os.times()
+        return times.user + times.system + times.children_user + times.children_system
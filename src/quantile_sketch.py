@@ -0,0 +1,133 @@
+import numpy as np
+
+
+class QuantileSketch():
+    """
+    Mergeable quantile sketch with bounded memory, after KLL
+    Values are kept in a hierarchy of compactors: an item of level h stands
+    for 2^h values. When a level holds more than its capacity, it is cut
+    into capacity-sized chunks, every chunk is sorted and every other item
+    of it, from a random first position, moves up one level. The capacity
+    is k at the top level and shrinks by 2/3 per level below it, so about
+    3k items are kept whatever the count. Each compaction shifts the rank
+    of any value by at most 2^h, up or down with equal probability, and the
+    errors of the levels mostly cancel: with k = 4 / eps a quantile is
+    within eps * count ranks of the truth with high probability.
+    Sketches of disjoint rows, e.g. built by parallel workers, are merged by
+    concatenating their levels and compacting again, so merging costs the
+    same as an update of the other sketch's retained items.
+    Random positions come from seed, so the same batches give the same sketch.
+    NaN values are skipped, like pandas' median does.
+    """
+    def __init__(self, eps: float = 0.001, k: int | None = None, seed: int = 0):
+        """
+        Constructor for QuantileSketch
+        Args:
+            eps: float: Rank error bound as a fraction of the count
+            k: int | None: Capacity of the top compactor, defaults to 4 / eps
+            seed: int: Seed of the compaction positions
+        """
+        if not 0 < eps < 1:
+            raise ValueError(f"eps must be in (0, 1), got {eps}")
+        self.eps = eps
+        # compactors take even chunks, every item must have a partner
+        self.k = 2 * int(np.ceil((k or 4 / eps) / 2))
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def capacity(self, level: int) -> int:
+        """
+        Returns the number of items a level keeps before it is compacted
+        Args:
+            level: int: Level, 0 holds the values as they came in
+        Returns:
+            int: Even capacity, k at the top level and at least 2
+        """
+        capacity = int(self.k * (2 / 3) ** (len(self.levels) - 1 - level))
+        return max(2, capacity - capacity % 2)
+
+    def update(self, values) -> "QuantileSketch":
+        """
+        Folds a batch of values into the sketch
+        Args:
+            values: np.ndarray: Batch of values, NaN are skipped
+        Returns:
+            QuantileSketch: self
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        missing = np.isnan(values)
+        if missing.any():
+            values = values[~missing]
+        if values.size == 0:
+            return self
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += values.size
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Merges the sketch of another sketch built on disjoint rows
+        Args:
+            other: QuantileSketch: Sketch to merge in
+        Returns:
+            QuantileSketch: self
+        """
+        if other.count == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        # a new top level lowers the capacities below it, so repeat until every level fits
+        while any(items.size > self.capacity(level) for level, items in enumerate(self.levels)):
+            for level in range(len(self.levels)):
+                capacity = self.capacity(level)
+                items = self.levels[level]
+                if items.size <= capacity:
+                    continue
+                n_chunks = items.size // capacity
+                # above level 0 the items are sorted runs of earlier chunks, which timsort merges
+                chunks = np.sort(items[:n_chunks * capacity].reshape(n_chunks, capacity), axis=1,
+                                 kind="quicksort" if level == 0 else "stable")
+                promoted = chunks[:, 0::2].copy()
+                np.copyto(promoted, chunks[:, 1::2], where=self._rng.integers(0, 2, size=(n_chunks, 1), dtype=bool))
+                self.levels[level] = items[n_chunks * capacity:].copy()
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted.ravel()])
+
+    def retained(self) -> int:
+        """
+        Returns the number of items the sketch keeps
+        Returns:
+            int: Items over all levels
+        """
+        return sum(items.size for items in self.levels)
+
+    def quantile(self, q: float) -> float:
+        """
+        Returns a value whose rank is within eps * count of q * count
+        Args:
+            q: float: Quantile in [0, 1]
+        Returns:
+            float: The approximate quantile, NaN when no values were seen
+        """
+        if self.count == 0:
+            return float("nan")
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(items.size, 2 ** level, dtype=np.int64)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        rank = max(1, int(np.ceil(q * self.count)))
+        index = int(np.searchsorted(np.cumsum(weights[order]), rank))
+        return float(values[order][min(index, values.size - 1)])
+
+    def median(self) -> float:
+        return self.quantile(0.5)
@@ -0,0 +1,193 @@
+from dataclasses import dataclass, field
+
+
+# Numeric columns DataPreProcessingStrategy keeps as model features, in the
+# order they appear in the merged Olist export.
+FEATURE_COLUMNS : list[str] = [
+    "payment_sequential",
+    "payment_installments",
+    "payment_value",
+    "price",
+    "freight_value",
+    "product_name_lenght",
+    "product_description_lenght",
+    "product_photos_qty",
+    "product_weight_g",
+    "product_length_cm",
+    "product_height_cm",
+    "product_width_cm",
+]
+
+TARGET_COLUMN : str = "review_score"
+
+# Columns DataPreProcessingStrategy imputes with the median before splitting.
+MEDIAN_IMPUTED_COLUMNS : list[str] = [
+    "product_weight_g",
+    "product_length_cm",
+    "product_height_cm",
+    "product_width_cm",
+]
+
+# Declared dtypes for every column of the merged Olist export. Integer
+# columns that can be missing after the joins are stored as float32 so that
+# NaN stays representable without falling back to object or float64.
+OLIST_DTYPES : dict[str, str] = {
+    "order_id": "string",
+    "customer_id": "string",
+    "order_status": "category",
+    "order_purchase_timestamp": "string",
+    "order_approved_at": "string",
+    "order_delivered_carrier_date": "string",
+    "order_delivered_customer_date": "string",
+    "order_estimated_delivery_date": "string",
+    "customer_unique_id": "string",
+    "customer_zip_code_prefix": "int32",
+    "customer_city": "category",
+    "customer_state": "category",
+    "order_item_id": "float32",
+    "product_id": "string",
+    "seller_id": "string",
+    "shipping_limit_date": "string",
+    "price": "float32",
+    "freight_value": "float32",
+    "payment_sequential": "float32",
+    "payment_type": "category",
+    "payment_installments": "float32",
+    "payment_value": "float32",
+    "review_id": "string",
+    "review_score": "float32",
+    "review_comment_title": "string",
+    "review_comment_message": "string",
+    "review_creation_date": "string",
+    "review_answer_timestamp": "string",
+    "product_category_name": "category",
+    "product_name_lenght": "float32",
+    "product_description_lenght": "float32",
+    "product_photos_qty": "float32",
+    "product_weight_g": "float32",
+    "product_length_cm": "float32",
+    "product_height_cm": "float32",
+    "product_width_cm": "float32",
+    "product_category_name_english": "category",
+}
+
+
+# Files and columns of the tables of the public Olist dataset that the
+# merged export is joined from, in the order their columns appear in it.
+OLIST_TABLE_FILES : dict[str, str] = {
+    "orders": "olist_orders_dataset.csv",
+    "customers": "olist_customers_dataset.csv",
+    "items": "olist_order_items_dataset.csv",
+    "payments": "olist_order_payments_dataset.csv",
+    "reviews": "olist_order_reviews_dataset.csv",
+    "products": "olist_products_dataset.csv",
+    "categories": "product_category_name_translation.csv",
+}
+
+OLIST_TABLE_COLUMNS : dict[str, list[str]] = {
+    "orders": [
+        "order_id",
+        "customer_id",
+        "order_status",
+        "order_purchase_timestamp",
+        "order_approved_at",
+        "order_delivered_carrier_date",
+        "order_delivered_customer_date",
+        "order_estimated_delivery_date",
+    ],
+    "customers": [
+        "customer_id",
+        "customer_unique_id",
+        "customer_zip_code_prefix",
+        "customer_city",
+        "customer_state",
+    ],
+    "items": [
+        "order_id",
+        "order_item_id",
+        "product_id",
+        "seller_id",
+        "shipping_limit_date",
+        "price",
+        "freight_value",
+    ],
+    "payments": [
+        "order_id",
+        "payment_sequential",
+        "payment_type",
+        "payment_installments",
+        "payment_value",
+    ],
+    "reviews": [
+        "review_id",
+        "order_id",
+        "review_score",
+        "review_comment_title",
+        "review_comment_message",
+        "review_creation_date",
+        "review_answer_timestamp",
+    ],
+    "products": [
+        "product_id",
+        "product_category_name",
+        "product_name_lenght",
+        "product_description_lenght",
+        "product_photos_qty",
+        "product_weight_g",
+        "product_length_cm",
+        "product_height_cm",
+        "product_width_cm",
+    ],
+    "categories": [
+        "product_category_name",
+        "product_category_name_english",
+    ],
+}
+
+
+@dataclass
+class ColumnSchema:
+    """
+    Declared column schema used when reading raw data
+    Args:
+        dtypes: dict[str, str]: Column name to pandas dtype
+        usecols: list[str] | None: Columns to read, None reads every column
+    """
+    dtypes : dict[str, str] = field(default_factory=lambda: dict(OLIST_DTYPES))
+    usecols : list[str] | None = field(default_factory=lambda: FEATURE_COLUMNS + [TARGET_COLUMN])
+
+    def selected_dtypes(self, columns: list[str] | None = None) -> dict[str, str]:
+        """
+        Returns the declared dtypes restricted to the selected columns
+        Args:
+            columns: list[str] | None: Columns actually present, defaults to usecols
+        Returns:
+            dict[str, str]: Column name to dtype for the selected columns
+        """
+        columns = columns if columns is not None else self.usecols
+        if columns is None:
+            return dict(self.dtypes)
+        return {col: self.dtypes[col] for col in columns if col in self.dtypes}
+
+    def arrow_types(self) -> dict:
+        """
+        Returns the declared dtypes as pyarrow types for the pyarrow CSV reader
+        Returns:
+            dict: Column name to pyarrow DataType
+        """
+        import pyarrow as pa
+
+        mapping = {
+            "string": pa.string(),
+            "category": pa.dictionary(pa.int32(), pa.string()),
+            "float32": pa.float32(),
+            "float64": pa.float64(),
+            "int8": pa.int8(),
+            "int16": pa.int16(),
+            "int32": pa.int32(),
+            "int64": pa.int64(),
+        }
+        return {col: mapping[dtype] for col, dtype in self.selected_dtypes().items()}
+
+
+OLIST_SCHEMA : ColumnSchema = ColumnSchema()
@@ -0,0 +1,618 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.schema import FEATURE_COLUMNS
+
+
+class LatencyTracker():
+    """
+    Keeps the most recent request latencies and the served totals
+    """
+    def __init__(self, window: int = 100_000):
+        """
+        Constructor for LatencyTracker
+        Args:
+            window: int: Number of most recent latencies kept for percentiles
+        """
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.started_at = time.perf_counter()
+
+    def record(self, latency: float, rows: int) -> None:
+        self.latencies.append(latency)
+        self.requests += 1
+        self.rows += rows
+
+    def summary(self) -> dict:
+        """
+        Returns latency percentiles and throughput since start
+        Returns:
+            dict: p50/p99 latency in ms, requests and rows per second, mean batch size
+        """
+        elapsed = time.perf_counter() - self.started_at
+        latencies = np.fromiter(self.latencies, dtype=np.float64) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]) if latencies.size else (0.0, 0.0)
+        return {
+            "requests": self.requests,
+            "rows": self.rows,
+            "p50_ms": round(float(p50), 3),
+            "p99_ms": round(float(p99), 3),
+            "requests_per_sec": round(self.requests / elapsed, 1),
+            "rows_per_sec": round(self.rows / elapsed, 1),
+            "mean_batch_rows": round(self.rows / self.batches, 1) if self.batches else 0.0,
+        }
+
+
+@dataclass
+class ModelVersion:
+    """
+    A loaded model and where it came from
+    """
+    uri : str | None
+    model : object
+    feature_names : list[str]
+    loaded_at : float = 0.0
+    load_ms : float = 0.0
+    warmup_ms : float = 0.0
+
+    @staticmethod
+    def of(model, uri: str | None = None, **timings: float) -> "ModelVersion":
+        return ModelVersion(uri, model, list(getattr(model, "feature_names_in_", FEATURE_COLUMNS)),
+                            time.time(), **timings)
+
+    def describe(self) -> dict:
+        return {"uri": self.uri, "loaded_at": round(self.loaded_at, 3),
+                "load_ms": round(self.load_ms, 1), "warmup_ms": round(self.warmup_ms, 1)}
+
+
+class MicroBatcher():
+    """
+    Coalesces concurrent prediction requests into vectorized batches
+    The first queued request opens a batch; further requests join it until
+    max_batch_rows is reached or max_wait has passed since it opened. The
+    whole batch is scored by a single predict call on a worker thread, so
+    the event loop keeps accepting requests meanwhile; a drift monitor is
+    updated on the same thread, once per batch. Every batch reads the
+    active model once, so swap and rollback take effect between batches
+    and a batch in flight finishes on the model it started with.
+    """
+    def __init__(self, model, max_batch_rows: int = 4096, max_wait: float = 0.002,
+                 tracker: LatencyTracker | None = None, monitor=None):
+        """
+        Constructor for MicroBatcher
+        Args:
+            model: RegressorMixin | ModelVersion: Trained model
+            max_batch_rows: int: Rows at which a batch is scored without waiting
+            max_wait: float: Seconds a batch waits for more requests
+            tracker: LatencyTracker | None: Where batch sizes are recorded
+            monitor: DriftMonitor | None: Histograms of the scored batches
+        """
+        self.active = model if isinstance(model, ModelVersion) else ModelVersion.of(model)
+        self.previous : ModelVersion | None = None
+        self.last_batch : np.ndarray | None = None
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait
+        self.tracker = tracker or LatencyTracker()
+        self.monitor = monitor
+        self._queue : asyncio.Queue | None = None
+        self._task : asyncio.Task | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._executor.shutdown(wait=False)
+
+    @property
+    def model(self):
+        return self.active.model
+
+    @property
+    def feature_names(self) -> list[str]:
+        return self.active.feature_names
+
+    def swap(self, version: ModelVersion) -> None:
+        """
+        Makes a loaded model the active one, keeping the current one for rollback
+        Only this process's batcher changes, PredictionServer passes the swap
+        on to the other workers through a SharedModelPointer.
+        Args:
+            version: ModelVersion: Model expecting the same features as the active one
+        """
+        self.check_features(version)
+        self.previous, self.active = self.active, version
+
+    def check_features(self, version: ModelVersion) -> None:
+        # requests are parsed in the active model's feature order before they are batched
+        if version.feature_names != self.active.feature_names:
+            raise ValueError(f"Model expects {version.feature_names}, the server parses "
+                             f"{self.active.feature_names}")
+
+    def rollback(self) -> None:
+        """
+        Swaps back to the previous model, which is still loaded and warm
+        """
+        if self.previous is None:
+            raise ValueError("No previous model to roll back to")
+        self.active, self.previous = self.previous, self.active
+
+    async def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Queues rows for the next batch and waits for their predictions
+        Args:
+            features: np.ndarray: (rows, n_features) matrix in feature order
+        Returns:
+            np.ndarray: One prediction per row
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, future))
+        return await future
+
+    @staticmethod
+    def score(version: ModelVersion, features: np.ndarray) -> np.ndarray:
+        model = version.model
+        if hasattr(model, "feature_names_in_"):
+            predictions = model.predict(pd.DataFrame(features, columns=version.feature_names, copy=False))
+        else:
+            predictions = model.predict(features)
+        return np.asarray(predictions, dtype=np.float64)
+
+    def _predict_batch(self, features: np.ndarray) -> np.ndarray:
+        predictions = self.score(self.active, features)
+        # kept as the warm-up batch of the next model
+        self.last_batch = features
+        if self.monitor is not None:
+            self.monitor.update(features, predictions)
+        return predictions
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            rows = len(items[0][0])
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                rows += len(item[0])
+            try:
+                batch = np.concatenate([features for features, _ in items])
+                predictions = await loop.run_in_executor(self._executor, self._predict_batch, batch)
+            except Exception as e:
+                logging.error(f"Error in scoring batch: {e}")
+                # re-score request by request so only the failing ones get the error
+                for features, future in items:
+                    try:
+                        result = await loop.run_in_executor(self._executor, self._predict_batch, features)
+                    except Exception as request_error:
+                        if not future.done():
+                            future.set_exception(request_error)
+                        continue
+                    if not future.done():
+                        future.set_result(result)
+                continue
+            self.tracker.batches += 1
+            offset = 0
+            for features, future in items:
+                if not future.done():
+                    future.set_result(predictions[offset:offset + len(features)])
+                offset += len(features)
+
+
+def parse_features(payload: dict, feature_names: list[str]) -> np.ndarray:
+    """
+    Reads rows from an MLflow style scoring payload
+    Accepts {"dataframe_split": {"columns": [...], "data": [[...]]}},
+    {"dataframe_records": [{...}]}, {"instances": [[...]]} and {"inputs": [[...]]}.
+    Args:
+        payload: dict: Decoded request body
+        feature_names: list[str]: Feature order expected by the model
+    Returns:
+        np.ndarray: (rows, n_features) float64 matrix
+    Raises:
+        ValueError: If the rows have the wrong number of columns or non-finite values
+    """
+    if "dataframe_split" in payload:
+        split = payload["dataframe_split"]
+        data = checked_rows(split["data"], len(split["columns"]))
+        if list(split["columns"]) != feature_names:
+            position = {col: i for i, col in enumerate(split["columns"])}
+            data = data[:, [position[col] for col in feature_names]]
+        return data
+    if "dataframe_records" in payload:
+        records = payload["dataframe_records"]
+        return checked_rows([[record[col] for col in feature_names] for record in records], len(feature_names))
+    rows = payload.get("instances", payload.get("inputs"))
+    if rows is None:
+        raise ValueError("Expected dataframe_split, dataframe_records, instances or inputs")
+    return checked_rows(rows, len(feature_names))
+
+
+def checked_rows(rows: list, n_features: int) -> np.ndarray:
+    """
+    Converts request rows to a float64 matrix and validates it
+    Every request is checked before it is queued, so a malformed one is
+    answered with 400 instead of failing the batch it would have joined.
+    Args:
+        rows: list: Rows of values
+        n_features: int: Number of columns every row must have
+    Returns:
+        np.ndarray: (rows, n_features) float64 matrix
+    Raises:
+        ValueError: If the rows have the wrong number of columns or non-finite values
+    """
+    data = np.asarray(rows, dtype=np.float64)
+    if data.size == 0:
+        return np.empty((0, n_features))
+    if data.ndim != 2 or data.shape[1] != n_features:
+        raise ValueError(f"Expected rows of {n_features} values, got an array of shape {data.shape}")
+    if not np.isfinite(data).all():
+        raise ValueError("Feature values must be finite")
+    return data
+
+
+def lookup_features(store, ids: list, feature_names: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fetches the stored features of a batch of IDs in model feature order
+    Args:
+        store: FeatureStore: Online feature store
+        ids: list: IDs to look up
+        feature_names: list[str]: Feature order expected by the model
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (rows, n_features) float64 matrix of
+            the found IDs, and whether each ID was found
+    """
+    store.refresh()
+    features, found = store.lookup(ids)
+    if store.columns != feature_names:
+        position = {col: i for i, col in enumerate(store.columns)}
+        features = features[:, [position[col] for col in feature_names]]
+    return features[found].astype(np.float64), found
+
+
+class SharedModelPointer():
+    """
+    File holding the model URI that every server worker should serve
+    Workers are separate processes, each with its own MicroBatcher, so a
+    swap or rollback one of them is told about is published here and the
+    others poll the file and follow. It is replaced atomically, so a poll
+    never reads a partial write; of two concurrent swaps the last written
+    one wins on every worker.
+    """
+    def __init__(self, path: str):
+        """
+        Constructor for SharedModelPointer
+        Args:
+            path: str: Pointer file, on a filesystem every worker sees
+        """
+        self.path = path
+
+    def read(self) -> str | None:
+        """
+        Returns:
+            str | None: The published model URI, None before the first publish
+        """
+        try:
+            with open(self.path) as f:
+                return json.load(f)["model_uri"]
+        except FileNotFoundError:
+            return None
+
+    def publish(self, model_uri: str) -> None:
+        """
+        Points every worker at a model URI
+        Args:
+            model_uri: str: Model the workers should serve
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".model_pointer")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"model_uri": model_uri, "published_at": time.time()}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _load_mlflow_model(model_uri: str):
+    from src.batch_scoring import load_model
+
+    return load_model(model_uri)
+
+
+class PredictionServer():
+    """
+    Minimal asyncio HTTP/1.1 server for a model loaded once in process
+    POST /invocations scores an MLflow style payload, GET /metrics returns
+    the latency and throughput summary, GET /drift the drift scores of the
+    served rows when a monitor is given and GET /ping answers health checks.
+    With a feature store, {"ids": [...]} payloads are scored from the
+    stored features; unknown IDs get a null prediction and are listed
+    under "missing".
+    A new model version is swapped in without a restart: POST /models/swap
+    with {"model_uri": ...} loads it on a background thread and warms it
+    on the last scored batch while the active model keeps serving, then
+    makes it active between two batches; {"wait": true} answers once it is
+    active. The replaced model stays loaded, so POST /models/rollback is
+    as cheap as the swap, and GET /models lists both. With a model_source,
+    e.g. the URI of the deployed MLflow service, the server polls it and
+    swaps to every new URI by itself.
+    Swaps and rollbacks only change the worker that receives them. Several
+    workers share a model_pointer instead: the worker told to swap or roll
+    back publishes its new active URI there, and every worker polls it,
+    swapping to a new URI or, when it is the one kept for rollback, rolling
+    back without a load.
+    """
+    def __init__(self, model, host: str = "127.0.0.1", port: int = 8000,
+                 max_batch_rows: int = 4096, max_wait: float = 0.002,
+                 feature_store=None, monitor=None, model_uri: str | None = None,
+                 loader: Callable[[str], object] | None = None,
+                 model_source: Callable[[], str | None] | None = None,
+                 watch_interval: float = 30.0,
+                 model_pointer: str | None = None):
+        """
+        Constructor for PredictionServer
+        Args:
+            model: RegressorMixin: Trained model
+            host: str: Interface to bind
+            port: int: Port to bind
+            max_batch_rows: int: Rows at which a batch is scored without waiting
+            max_wait: float: Seconds a batch waits for more requests
+            feature_store: FeatureStore | None: Store ID payloads are looked up in
+            monitor: DriftMonitor | None: Drift histograms, in the model's feature order
+            model_uri: str | None: Where model was loaded from
+            loader: Callable[[str], RegressorMixin] | None: Loads a model URI,
+                defaults to the MLflow loader
+            model_source: Callable[[], str | None] | None: Returns the URI
+                that should be served, polled every watch_interval seconds
+            watch_interval: float: Seconds between polls of model_source
+            model_pointer: str | None: SharedModelPointer file of the workers,
+                polled every watch_interval seconds instead of model_source
+        """
+        self.host = host
+        self.port = port
+        self.tracker = LatencyTracker()
+        self.batcher = MicroBatcher(ModelVersion.of(model, model_uri), max_batch_rows, max_wait,
+                                    self.tracker, monitor)
+        self.feature_store = feature_store
+        self.loader = loader or _load_mlflow_model
+        self.pointer = SharedModelPointer(model_pointer) if model_pointer else None
+        self.model_source = self.pointer.read if self.pointer is not None else model_source
+        self.watch_interval = watch_interval
+        self.loading : str | None = None
+        self.last_error : str | None = None
+        self._seen_uri = model_uri
+        self._load_task : asyncio.Task | None = None
+        # loads and warm-ups run beside the scoring thread, never on it
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="load")
+        # store lookups read the memory map and hash the IDs, off the event loop
+        self._lookups = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lookup")
+
+    async def serve(self) -> None:
+        """
+        Serves requests until cancelled
+        """
+        await self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        watcher = asyncio.create_task(self._watch()) if self.model_source is not None else None
+        logging.info(f"Serving predictions on http://{self.host}:{self.port}/invocations")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            await self.batcher.stop()
+            self._loader.shutdown(wait=False)
+            self._lookups.shutdown(wait=False)
+            logging.info(f"Served {self.tracker.summary()}")
+
+    def start_swap(self, model_uri: str, publish: bool = False) -> asyncio.Task:
+        """
+        Starts loading, warming and activating a model version
+        Args:
+            model_uri: str: Model to load, e.g. "runs:/<run_id>/model"
+            publish: bool: Point the other workers at it once it is active
+        Returns:
+            asyncio.Task: Resolves to the new ModelVersion, or None when it
+                failed and the active model was kept, see last_error
+        """
+        if self.loading is not None:
+            raise RuntimeError(f"Already loading {self.loading}")
+        self.loading = model_uri
+        self._load_task = asyncio.create_task(self._swap(model_uri, publish))
+        return self._load_task
+
+    async def _swap(self, model_uri: str, publish: bool = False) -> ModelVersion | None:
+        try:
+            version = await asyncio.get_running_loop().run_in_executor(self._loader, self._load_version, model_uri)
+            self.batcher.swap(version)
+            if publish:
+                self.publish()
+        except Exception as e:
+            self.last_error = f"{model_uri}: {e}"
+            logging.error(f"Could not swap to {model_uri}, still serving {self.batcher.active.uri}: {e}")
+            return None
+        finally:
+            self.loading = None
+        self.last_error = None
+        logging.info(f"Serving {model_uri}, loaded in {version.load_ms:.0f} ms and warmed in "
+                     f"{version.warmup_ms:.0f} ms; {self.batcher.previous.uri} kept for rollback")
+        return version
+
+    def _load_version(self, model_uri: str) -> ModelVersion:
+        start = time.perf_counter()
+        version = ModelVersion.of(self.loader(model_uri), model_uri)
+        version.load_ms = (time.perf_counter() - start) * 1000
+        self.batcher.check_features(version)
+        start = time.perf_counter()
+        rows = self.batcher.last_batch
+        if rows is None:
+            rows = np.zeros((1, len(version.feature_names)))
+        # the first calls pay for lazy imports and validation caches, on the
+        # single row and the batch path alike
+        for batch in (rows[:1], rows):
+            predictions = MicroBatcher.score(version, batch)
+            if predictions.shape != (len(batch),) or not np.isfinite(predictions).all():
+                raise ValueError("Warm-up did not return one finite prediction per row")
+        version.warmup_ms = (time.perf_counter() - start) * 1000
+        return version
+
+    def publish(self) -> None:
+        """
+        Points the other workers at the active model, when they share a pointer
+        """
+        if self.pointer is None or self.batcher.active.uri is None:
+            return
+        # this worker already serves it, its own next poll has nothing to do
+        self._seen_uri = self.batcher.active.uri
+        self.pointer.publish(self.batcher.active.uri)
+
+    async def _watch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            try:
+                model_uri = await loop.run_in_executor(self._loader, self.model_source)
+            except Exception as e:
+                logging.warning(f"Could not resolve the model to serve: {e}")
+                continue
+            # only a new URI is swapped to, so a rollback or a failed load is not undone
+            if model_uri is None or model_uri == self._seen_uri or self.loading is not None:
+                continue
+            self._seen_uri = model_uri
+            if model_uri == self.batcher.active.uri:
+                continue
+            previous = self.batcher.previous
+            if previous is not None and previous.uri == model_uri:
+                self.batcher.rollback()
+                logging.info(f"Rolled back to {model_uri}")
+                continue
+            await self.start_swap(model_uri)
+
+    def models(self) -> dict:
+        previous = self.batcher.previous
+        return {"active": self.batcher.active.describe(),
+                "previous": previous.describe() if previous is not None else None,
+                "loading": self.loading, "last_error": self.last_error}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    # the rest of the stream can't be framed, answer and hang up
+                    self._write_response(writer, "400 Bad Request", {"error": "Malformed request line"})
+                    await writer.drain()
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, response = await self._route(method, path, body)
+                self._write_response(writer, status, response)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: str, response: dict) -> None:
+        payload = json.dumps(response).encode()
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+        )
+
+    async def _route(self, method: str, path: str, body: bytes) -> tuple[str, dict]:
+        if method == "GET" and path == "/ping":
+            return "200 OK", {"status": "ok"}
+        if method == "GET" and path == "/metrics":
+            return "200 OK", self.tracker.summary()
+        if method == "GET" and path == "/drift":
+            if self.batcher.monitor is None:
+                return "404 Not Found", {"error": "No drift monitor configured"}
+            return "200 OK", self.batcher.monitor.scores()
+        if method == "GET" and path == "/models":
+            return "200 OK", self.models()
+        if method == "POST" and path == "/models/swap":
+            try:
+                payload = json.loads(body)
+                model_uri = str(payload["model_uri"])
+                # reloading the active model would replace the rollback target
+                if model_uri == self.batcher.active.uri:
+                    return "200 OK", self.models()
+                task = self.start_swap(model_uri, publish=True)
+            except (ValueError, KeyError, TypeError) as e:
+                return "400 Bad Request", {"error": str(e)}
+            except RuntimeError as e:
+                return "409 Conflict", {"error": str(e)}
+            if not payload.get("wait", False):
+                return "202 Accepted", self.models()
+            if await task is None:
+                return "500 Internal Server Error", {"error": self.last_error}
+            return "200 OK", self.models()
+        if method == "POST" and path == "/models/rollback":
+            try:
+                self.batcher.rollback()
+            except ValueError as e:
+                return "409 Conflict", {"error": str(e)}
+            self.publish()
+            logging.info(f"Rolled back to {self.batcher.active.uri}")
+            return "200 OK", self.models()
+        if method != "POST" or path != "/invocations":
+            return "404 Not Found", {"error": f"No route for {method} {path}"}
+        start = time.perf_counter()
+        found = None
+        try:
+            payload = json.loads(body)
+            if "ids" in payload:
+                if self.feature_store is None:
+                    raise ValueError("ID payloads need a feature store")
+                ids = list(payload["ids"])
+                features, found = await asyncio.get_running_loop().run_in_executor(
+                    self._lookups, lookup_features, self.feature_store, ids, self.batcher.feature_names)
+            else:
+                features = parse_features(payload, self.batcher.feature_names)
+        except (ValueError, KeyError, TypeError) as e:
+            return "400 Bad Request", {"error": str(e)}
+        try:
+            predictions = await self.batcher.predict(features) if len(features) else np.empty(0)
+        except Exception as e:
+            return "500 Internal Server Error", {"error": str(e)}
+        self.tracker.record(time.perf_counter() - start, len(features))
+        if found is None:
+            return "200 OK", {"predictions": predictions.tolist()}
+        scored = np.full(len(ids), None, dtype=object)
+        scored[found] = predictions.tolist()
+        return "200 OK", {"predictions": scored.tolist(),
+                          "missing": [ids[i] for i in np.flatnonzero(~found)]}
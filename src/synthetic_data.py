@@ -0,0 +1,420 @@
+"""
+Seeded generator of synthetic data shaped like the merged Olist export.
+
+Every column of OLIST_DTYPES is produced with Olist-like distributions and
+null rates: the timestamps and product columns DataPreProcessingStrategy
+drops or imputes are missing as often as in the public dataset, the review
+comments are mostly empty, and product attributes come from a fixed catalog
+so that repeated products carry identical attributes. The numeric features
+the preprocessing does not impute are kept complete, so the generated files
+run through the whole pipeline.
+
+Every random draw is a hash of the seed and the row, order or product
+index, so the rows do not depend on how the output is chunked and a file
+of 100M rows is written a chunk at a time.
+"""
+import binascii
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from src.schema import OLIST_DTYPES, OLIST_TABLE_COLUMNS, OLIST_TABLE_FILES
+
+# Fraction of rows left empty per column, after the Olist public dataset.
+NULL_RATES : dict[str, float] = {
+    "order_approved_at": 0.0015,
+    "order_delivered_carrier_date": 0.018,
+    "order_delivered_customer_date": 0.03,
+    "review_comment_title": 0.88,
+    "review_comment_message": 0.58,
+    "product_category_name": 0.014,
+    "product_category_name_english": 0.015,
+    "product_weight_g": 0.0002,
+    "product_length_cm": 0.0002,
+    "product_height_cm": 0.0002,
+    "product_width_cm": 0.0002,
+}
+
+N_PRODUCTS : int = 32_951
+N_SELLERS : int = 3_095
+# Rows per order, the items of one order are consecutive rows.
+ROWS_PER_ORDER : float = 1.15
+# Orders of the public dataset, the unit of write_synthetic_olist_tables' scale.
+PUBLIC_ORDERS : int = 99_441
+# Share of orders placed by a customer who ordered before.
+REPEAT_CUSTOMER_RATE : float = 0.03
+
+ORDER_STATUSES : dict[str, float] = {
+    "delivered": 0.970, "shipped": 0.011, "canceled": 0.006, "unavailable": 0.006,
+    "invoiced": 0.003, "processing": 0.003, "created": 0.0005, "approved": 0.0005,
+}
+CUSTOMER_STATES : dict[str, float] = {
+    "SP": 0.42, "RJ": 0.13, "MG": 0.12, "RS": 0.055, "PR": 0.05, "SC": 0.036,
+    "BA": 0.034, "DF": 0.021, "ES": 0.02, "GO": 0.02, "PE": 0.017, "CE": 0.013,
+    "PA": 0.01, "MT": 0.009, "MA": 0.008, "MS": 0.007, "PB": 0.006, "PI": 0.005,
+    "RN": 0.005,
+}
+CUSTOMER_CITIES : list[str] = [
+    "sao paulo", "rio de janeiro", "belo horizonte", "brasilia", "curitiba",
+    "campinas", "porto alegre", "salvador", "guarulhos", "sao bernardo do campo",
+    "niteroi", "santo andre", "osasco", "santos", "goiania", "sao jose dos campos",
+    "fortaleza", "sorocaba", "recife", "florianopolis",
+]
+PAYMENT_TYPES : dict[str, float] = {
+    "credit_card": 0.739, "boleto": 0.19, "voucher": 0.056, "debit_card": 0.015,
+}
+CATEGORIES : dict[str, str] = {
+    "cama_mesa_banho": "bed_bath_table",
+    "beleza_saude": "health_beauty",
+    "esporte_lazer": "sports_leisure",
+    "moveis_decoracao": "furniture_decor",
+    "informatica_acessorios": "computers_accessories",
+    "utilidades_domesticas": "housewares",
+    "relogios_presentes": "watches_gifts",
+    "telefonia": "telephony",
+    "ferramentas_jardim": "garden_tools",
+    "automotivo": "auto",
+    "brinquedos": "toys",
+    "cool_stuff": "cool_stuff",
+    "perfumaria": "perfumery",
+    "bebes": "baby",
+    "eletronicos": "electronics",
+}
+REVIEW_SCORE_PROBS : dict[str, float] = {"1": 0.115, "2": 0.033, "3": 0.085, "4": 0.19, "5": 0.577}
+REVIEW_TITLES : list[str] = ["recomendo", "otimo", "bom", "ruim", "nao recebi", "super recomendo"]
+REVIEW_MESSAGES : list[str] = [
+    "produto chegou antes do prazo, recomendo",
+    "entrega rapida e produto de qualidade",
+    "ainda nao recebi o produto",
+    "produto diferente do anunciado",
+    "muito bom, gostei bastante",
+    "veio com defeito, quero trocar",
+]
+
+_DAY_S = 86_400
+_FIRST_PURCHASE_S = int(np.datetime64("2016-09-04T00:00:00", "s").astype(np.int64))
+_LAST_PURCHASE_S = int(np.datetime64("2018-10-17T00:00:00", "s").astype(np.int64))
+
+
+def _mix(values: np.ndarray, salt: int) -> np.ndarray:
+    # splitmix64 finalizer, a bijection of uint64 so distinct values stay distinct
+    with np.errstate(over="ignore"):
+        z = values.astype(np.uint64) + np.uint64((salt * 0x9E3779B97F4A7C15) % 2 ** 64)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+class _Draws():
+    """
+    Counter based random draws, one independent stream per salt
+    """
+    def __init__(self, index: np.ndarray, seed: int):
+        self.index = index
+        self.seed = seed
+
+    def uniform(self, salt: int) -> np.ndarray:
+        return (_mix(self.index, self.seed * 1_000 + salt) >> np.uint64(11)) * 2.0 ** -53
+
+    def normal(self, salt: int) -> np.ndarray:
+        return np.sqrt(-2 * np.log1p(-self.uniform(salt))) * np.cos(2 * np.pi * self.uniform(salt + 500))
+
+    def exponential(self, salt: int, scale: float) -> np.ndarray:
+        return -np.log1p(-self.uniform(salt)) * scale
+
+    def geometric(self, salt: int, p: float) -> np.ndarray:
+        return np.floor(np.log1p(-self.uniform(salt)) / np.log1p(-p)) + 1
+
+    def integers(self, salt: int, low: int, high: int) -> np.ndarray:
+        return low + (self.uniform(salt) * (high - low)).astype(np.int64)
+
+    def choice(self, salt: int, weights: dict[str, float]) -> np.ndarray:
+        cumulative = np.cumsum(np.fromiter(weights.values(), dtype=np.float64))
+        picks = np.searchsorted(cumulative / cumulative[-1], self.uniform(salt), side="right")
+        return np.minimum(picks, len(weights) - 1).astype(np.int32)
+
+    def missing(self, salt: int, column: str) -> np.ndarray:
+        return self.uniform(salt) < NULL_RATES[column]
+
+
+def _hex_ids(values: np.ndarray, salt: int):
+    import pyarrow as pa
+
+    words = np.stack([_mix(values, salt), _mix(values, salt + 1)], axis=1).astype(">u8")
+    hexed = np.frombuffer(binascii.hexlify(words.tobytes()), dtype="S32")
+    return pa.array(hexed).cast(pa.string())
+
+
+@lru_cache(maxsize=1)
+def _clock_table() -> np.ndarray:
+    # "HH:MM:SS" for every second of the day
+    second = np.arange(_DAY_S)
+    clock = np.empty((_DAY_S, 8), dtype=np.uint8)
+    clock[:] = np.frombuffer(b"00:00:00", dtype=np.uint8)
+    for value, offset in ((second // 3600, 0), (second // 60 % 60, 3), (second % 60, 6)):
+        clock[:, offset] += (value // 10).astype(np.uint8)
+        clock[:, offset + 1] += (value % 10).astype(np.uint8)
+    return clock
+
+
+def _timestamps(seconds: np.ndarray, missing: np.ndarray | None = None):
+    import pyarrow as pa
+
+    # formatting goes through lookup tables, the rows span only a few hundred days
+    days, second_of_day = np.divmod(seconds, _DAY_S)
+    first_day = days.min()
+    dates = np.arange(first_day, days.max() + 1).astype("datetime64[D]")
+    date_table = np.datetime_as_string(dates).astype("S10")
+    text = np.empty(len(seconds), dtype=[("date", "S10"), ("sep", "S1"), ("clock", "u8")])
+    text["date"] = date_table[days - first_day]
+    text["sep"] = b" "
+    text["clock"] = _clock_table().view("u8").ravel()[second_of_day]
+    return pa.array(text.view("S19"), mask=missing).cast(pa.string())
+
+
+def _categories(codes: np.ndarray, labels: list[str], missing: np.ndarray | None = None, as_string: bool = False):
+    import pyarrow as pa
+
+    array = pa.DictionaryArray.from_arrays(pa.array(codes.astype(np.int32), mask=missing), pa.array(labels))
+    return array.cast(pa.string()) if as_string else array
+
+
+def _catalog(seed: int) -> dict[str, np.ndarray]:
+    draws = _Draws(np.arange(N_PRODUCTS, dtype=np.int64), seed)
+    catalog = {
+        "category": draws.integers(1, 0, len(CATEGORIES)),
+        "no_category": draws.missing(2, "product_category_name"),
+        # the English name is missing whenever the category is, and for a few more products
+        "no_english": draws.uniform(3) < NULL_RATES["product_category_name_english"] - NULL_RATES["product_category_name"],
+        "product_name_lenght": np.clip(np.round(48 + 10 * draws.normal(4)), 5, 76),
+        "product_description_lenght": np.clip(np.round(np.exp(6.4 + 0.75 * draws.normal(5))), 4, 3992),
+        "product_photos_qty": np.minimum(draws.geometric(6, 0.45), 20),
+        "product_weight_g": np.clip(np.round(np.exp(6.6 + 1.2 * draws.normal(7))), 0, 40_425),
+        "product_length_cm": np.clip(np.round(np.exp(3.3 + 0.5 * draws.normal(8))), 7, 105),
+        "product_height_cm": np.clip(np.round(np.exp(2.6 + 0.7 * draws.normal(9))), 2, 105),
+        "product_width_cm": np.clip(np.round(np.exp(3.0 + 0.45 * draws.normal(10))), 6, 118),
+        "base_price": np.clip(np.exp(4.3 + 0.95 * draws.normal(11)), 0.85, 6735),
+    }
+    for salt, col in enumerate(("product_weight_g", "product_length_cm", "product_height_cm", "product_width_cm"), 12):
+        catalog[col] = np.where(draws.missing(salt, col), np.nan, catalog[col])
+    return catalog
+
+
+def generate_table(start: int, n_rows: int, seed: int = 42, catalog: dict | None = None):
+    """
+    Generates rows start to start + n_rows of the synthetic dataset
+    Args:
+        start: int: Index of the first row, ids continue across chunks
+        n_rows: int: Number of rows
+        seed: int: Seed of the dataset
+        catalog: dict | None: Product catalog of the seed, built when None
+    Returns:
+        pa.Table: Rows with every column of OLIST_DTYPES, in that order
+    """
+    import pyarrow as pa
+
+    catalog = catalog if catalog is not None else _catalog(seed)
+    rows = np.arange(start, start + n_rows, dtype=np.int64)
+    row = _Draws(rows, seed)
+
+    # the items of an order share its ids, customer, payment and timestamps
+    order_index = (rows / ROWS_PER_ORDER).astype(np.int64)
+    first_row = np.ceil(order_index * ROWS_PER_ORDER).astype(np.int64)
+    order = _Draws(order_index, seed)
+    repeat = order.uniform(20) < REPEAT_CUSTOMER_RATE
+    customer_index = np.where(repeat, (order.uniform(21) * order_index).astype(np.int64), order_index)
+    customer = _Draws(customer_index, seed)
+
+    purchase = _FIRST_PURCHASE_S + (order.uniform(22) * (_LAST_PURCHASE_S - _FIRST_PURCHASE_S)).astype(np.int64)
+    approved = purchase + order.exponential(23, 10 * 3600).astype(np.int64)
+    carrier = approved + ((order.exponential(24, 1.5) + order.exponential(25, 1.5)) * _DAY_S).astype(np.int64)
+    delivered = carrier + ((order.exponential(26, 3) + order.exponential(27, 3) + order.exponential(28, 3)) * _DAY_S).astype(np.int64)
+    estimated = (purchase // _DAY_S + order.integers(29, 15, 35)) * _DAY_S
+    late_days = np.maximum(delivered - estimated, 0) / _DAY_S
+
+    product = (N_PRODUCTS * row.uniform(40) ** 2.5).astype(np.int64)
+    price = np.round(np.maximum(catalog["base_price"][product] * (0.9 + 0.2 * row.uniform(41)), 0.85), 2)
+    weight = np.nan_to_num(catalog["product_weight_g"][product], nan=700.0)
+    freight = np.round(np.clip(np.exp(2.6 + 0.4 * row.normal(42)) + weight / 2_000, 0, 410), 2)
+    payment_sequential = np.where(order.uniform(43) < 0.95, 1, order.integers(44, 2, 6)).astype(np.float64)
+    payment_installments = np.minimum(order.geometric(45, 0.35), 24)
+    payment_value = np.round((price + freight) * (0.95 + 0.1 * row.uniform(46)) / payment_sequential, 2)
+
+    # late deliveries and expensive freight pull the review score down
+    score_shift = np.round((np.minimum(late_days, 10) / 4 + 2 * freight / (price + freight)) * order.uniform(47))
+    review_score = np.clip(order.choice(48, REVIEW_SCORE_PROBS) + 1 - score_shift, 1, 5)
+    review_created = (np.maximum(delivered, estimated - 7 * _DAY_S) // _DAY_S + 1) * _DAY_S
+
+    category = catalog["category"][product]
+    columns = {
+        "order_id": _hex_ids(order_index, seed * 1_000 + 60),
+        "customer_id": _hex_ids(order_index, seed * 1_000 + 62),
+        "order_status": _categories(order.choice(61, ORDER_STATUSES), list(ORDER_STATUSES)),
+        "order_purchase_timestamp": _timestamps(purchase),
+        "order_approved_at": _timestamps(approved, order.missing(63, "order_approved_at")),
+        "order_delivered_carrier_date": _timestamps(carrier, order.missing(64, "order_delivered_carrier_date")),
+        "order_delivered_customer_date": _timestamps(delivered, order.missing(65, "order_delivered_customer_date")),
+        "order_estimated_delivery_date": _timestamps(estimated),
+        "customer_unique_id": _hex_ids(customer_index, seed * 1_000 + 66),
+        "customer_zip_code_prefix": pa.array(customer.integers(67, 1_000, 99_990).astype(np.int32)),
+        "customer_city": _categories(customer.integers(68, 0, len(CUSTOMER_CITIES)), CUSTOMER_CITIES),
+        "customer_state": _categories(customer.choice(69, CUSTOMER_STATES), list(CUSTOMER_STATES)),
+        "order_item_id": pa.array((rows - first_row + 1).astype(np.float64)),
+        "product_id": _hex_ids(product, seed * 1_000 + 70),
+        "seller_id": _hex_ids(_mix(product, seed * 1_000 + 72) % np.uint64(N_SELLERS), seed * 1_000 + 74),
+        "shipping_limit_date": _timestamps(approved + 6 * _DAY_S),
+        "price": pa.array(price),
+        "freight_value": pa.array(freight),
+        "payment_sequential": pa.array(payment_sequential),
+        "payment_type": _categories(order.choice(76, PAYMENT_TYPES), list(PAYMENT_TYPES)),
+        "payment_installments": pa.array(payment_installments),
+        "payment_value": pa.array(payment_value),
+        "review_id": _hex_ids(order_index, seed * 1_000 + 78),
+        "review_score": pa.array(review_score),
+        "review_comment_title": _categories(order.integers(80, 0, len(REVIEW_TITLES)), REVIEW_TITLES,
+                                            order.missing(81, "review_comment_title"), as_string=True),
+        "review_comment_message": _categories(order.integers(82, 0, len(REVIEW_MESSAGES)), REVIEW_MESSAGES,
+                                              order.missing(83, "review_comment_message"), as_string=True),
+        "review_creation_date": _timestamps(review_created),
+        "review_answer_timestamp": _timestamps(review_created + order.exponential(84, 2 * _DAY_S).astype(np.int64)),
+        "product_category_name": _categories(category, list(CATEGORIES), catalog["no_category"][product]),
+    }
+    for col in ("product_name_lenght", "product_description_lenght", "product_photos_qty",
+                "product_weight_g", "product_length_cm", "product_height_cm", "product_width_cm"):
+        values = catalog[col][product]
+        columns[col] = pa.array(values, mask=np.isnan(values))
+    columns["product_category_name_english"] = _categories(
+        category, list(CATEGORIES.values()), catalog["no_category"][product] | catalog["no_english"][product]
+    )
+    return pa.table({col: columns[col] for col in OLIST_DTYPES})
+
+
+def generate_chunk(start: int, n_rows: int, seed: int = 42, catalog: dict | None = None) -> pd.DataFrame:
+    """
+    Generates rows start to start + n_rows of the synthetic dataset as a DataFrame
+    Args:
+        start: int: Index of the first row
+        n_rows: int: Number of rows
+        seed: int: Seed of the dataset
+        catalog: dict | None: Product catalog of the seed, built when None
+    Returns:
+        pd.DataFrame: Rows with every column of OLIST_DTYPES, in that order
+    """
+    return generate_table(start, n_rows, seed, catalog).to_pandas()
+
+
+def iter_synthetic_olist(n_rows: int, seed: int = 42, chunk_rows: int = 1_000_000) -> Iterator:
+    """
+    Yields the synthetic dataset as Arrow tables
+    Args:
+        n_rows: int: Total number of rows
+        seed: int: Seed of the dataset
+        chunk_rows: int: Rows per yielded table
+    Returns:
+        Iterator[pa.Table]: Consecutive tables of at most chunk_rows rows
+    """
+    catalog = _catalog(seed)
+    for start in range(0, n_rows, chunk_rows):
+        yield generate_table(start, min(chunk_rows, n_rows - start), seed, catalog)
+
+
+def _plain_strings(table):
+    import pyarrow as pa
+
+    # the CSV writer has no dictionary support
+    return table.cast(pa.schema([pa.field(f.name, f.type.value_type if pa.types.is_dictionary(f.type) else f.type)
+                                 for f in table.schema]))
+
+
+def write_synthetic_olist(path: str, n_rows: int, seed: int = 42, chunk_rows: int = 1_000_000) -> str:
+    """
+    Writes the synthetic dataset to a CSV, Parquet or Feather file
+    The file is written under a temporary name and renamed when complete.
+    Args:
+        path: str: Destination, the format follows the suffix
+        n_rows: int: Total number of rows
+        seed: int: Seed of the dataset
+        chunk_rows: int: Rows generated and written at a time
+    Returns:
+        str: The written path
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+
+    suffix = Path(path).suffix.lower()
+    if suffix not in (".csv", ".parquet", ".feather"):
+        raise ValueError(f"Unsupported output format: {path}")
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    writer = None
+    try:
+        for table in iter_synthetic_olist(n_rows, seed, chunk_rows):
+            if suffix == ".csv":
+                table = _plain_strings(table)
+            if writer is None:
+                if suffix == ".csv":
+                    writer = pv.CSVWriter(tmp_path, table.schema, write_options=pv.WriteOptions(quoting_style="needed"))
+                elif suffix == ".parquet":
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                else:
+                    writer = pa.ipc.new_file(tmp_path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    Path(tmp_path).replace(path)
+    logging.info(f"Wrote {n_rows} synthetic rows to {path}")
+    return path
+
+
+# Primary key of every table, the rows of the merged export are unique on it.
+TABLE_KEYS : dict[str, list[str]] = {
+    "orders": ["order_id"],
+    "customers": ["customer_id"],
+    "items": ["order_id", "order_item_id"],
+    "payments": ["order_id", "payment_sequential"],
+    "reviews": ["review_id"],
+    "products": ["product_id"],
+    "categories": ["product_category_name"],
+}
+
+
+def write_synthetic_olist_tables(directory: str, scale: float = 1.0, seed: int = 42) -> dict[str, str]:
+    """
+    Writes the synthetic dataset as the separate CSV tables of the public one
+    The merged rows are generated in memory and split back into orders,
+    customers, items, payments, reviews, products and category names, one
+    row per primary key, so joining the tables gives one row per item.
+    Args:
+        directory: str: Destination directory, the files of OLIST_TABLE_FILES
+        scale: float: Size as a multiple of the public dataset's orders
+        seed: int: Seed of the dataset
+    Returns:
+        dict[str, str]: Table name to the written path
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pv
+
+    n_rows = int(round(scale * PUBLIC_ORDERS * ROWS_PER_ORDER))
+    merged = pa.concat_tables(iter_synthetic_olist(n_rows, seed)).to_pandas()
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for name, columns in OLIST_TABLE_COLUMNS.items():
+        table = merged[columns]
+        if name == "categories":
+            # only the rows of products with an English name define the translation
+            table = table.dropna()
+        table = table.drop_duplicates(subset=TABLE_KEYS[name])
+        table = table[table[TABLE_KEYS[name]].notna().all(axis=1)]
+        path = str(Path(directory) / OLIST_TABLE_FILES[name])
+        pv.write_csv(_plain_strings(pa.Table.from_pandas(table, preserve_index=False)), f"{path}.tmp",
+                     write_options=pv.WriteOptions(quoting_style="needed"))
+        Path(f"{path}.tmp").replace(path)
+        paths[name] = path
+    logging.info(f"Wrote {n_rows} synthetic rows as {len(paths)} tables to {directory}")
+    return paths
@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import HashingVectorizer
+
+TEXT_COLUMN : str = "review_comment_message"
+# Text of rows without a review message, hashed like any other message.
+MISSING_TEXT : str = "No Review"
+N_TEXT_FEATURES : int = 2 ** 18
+# Distinct messages hashed per task.
+TEXT_CHUNKSIZE : int = 50_000
+
+
+def _hash_chunk(texts: list[str], n_features: int) -> sp.csr_matrix:
+    vectorizer = HashingVectorizer(n_features=n_features, dtype=np.float64)
+    return vectorizer.transform(texts)
+
+
+def hash_texts(texts, n_features: int = N_TEXT_FEATURES, n_jobs: int | None = None,
+               chunksize: int = TEXT_CHUNKSIZE) -> sp.csr_matrix:
+    """
+    Hashes texts into a sparse bag-of-words matrix
+    The hashing vectorizer is stateless, so there is no vocabulary to fit
+    and chunks are hashed independently. Every distinct text is hashed once
+    and its row repeated, which matters for reviews, where most rows are
+    missing or repeat a few short messages; chunks of the distinct texts
+    are tokenized in spawned processes, since tokenizing holds the GIL.
+    Args:
+        texts: pd.Series | list[str]: Texts, missing values become MISSING_TEXT
+        n_features: int: Hashed columns
+        n_jobs: int | None: Processes, defaults to the number of cores;
+            a single chunk is hashed in process
+        chunksize: int: Distinct texts per task
+    Returns:
+        sp.csr_matrix: (len(texts), n_features) l2 normalized term counts
+    """
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object).fillna(MISSING_TEXT))
+    uniques = list(uniques)
+    chunks = [uniques[start:start + chunksize] for start in range(0, len(uniques), chunksize)] or [[]]
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(chunks))
+    if n_jobs == 1:
+        parts = [_hash_chunk(chunk, n_features) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            parts = list(pool.map(_hash_chunk, chunks, repeat(n_features)))
+    return sp.vstack(parts, format="csr")[codes]
+
+
+class HashedTextFeatures(BaseEstimator, TransformerMixin):
+    """
+    Numeric columns followed by the hashed text of one column, as CSR
+    Used as the first step of a Pipeline, so a model trained on the sparse
+    matrix predicts from DataFrames holding the raw text. The numeric
+    columns are expected to be preprocessed already.
+    """
+    def __init__(self, columns: list[str], text_column: str = TEXT_COLUMN,
+                 n_features: int = N_TEXT_FEATURES, n_jobs: int | None = None):
+        """
+        Constructor for HashedTextFeatures
+        Args:
+            columns: list[str]: Numeric feature columns, in model order
+            text_column: str: Column of the texts
+            n_features: int: Hashed text columns
+            n_jobs: int | None: Processes hashing the texts
+        """
+        self.columns = columns
+        self.text_column = text_column
+        self.n_features = n_features
+        self.n_jobs = n_jobs
+
+    def fit(self, X: pd.DataFrame, y=None) -> "HashedTextFeatures":
+        return self
+
+    def transform(self, X: pd.DataFrame) -> sp.csr_matrix:
+        """
+        Builds the feature matrix without densifying the text
+        Args:
+            X: pd.DataFrame: Rows holding columns and text_column
+        Returns:
+            sp.csr_matrix: (rows, len(columns) + n_features) float64 matrix
+        """
+        numeric = sp.csr_matrix(X[self.columns].to_numpy(dtype=np.float64))
+        text = hash_texts(X[self.text_column], self.n_features, self.n_jobs)
+        return sp.hstack([numeric, text], format="csr")
@@ -5,11 +5,104 @@ from typing_extensions import Annotated
 import pandas as pd
 from zenml import step
 
-from src.data_cleaning import DataPreProcessingStrategy , DataDivideStrategy , DataCleaning , DataStrategy
+from materializers.arrow_materializer import ArrowMaterializer
+from src.data_cleaning import DataPreProcessingStrategy , PartitionedPreProcessingStrategy , IndexSplitStrategy , DataCleaning , DataStrategy , load_fill_values , save_fill_values
+from src.dataset_cache import DatasetCache
+from src.schema import OLIST_SCHEMA , ColumnSchema
+from .config import CleanConfig , IngestConfig
+from .instrumentation import instrumented
+from .ingest_data import IngestData
 
 
-@step
-def clean_df(data: pd.DataFrame) ->  Tuple[
+def ingest_schema(config: CleanConfig) -> ColumnSchema:
+    """
+    Returns the schema raw data is read with, time splits also need the time column
+    Args:
+        config: CleanConfig: Splitting configuration
+    Returns:
+        ColumnSchema: Schema to pass to IngestData
+    """
+    if config.split != "time":
+        return OLIST_SCHEMA
+    return ColumnSchema(usecols=OLIST_SCHEMA.usecols + [config.time_column])
+
+
+def read_raw_data(data_path: str, config: CleanConfig, ingest_config: IngestConfig) -> pd.DataFrame:
+    """
+    Reads the raw data the way ingest_df would, plus the time column of time splits
+    Args:
+        data_path: str: Path to the raw data
+        config: CleanConfig: Splitting configuration
+        ingest_config: IngestConfig: Parser engine and whether to apply the Olist schema
+    Returns:
+        pd.DataFrame: Raw data
+    """
+    schema = ingest_schema(config) if ingest_config.use_schema else None
+    return IngestData(data_path, schema=schema, engine=ingest_config.engine).get_data()
+
+
+def preprocessing_strategy(config: CleanConfig) -> DataPreProcessingStrategy:
+    """
+    Returns the exact single-frame preprocessing, or the partitioned one
+    with approximate medians when config.preprocess_partitions > 1; with
+    config.compact either writes one contiguous float32 matrix
+    Args:
+        config: CleanConfig: Preprocessing configuration
+    Returns:
+        DataPreProcessingStrategy: Strategy fitting the imputation values
+    """
+    if config.preprocess_partitions > 1:
+        return PartitionedPreProcessingStrategy(
+            n_partitions=config.preprocess_partitions,
+            error_bound=config.median_error_bound,
+            compact=config.compact,
+        )
+    return DataPreProcessingStrategy(compact=config.compact)
+
+
+def split_data(data: pd.DataFrame, config: CleanConfig) -> tuple:
+    """
+    Runs the preprocessing and splitting strategies on the raw data
+    The fitted imputation values are saved to config.fill_values_path so
+    that serving can reuse them without refitting. The processed rows are
+    copied once, in split order, and the returned splits are views of it.
+    Args:
+        data: pd.DataFrame: Dataframe containing the raw data
+        config: CleanConfig: Splitting configuration
+    Returns:
+        tuple: X_train, X_test, y_train, y_test
+    """
+    time_values = None
+    if config.split == "time":
+        if config.time_column not in data.columns:
+            raise ValueError(f"Time based splitting needs the {config.time_column} column")
+        time_values = data[config.time_column]
+
+    process_strategy : DataStrategy = preprocessing_strategy(config)
+    data_cleaning : DataStrategy = DataCleaning(data , process_strategy)
+    processed_data = data_cleaning.handle_data()
+    save_fill_values(config.fill_values_path, process_strategy.fitted_fill_values)
+
+    divide_strategy : DataStrategy = IndexSplitStrategy(
+        "time" if config.split == "time" else "holdout",
+        test_size=config.test_size,
+        n_splits=1,
+        random_state=config.random_state,
+        time_values=time_values,
+    )
+    split = DataCleaning(processed_data , divide_strategy).handle_data()
+    X_train , y_train = split.train()
+    X_test , y_test = split.test()
+    return X_train , X_test , y_train , y_test
+
+
+@step(output_materializers=ArrowMaterializer)
+@instrumented
+def clean_df(data: pd.DataFrame | None = None,
+             data_path: str | None = None,
+             config: CleanConfig = CleanConfig(),
+             ingest_config: IngestConfig = IngestConfig()
+             ) ->  Tuple[
     Annotated[pd.DataFrame, 'X_train'],
     Annotated[pd.DataFrame, 'X_test'],
     Annotated[pd.Series, 'y_train'],
@@ -17,8 +110,14 @@ def clean_df(data: pd.DataFrame) ->  Tuple[
 ]:
     """
     Cleans the data by removing missing values
+    When data_path is given the splits are looked up in the dataset cache,
+    keyed by the file fingerprint and the ingestion and cleaning
+    configuration, and the raw data is only read on a miss.
     Args:
-        data: pd.DataFrame: Dataframe containing the raw data
+        data: pd.DataFrame | None: Dataframe containing the raw data
+        data_path: str | None: Path the raw data was read from
+        config: CleanConfig: Splitting and cache configuration
+        ingest_config: IngestConfig: How data_path is read when data is None
     Returns:
         pd.DataFrame: X_train: Training data
         pd.DataFrame: X_test: Testing data
@@ -26,15 +125,41 @@ def clean_df(data: pd.DataFrame) ->  Tuple[
         pd.Series: y_test: Testing labels
     """
     try:
-        process_strategy : DataStrategy = DataPreProcessingStrategy()
-        data_cleaning : DataStrategy = DataCleaning(data , process_strategy)
-        processed_data = data_cleaning.handle_data()
+        if data is None and data_path is None:
+            raise ValueError("Either data or data_path must be provided")
+        if data_path is None or not config.use_cache:
+            if data is None:
+                data = read_raw_data(data_path, config, ingest_config)
+            X_train , X_test , y_train , y_test = split_data(data, config)
+            logging.info("Data Cleaning Done")
+            return X_train , X_test , y_train , y_test
 
-        divide_strategy : DataStrategy = DataDivideStrategy()
-        data_cleaning = DataCleaning(processed_data , divide_strategy)
+        cache = DatasetCache(config.cache_dir, config.cache_max_bytes)
+        key = cache.key(data_path, {
+            "preprocessing": type(preprocessing_strategy(config)).__name__,
+            "median_error_bound": config.median_error_bound if config.preprocess_partitions > 1 else None,
+            "compact": config.compact,
+            # holdout rows follow train_test_split, unlike entries cached before the key named it
+            "divide": f"{IndexSplitStrategy.__name__}:train_test_split",
+            "split": config.split,
+            "time_column": config.time_column if config.split == "time" else None,
+            "test_size": config.test_size,
+            "random_state": config.random_state,
+            "schema": ingest_schema(config).selected_dtypes() if ingest_config.use_schema else None,
+            "engine": ingest_config.engine,
+        })
+        cached = cache.get(key)
+        if cached is not None:
+            logging.info(f"Dataset cache hit for {data_path}: {cache.stats()}")
+            save_fill_values(config.fill_values_path, cache.metadata(key)["fill_values"])
+            return cached
 
-        X_train , X_test , y_train , y_test = data_cleaning.handle_data()
-        logging.info("Data Cleaning Done")
+        if data is None:
+            data = read_raw_data(data_path, config, ingest_config)
+        X_train , X_test , y_train , y_test = split_data(data, config)
+        cache.put(key, X_train, X_test, y_train, y_test,
+                  metadata={"fill_values": load_fill_values(config.fill_values_path)})
+        logging.info(f"Data Cleaning Done, cached under {key[:12]}: {cache.stats()}")
         return X_train , X_test , y_train , y_test
     except Exception as e:
         logging.error(f"Error in cleaning data: {e}")
@@ -1,7 +1,103 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class ModelNameConfig(BaseModel):
     """
     Model name configuration
     """
-    model_name_field: str = 'LinearRegressionModel'
\ No newline at end of file
+    # model_name_field predates the config, let it share pydantic's model_ prefix
+    model_config = ConfigDict(protected_namespaces=())
+
+    model_name_field: str = 'LinearRegressionModel'
+    incremental: bool = False
+    state_path: str = '.cache/linear_regression_state.npz'
+    watermark_column: str = 'order_purchase_timestamp'
+    hyperparams: dict = {}
+    sweep: bool = False
+    search_space: dict[str, dict[str, list]] = {}
+    validation_size: float = 0.2
+    n_jobs: int | None = None
+    compact_model_path: str | None = '.cache/model.olrm'
+    fill_values_path: str = '.cache/fill_values.json'
+    cv_folds: int = 0
+    drift_reference_path: str | None = '.cache/drift_reference.json'
+
+
+class IngestConfig(BaseModel):
+    """
+    Ingestion configuration, n_jobs are the threads reading the Olist tables
+    """
+    engine: str = 'c'
+    use_schema: bool = True
+    # keep only the model features and the target, for runs that need no other column
+    prune_columns: bool = False
+    n_jobs: int | None = None
+
+
+class CleanConfig(BaseModel):
+    """
+    Cleaning, splitting and dataset cache configuration
+    """
+    test_size: float = 0.2
+    random_state: int = 42
+    use_cache: bool = True
+    cache_dir: str = '.cache/datasets'
+    cache_max_bytes: int = 10 * 1024 ** 3
+    fill_values_path: str = '.cache/fill_values.json'
+    split: str = 'holdout'
+    time_column: str = 'order_purchase_timestamp'
+    preprocess_partitions: int = 1
+    median_error_bound: float = 0.001
+    compact: bool = False
+
+
+class FeatureStoreConfig(BaseModel):
+    """
+    Online feature store configuration, rows are keyed by key_column
+    The store is only updated when enabled, and lives in path, or in the
+    feature_store directory of the local artifact store when path is None.
+    """
+    enabled: bool = False
+    path: str | None = None
+    key_column: str = 'customer_id'
+    fill_values_path: str = '.cache/fill_values.json'
+    initial_capacity: int = 1024
+
+
+class TextFeatureConfig(BaseModel):
+    """
+    Hashed text feature configuration, the split matches CleanConfig's
+    """
+    text_column: str = 'review_comment_message'
+    n_features: int = 2 ** 18
+    n_jobs: int | None = None
+    test_size: float = 0.2
+    random_state: int = 42
+    fill_values_path: str = '.cache/fill_values.json'
+
+
+class EvalConfig(BaseModel):
+    """
+    Evaluation configuration
+    """
+    chunksize: int = 1_000_000
+    segment_column: str | None = None
+    n_resamples: int = 0
+    confidence: float = 0.95
+
+
+class DeploymentTriggerConfig(BaseModel):
+    """
+    Parameters for deployment trigger.
+    The performance checks compare the candidate with the deployed model
+    on the same sample of test rows, see src/deployment_gate.py.
+    """
+    min_accuracy: float = 0
+    max_accuracy_drop: float = 0.01
+    sample_rows: int = 1000
+    single_row_requests: int = 1000
+    max_slowdown: float = 1.2
+    latency_slack_ms: float = 0.05
+    max_memory_growth: float = 1.5
+    max_p99_ms: float | None = None
+    memory_slack_mb: float = 16.0
+    max_predict_rss_mb: float | None = None
@@ -0,0 +1,111 @@
+import logging
+import sys
+
+import pandas as pd
+from zenml import step
+from sklearn.base import BaseEstimator
+
+from .config import DeploymentTriggerConfig
+from .instrumentation import instrumented
+
+
+def deployed_model():
+    """
+    Loads the model of the running MLflow deployment, if any.
+    Returns:
+        RegressorMixin | None: The deployed model, None when nothing is deployed.
+    """
+    from zenml.integrations.mlflow.model_deployers.mlflow_model_deployer import MLFlowModelDeployer
+    from src.batch_scoring import load_model
+
+    model_deployer = MLFlowModelDeployer.get_active_model_deployer()
+    services = model_deployer.find_model_server(
+        pipeline_name="continuous_deployment_pipeline",
+        pipeline_step_name="mlflow_model_deployer_step",
+        model_name="model",
+    )
+    if not services:
+        return None
+    return load_model(services[0].config.model_uri)
+
+
+def log_gate_decision(decision) -> None:
+    """
+    Logs the gate's profiles and failure reasons as MLflow metrics and tags
+    and as ZenML step metadata
+    Like the step profiles, the MLflow part is skipped when the step runs
+    without an experiment tracker and the metadata outside of a pipeline.
+    Args:
+        decision: GateDecision: Outcome of the deployment gate
+    """
+    metrics = decision.metrics()
+    reasons = "; ".join(decision.reasons)
+    # only steps with an experiment tracker have imported mlflow and started a run
+    mlflow = sys.modules.get("mlflow")
+    if mlflow is not None and mlflow.active_run() is not None:
+        mlflow.log_metrics({f"deployment_gate/{key}": float(value) for key, value in metrics.items()})
+        mlflow.set_tags({"deployment_gate.deploy": str(decision.deploy).lower(),
+                         "deployment_gate.reasons": reasons or "none"})
+
+    from zenml import get_step_context, log_step_metadata
+
+    try:
+        get_step_context()
+    except RuntimeError:
+        return
+    log_step_metadata(metadata={"deployment_gate": {"deploy": decision.deploy,
+                                                    "reasons": decision.reasons,
+                                                    **metrics}})
+
+
+@step
+@instrumented
+def trigger_deployment( accuracy : float ,
+                        model : BaseEstimator ,
+                        X_test : pd.DataFrame ,
+                        y_test : pd.Series ,
+                        config: DeploymentTriggerConfig) -> bool:
+    """
+    Step to check the model accuracy and serving performance before deployment.
+    The candidate and the deployed model are loaded in process and replay
+    the same sample of test rows, one row per request and as one batch.
+    Args:
+        accuracy: Model accuracy.
+        model: Candidate model.
+        X_test: Test features, the request sample is drawn from them.
+        y_test: Test labels, the deployed model is scored on them.
+        config: Deployment trigger configuration.
+    Returns:
+        bool: True if the model passes every accuracy and performance check.
+    """
+    from src.deployment_gate import gate_decision , profile_models , request_sample , score_r2
+
+    sample = request_sample(X_test, config.sample_rows)
+    baseline , baseline_accuracy = None , None
+    try:
+        deployed = deployed_model()
+        if deployed is not None:
+            candidate , baseline = profile_models([model, deployed], sample, config.single_row_requests)
+            baseline_accuracy = score_r2(deployed, X_test, y_test)
+    except Exception as e:
+        # e.g. the deployed model was trained on other columns
+        logging.warning(f"Deployed model not compared: {e}")
+        baseline = None
+    if baseline is None:
+        candidate , = profile_models([model], sample, config.single_row_requests)
+    decision = gate_decision(
+        accuracy, candidate, baseline_accuracy, baseline,
+        min_accuracy=config.min_accuracy,
+        max_accuracy_drop=config.max_accuracy_drop,
+        max_slowdown=config.max_slowdown,
+        latency_slack_ms=config.latency_slack_ms,
+        max_memory_growth=config.max_memory_growth,
+        max_p99_ms=config.max_p99_ms,
+        memory_slack_mb=config.memory_slack_mb,
+        max_predict_rss_mb=config.max_predict_rss_mb,
+    )
+    try:
+        log_gate_decision(decision)
+    except Exception as e:
+        logging.warning(f"Could not log the deployment gate decision: {e}")
+    return decision.deploy
@@ -4,18 +4,20 @@ from typing_extensions import Annotated
 
 import pandas as pd
 from zenml import step
-from sklearn.base import RegressorMixin
-import mlflow
-from zenml.client import Client
+from sklearn.base import BaseEstimator
 
-from src.evaluation import MSE , R2 , RMSE
+from .config import EvalConfig
+from .instrumentation import instrumented
+from .ingest_data import load_column
 
-tracker : Client = Client().active_stack.experiment_tracker
-
-@step(experiment_tracker=tracker.name)
-def eval_model(model: RegressorMixin, 
+@step
+@instrumented
+def eval_model(model: BaseEstimator, 
                X_test: pd.DataFrame | pd.Series ,
-               y_test: pd.DataFrame | pd.Series
+               y_test: pd.DataFrame | pd.Series,
+               config: EvalConfig = EvalConfig(),
+               data: pd.DataFrame | None = None,
+               data_path: str | None = None
                ) -> Tuple[
                 Annotated[float, 'R2 Score'],
                 Annotated[float, 'RMSE']
@@ -23,23 +25,41 @@ def eval_model(model: RegressorMixin,
     """
     Evaluates the model
     Args:
-        model: RegressorMixin: Model to evaluate
+        model: BaseEstimator: Model to evaluate
         X_test: pd.DataFrame: Test features
         y_test: pd.DataFrame: Test labels
+        config: EvalConfig: Rows predicted and scored per batch, and the
+            optional segment column and bootstrap settings
+        data: pd.DataFrame | None: Raw data the splits were made from, holding the segment column
+        data_path: str | None: Path to read the segment column from when data is None
     Returns:
         Tuple[float, float]: R2 score and RMSE
     """
+    # deferred so that importing the pipelines stays cheap
+    import mlflow
+    from src.evaluation import SegmentedEvaluation, evaluate_stream
+    from src.model_dev import iter_xy_chunks
+
     try:
-        predictions = model.predict(X_test)
-        mse = MSE().calculate_scores(y_test, predictions)
-        r2 = R2().calculate_scores(y_test, predictions)
-        rmse = RMSE().calculate_scores(y_test, predictions)
+        # predict and score batch by batch, only the segment metrics need every prediction
+        accumulator = evaluate_stream(model, iter_xy_chunks(X_test, y_test, config.chunksize))
+        scores = accumulator.scores()
+        logging.info(f"Evaluation scores: {scores}")
+
+        if config.segment_column:
+            segments = load_column(config.segment_column, X_test.index, data=data, data_path=data_path)
+            evaluation = SegmentedEvaluation(segments, config.n_resamples, config.confidence)
+            segment_scores = evaluation.calculate_scores(y_test, model.predict(X_test))
+            scores.update({
+                f"{config.segment_column}/{segment.replace(' ', '_')}/{metric}": float(value)
+                for segment, row in segment_scores.iterrows()
+                for metric, value in row.items()
+                if pd.notna(value)
+            })
 
-        mlflow.log_metric("MSE", mse)
-        mlflow.log_metric("R2", r2)
-        mlflow.log_metric("RMSE", rmse)
+        mlflow.log_metrics(scores)
 
-        return r2 , rmse
+        return scores["R2"] , scores["RMSE"]
     except Exception as e:
         logging.error(f"Error in evaluating model: {e}")
         raise e
@@ -0,0 +1,77 @@
+import logging
+import os
+from typing_extensions import Annotated
+
+import pandas as pd
+from zenml import step
+
+from src.data_cleaning import DataCleaning , DataPreProcessingStrategy , load_fill_values
+from src.feature_store import FeatureStore , build_feature_rows
+from src.schema import FEATURE_COLUMNS , ColumnSchema
+from .config import FeatureStoreConfig
+from .instrumentation import instrumented
+from .ingest_data import IngestData
+
+
+def feature_store_path(config: FeatureStoreConfig) -> str:
+    """
+    Returns where the feature store lives
+    Args:
+        config: FeatureStoreConfig: Store configuration
+    Returns:
+        str: config.path, or the feature_store directory of the active
+            artifact store when it is None
+    Raises:
+        ValueError: If path is None and the artifact store is not local, the
+            store is memory-mapped and needs a local directory
+    """
+    if config.path:
+        return config.path
+    from zenml.client import Client
+
+    artifact_store = Client().active_stack.artifact_store
+    if not artifact_store.config.is_local:
+        raise ValueError(f"The artifact store {artifact_store.path} is not local, set the feature store path")
+    return os.path.join(artifact_store.path, "feature_store")
+
+
+@step
+@instrumented
+def update_feature_store(data: pd.DataFrame | None = None,
+                         data_path: str | None = None,
+                         config: FeatureStoreConfig = FeatureStoreConfig()
+                         ) -> Annotated[int, 'feature_store_rows']:
+    """
+    Upserts the preprocessed features of every ID into the online feature store
+    Rows are imputed with the values clean_df fitted on the training data,
+    so the stored features are the ones the model was trained on; the last
+    row of an ID wins. Only the IDs in data are written, the rest of the
+    store is kept. The pipelines only run it when config.enabled.
+    Args:
+        data: pd.DataFrame | None: Raw data holding config.key_column
+        data_path: str | None: Path to read the raw data from when data is None
+        config: FeatureStoreConfig: Store path, key column and imputation values
+    Returns:
+        int: Rows in the store after the upsert
+    """
+    try:
+        if data is None and data_path is None:
+            raise ValueError("Either data or data_path must be provided")
+        if data is None:
+            schema = ColumnSchema(usecols=FEATURE_COLUMNS + [config.key_column])
+            data = IngestData(data_path, schema=schema).get_data()
+        if config.key_column not in data.columns:
+            raise ValueError(f"The feature store needs the {config.key_column} column")
+        fill_values = load_fill_values(config.fill_values_path)
+        if fill_values is None:
+            logging.warning(f"No imputation values at {config.fill_values_path}, using the medians of the data")
+        processed = DataCleaning(data, DataPreProcessingStrategy(fill_values)).handle_data()
+        ids, features = build_feature_rows(data, config.key_column, processed.reindex(columns=FEATURE_COLUMNS))
+        del processed
+        store = FeatureStore.open_or_create(feature_store_path(config), FEATURE_COLUMNS,
+                                            capacity=config.initial_capacity)
+        store.upsert(ids, features)
+        return len(store)
+    except Exception as e:
+        logging.error(f"Error in updating feature store: {e}")
+        raise e
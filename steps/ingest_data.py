@@ -1,35 +1,272 @@
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
 
 import pandas as pd
 from zenml import step
 
+from materializers.arrow_materializer import ArrowMaterializer
+from src.olist_tables import join_olist_tables
+from src.schema import ColumnSchema, OLIST_SCHEMA, OLIST_TABLE_COLUMNS, OLIST_TABLE_FILES
+from .config import IngestConfig
+from .instrumentation import instrumented
+
+CSV_SUFFIXES : tuple[str, ...] = (".csv", ".gz", ".bz2", ".zip", ".xz")
+PARQUET_SUFFIXES : tuple[str, ...] = (".parquet", ".pq")
+FEATHER_SUFFIXES : tuple[str, ...] = (".feather", ".arrow", ".ipc")
+JSONL_SUFFIXES : tuple[str, ...] = (".jsonl", ".ndjson")
+
+
 class IngestData():
     """
-    Ingests data from a given path (CSV file)
+    Ingests data from a given path (CSV, Parquet, Feather or JSON lines file)
     """
-    def __init__(self , data_path: str):
+    def __init__(self , data_path: str,
+                 schema: ColumnSchema | None = None,
+                 engine: str = "c",
+                 chunksize: int | None = None):
         """
         Constructor for IngestData
         Args:
-            data_path: str: Path to the CSV file
+            data_path: str: Path to the CSV, Parquet, Feather or JSON lines file
+            schema: ColumnSchema | None: Declared dtypes and columns to read,
+                None keeps the inferred dtypes and reads every column
+            engine: str: CSV parser, "c", "python" or "pyarrow"
+            chunksize: int | None: Rows per batch yielded by iter_chunks
         """
-        self.data_path = data_path  
-    
-    def get_data(self):
+        self.data_path = data_path
+        self.schema = schema
+        self.engine = engine
+        self.chunksize = chunksize
+
+    @property
+    def file_format(self) -> str:
+        """
+        Detects the file format from the file suffix
+        Returns:
+            str: "csv", "parquet", "feather" or "jsonl"
+        """
+        suffix = Path(self.data_path).suffix.lower()
+        if suffix in PARQUET_SUFFIXES:
+            return "parquet"
+        if suffix in FEATHER_SUFFIXES:
+            return "feather"
+        if suffix in JSONL_SUFFIXES:
+            return "jsonl"
+        if suffix in CSV_SUFFIXES:
+            return "csv"
+        raise ValueError(f"Unsupported file format: {self.data_path}")
+
+    def _csv_kwargs(self) -> dict:
+        if self.schema is None:
+            return {"engine": self.engine}
+        return {
+            "engine": self.engine,
+            "usecols": self.schema.usecols,
+            "dtype": self.schema.selected_dtypes(),
+        }
+
+    def _columns(self) -> list[str] | None:
+        return self.schema.usecols if self.schema is not None else None
+
+    def _apply_schema(self, data: pd.DataFrame) -> pd.DataFrame:
+        if self.schema is None:
+            return data
+        # the C parser keeps file order for usecols, pin it so every engine agrees
+        columns = self._columns()
+        if columns is not None and list(data.columns) != columns:
+            data = data[columns]
+        dtypes = self.schema.selected_dtypes(list(data.columns))
+        return data.astype(dtypes, copy=False)
+
+    def get_data(self) -> pd.DataFrame:
         """
         Reads the data from the given path
         Returns:
             pd.DataFrame: Dataframe containing the data
         """
         logging.info(f"Reading data from {self.data_path}")
-        return pd.read_csv(self.data_path)
-    
-@step
-def ingest_df(data_path: str|None = None) -> pd.DataFrame | None:
+        file_format = self.file_format
+        if file_format == "parquet":
+            return self._apply_schema(pd.read_parquet(self.data_path, columns=self._columns()))
+        if file_format == "feather":
+            return self._apply_schema(pd.read_feather(self.data_path, columns=self._columns()))
+        if file_format == "jsonl":
+            return self._apply_schema(pd.read_json(self.data_path, lines=True))
+        return self._apply_schema(pd.read_csv(self.data_path, **self._csv_kwargs()))
+
+    def iter_chunks(self, chunksize: int | None = None) -> Iterator[pd.DataFrame]:
+        """
+        Reads the data in bounded-memory batches
+        Args:
+            chunksize: int | None: Rows per batch, defaults to the constructor value
+        Yields:
+            pd.DataFrame: Consecutive batches of at most chunksize rows
+        """
+        chunksize = chunksize or self.chunksize
+        if not chunksize:
+            raise ValueError("chunksize must be set to read the data in chunks")
+        logging.info(f"Reading data from {self.data_path} in chunks of {chunksize} rows")
+        file_format = self.file_format
+        if file_format == "parquet":
+            yield from self._iter_parquet(chunksize)
+        elif file_format == "feather":
+            yield from self._iter_feather(chunksize)
+        elif file_format == "jsonl":
+            with pd.read_json(self.data_path, lines=True, chunksize=chunksize) as reader:
+                for chunk in reader:
+                    yield self._apply_schema(chunk)
+        elif self.engine == "pyarrow":
+            yield from self._iter_arrow_csv(chunksize)
+        else:
+            with pd.read_csv(self.data_path, chunksize=chunksize, **self._csv_kwargs()) as reader:
+                for chunk in reader:
+                    yield self._apply_schema(chunk)
+
+    def _iter_parquet(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(self.data_path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=self._columns()):
+            yield self._apply_schema(batch.to_pandas())
+
+    def _iter_feather(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        import pyarrow as pa
+
+        with pa.memory_map(self.data_path, "r") as source:
+            reader = pa.ipc.open_file(source)
+            columns = self._columns()
+            batches = (
+                reader.get_batch(i).select(columns) if columns is not None else reader.get_batch(i)
+                for i in range(reader.num_record_batches)
+            )
+            yield from self._rebatch(batches, chunksize)
+
+    def _iter_arrow_csv(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        import pyarrow.csv as pv
+
+        convert_options = None
+        if self.schema is not None:
+            convert_options = pv.ConvertOptions(
+                include_columns=self.schema.usecols,
+                column_types=self.schema.arrow_types(),
+            )
+        yield from self._rebatch(pv.open_csv(self.data_path, convert_options=convert_options), chunksize)
+
+    def _rebatch(self, batches, chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Regroups arrow record batches of arbitrary size into chunksize rows
+        Args:
+            batches: Iterable[pa.RecordBatch]: Batches as produced by the reader
+            chunksize: int: Rows per yielded DataFrame
+        Yields:
+            pd.DataFrame: Batches of exactly chunksize rows, except the last one
+        """
+        import pyarrow as pa
+
+        pending, pending_rows = [], 0
+        for batch in batches:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows < chunksize:
+                continue
+            table = pa.Table.from_batches(pending)
+            offset = 0
+            while pending_rows - offset >= chunksize:
+                yield self._apply_schema(table.slice(offset, chunksize).to_pandas())
+                offset += chunksize
+            pending = table.slice(offset).to_batches()
+            pending_rows -= offset
+        if pending_rows:
+            yield self._apply_schema(pa.Table.from_batches(pending).to_pandas())
+
+def load_column(column: str,
+                index: pd.Index | None = None,
+                data: pd.DataFrame | None = None,
+                data_path: str | None = None
+                ) -> pd.Series:
+    """
+    Reads a single raw column, e.g. customer_state, for the given rows
+    The cleaning and splitting steps keep the row numbers of the raw data
+    as index, so rows of X_train or X_test can be matched back to columns
+    dropped by the preprocessing.
+    Args:
+        column: str: Column to read
+        index: pd.Index | None: Row numbers to return, e.g. X_test.index, None for every row
+        data: pd.DataFrame | None: Raw data the splits were made from
+        data_path: str | None: Path to read the column from when data is None
+    Returns:
+        pd.Series: The column values aligned with index
+    Raises:
+        ValueError: If neither data nor data_path is given
+    """
+    if data is None and data_path is None:
+        raise ValueError("Either data or data_path must be provided")
+    if data is None:
+        data = IngestData(data_path, schema=ColumnSchema(usecols=[column])).get_data()
+    values = data[column]
+    return values if index is None else values.loc[index]
+
+
+def read_olist_tables(directory: str, n_jobs: int | None = None, engine: str = "c") -> dict[str, pd.DataFrame]:
+    """
+    Reads the tables of the public Olist dataset concurrently with typed schemas
+    The CSV parsers release the GIL while tokenizing, so the tables are
+    read on threads.
+    Args:
+        directory: str: Directory holding the files of OLIST_TABLE_FILES
+        n_jobs: int | None: Reader threads, defaults to one per table
+        engine: str: CSV parser, "c" or "pyarrow"
+    Returns:
+        dict[str, pd.DataFrame]: Table name to its columns of OLIST_TABLE_COLUMNS
+    """
+    def read(name: str) -> pd.DataFrame:
+        schema = ColumnSchema(usecols=OLIST_TABLE_COLUMNS[name])
+        return IngestData(os.path.join(directory, OLIST_TABLE_FILES[name]), schema=schema, engine=engine).get_data()
+
+    names = list(OLIST_TABLE_FILES)
+    with ThreadPoolExecutor(max_workers=n_jobs or len(names), thread_name_prefix="olist-read") as pool:
+        return dict(zip(names, pool.map(read, names)))
+
+
+@step(output_materializers=ArrowMaterializer)
+@instrumented
+def ingest_olist_tables(tables_dir: str,
+                        config: IngestConfig = IngestConfig()
+                        ) -> pd.DataFrame:
+    """
+    Reads the separate Olist tables and joins them into the merged frame
+    Args:
+        tables_dir: str: Directory of the public dataset's CSV tables
+        config: IngestConfig: Parser engine and reader threads
+    Returns:
+        pd.DataFrame: One row per order item with the columns of OLIST_DTYPES
+    """
+    try:
+        return join_olist_tables(read_olist_tables(tables_dir, config.n_jobs, config.engine))
+    except FileNotFoundError as e:
+        logging.error(f"Olist table not found in {tables_dir}: {e}")
+        raise e
+    except Exception as e:
+        logging.error(f"Error in joining the Olist tables: {e}")
+        raise e
+
+
+@step(output_materializers=ArrowMaterializer)
+@instrumented
+def ingest_df(data_path: str|None = None,
+              config: IngestConfig = IngestConfig()
+              ) -> pd.DataFrame | None:
     """
-    Ingests data from a given path (CSV file)
+    Ingests data from a given path (CSV, Parquet or Feather file)
+    Every column is read, typed by the Olist schema, since the later steps
+    also use the ids, timestamps and review text; config.prune_columns
+    reads only the model features and the target.
     Args:
-        data_path: str: Path to the CSV file
+        data_path: str: Path to the data file
+        config: IngestConfig: Parser engine, whether to apply the Olist schema and to prune the columns
     Returns:
         pd.DataFrame: Dataframe containing the data
     Raises:
@@ -38,10 +275,13 @@ def ingest_df(data_path: str|None = None) -> pd.DataFrame | None:
     if not data_path:
         data_path = "data/olist_customers_dataset.csv"
     try:
-        return IngestData(data_path).get_data()
+        schema = None
+        if config.use_schema:
+            schema = OLIST_SCHEMA if config.prune_columns else ColumnSchema(usecols=None)
+        return IngestData(data_path, schema=schema, engine=config.engine).get_data()
     except FileNotFoundError:
         logging.error(f"File not found at {data_path}")
         raise FileNotFoundError(f"File not found at {data_path}")
     except Exception as e:
         logging.error(f"Error in reading file: {e}")
-        raise e
\ No newline at end of file
+        raise e
@@ -0,0 +1,67 @@
+import functools
+import logging
+import os
+import sys
+
+from src.profiling import Profiler, StepProfile
+
+# Set to "0" to run the steps without measuring them.
+INSTRUMENTATION_ENV : str = "STEP_INSTRUMENTATION"
+
+
+def instrumentation_enabled() -> bool:
+    return os.environ.get(INSTRUMENTATION_ENV, "1") != "0"
+
+
+def log_step_profile(step_name: str, profile: StepProfile) -> None:
+    """
+    Logs a step profile as MLflow metrics and ZenML step metadata
+    The metrics go into the active MLflow run in a single call and are
+    skipped when the step runs without an experiment tracker. The metadata
+    is skipped when the step function is called outside of a pipeline.
+    Args:
+        step_name: str: Name of the step, used as metric prefix
+        profile: StepProfile: Measured resource usage
+    """
+    values = profile.as_dict()
+    logging.info(f"{step_name}: " + ", ".join(f"{key}={round(value, 3)}" for key, value in values.items()))
+    # only steps with an experiment tracker have imported mlflow and started a run
+    mlflow = sys.modules.get("mlflow")
+    if mlflow is not None and mlflow.active_run() is not None:
+        mlflow.log_metrics({f"{step_name}/{key}": float(value) for key, value in values.items()})
+
+    from zenml import get_step_context, log_step_metadata
+
+    try:
+        get_step_context()
+    except RuntimeError:
+        return
+    log_step_metadata(metadata={"performance": values})
+
+
+def instrumented(func):
+    """
+    Measures a step function and logs its profile
+    Apply it below @step so that ZenML still sees the original signature.
+    Records wall time, CPU time, peak RSS, the rows and bytes of the
+    DataFrame, Series and array inputs and outputs, and rows per second.
+    Measuring can be switched off with STEP_INSTRUMENTATION=0.
+    Args:
+        func: Callable: Step function
+    Returns:
+        Callable: The wrapped step function
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not instrumentation_enabled():
+            return func(*args, **kwargs)
+        with Profiler() as profiler:
+            outputs = func(*args, **kwargs)
+        profile = profiler.record_data((list(args) + list(kwargs.values())), outputs)
+        try:
+            log_step_profile(func.__name__, profile)
+        except Exception as e:
+            logging.warning(f"Could not log the profile of {func.__name__}: {e}")
+        return outputs
+
+    return wrapper
@@ -2,41 +2,153 @@ import logging
 
 import pandas as pd
 from zenml import step
-from sklearn.base import RegressorMixin
-import mlflow
-from zenml.client import Client
+from sklearn.base import BaseEstimator
 
-from src.model_dev import LinearRegressionModel
 from .config import ModelNameConfig
+from .ingest_data import load_column
+from .instrumentation import instrumented
 
-tracker : Client = Client().active_stack.experiment_tracker
 
-@step(experiment_tracker=tracker.name)
+def export_compact_model(model: BaseEstimator, X_train: pd.DataFrame, config: ModelNameConfig) -> None:
+    """
+    Writes the compact artifact of a linear model and logs it to MLflow
+    The artifact is checked to reproduce model.predict bit for bit on a
+    sample of the training rows; other model families are skipped.
+    Args:
+        model: BaseEstimator: Trained model
+        X_train: pd.DataFrame: Training data, sampled for the check
+        config: ModelNameConfig: Artifact and imputation value paths
+    """
+    import mlflow
+    from src.compact_model import export_linear_model
+    from src.data_cleaning import load_fill_values
+
+    if not config.compact_model_path or not hasattr(model, "coef_"):
+        return
+    try:
+        export_linear_model(
+            model,
+            config.compact_model_path,
+            fill_values=load_fill_values(config.fill_values_path),
+            validation_X=X_train.iloc[:10_000],
+        )
+    except ValueError as e:
+        logging.warning(f"Compact model not exported: {e}")
+        return
+    mlflow.log_artifact(config.compact_model_path, artifact_path="compact_model")
+
+
+def save_drift_reference(model: BaseEstimator, X_train: pd.DataFrame, config: ModelNameConfig) -> None:
+    """
+    Saves the histograms of the training features and predictions that
+    served traffic is compared with, and logs them to MLflow
+    Args:
+        model: BaseEstimator: Trained model
+        X_train: pd.DataFrame: Training data
+        config: ModelNameConfig: Reference path
+    """
+    import mlflow
+    from src.monitoring import DriftReference
+
+    if not config.drift_reference_path:
+        return
+    DriftReference.build(X_train, model.predict(X_train)).save(config.drift_reference_path)
+    mlflow.log_artifact(config.drift_reference_path, artifact_path="monitoring")
+
+
+def log_cross_validation(X_train: pd.DataFrame, y_train: pd.Series, config: ModelNameConfig) -> None:
+    """
+    Cross-validates the configured model on X_train and logs the fold metrics
+    Args:
+        X_train: pd.DataFrame: Training data
+        y_train: pd.Series: Training labels
+        config: ModelNameConfig: Model, folds and worker count
+    """
+    import mlflow
+    import numpy as np
+    from src.data_cleaning import IndexSplitStrategy
+    from src.model_sweep import cross_validate
+
+    split = IndexSplitStrategy("kfold", n_splits=config.cv_folds).split(X_train, y_train)
+    results = cross_validate(split, config.model_name_field, config.hyperparams, n_jobs=config.n_jobs)
+    del split
+    metrics = {}
+    for metric in results[0].scores:
+        values = np.array([result.scores[metric] for result in results])
+        metrics[f"cv_{metric}_mean"] = float(values.mean())
+        metrics[f"cv_{metric}_std"] = float(values.std())
+    mlflow.log_param("cv_folds", config.cv_folds)
+    mlflow.log_metrics(metrics)
+
+
+@step
+@instrumented
 def train_model(
     X_train: pd.DataFrame,
     y_train: pd.Series,
-    config: ModelNameConfig = ModelNameConfig()
-    ) -> RegressorMixin | None:
+    config: ModelNameConfig = ModelNameConfig(),
+    data: pd.DataFrame | None = None,
+    data_path: str | None = None
+    ) -> BaseEstimator:
     """
     Trains the model of the ingested data
+    Incremental training reads the watermark column of every ingested row
+    from data or data_path, the raw data the splits were made from.
     Args:
         X_train: pd.DataFrame: Training data
-        X_test: pd.DataFrame: Testing data
         y_train: pd.Series: Training labels
-        y_test: pd.Series: Testing labels
+        config: ModelNameConfig: Model to train, or the search space to sweep
+        data: pd.DataFrame | None: Raw data holding the watermark column
+        data_path: str | None: Path to read the watermark column from when data is None
     Returns:
-        RegressorMixin: Trained model
+        BaseEstimator: Trained model, a Pipeline for the SGD model
     """
+    # deferred so that importing the pipelines stays cheap
+    import mlflow
+    from src.model_dev import IncrementalLinearRegressionModel, get_model
+    from src.model_sweep import expand_search_space, run_sweep
+
     try:
-        model = None
-        if config.model_name_field == 'LinearRegressionModel':
-            mlflow.sklearn.autolog()
-            model = LinearRegressionModel()
-            trained_model = model.train_model(X_train, y_train)
-            return trained_model
+        if config.cv_folds > 1:
+            log_cross_validation(X_train, y_train, config)
+        if config.sweep:
+            search_space = config.search_space or {config.model_name_field: {}}
+            results, best = run_sweep(
+                X_train, y_train,
+                expand_search_space(search_space),
+                validation_size=config.validation_size,
+                n_jobs=config.n_jobs,
+            )
+            for result in results:
+                with mlflow.start_run(run_name=result.candidate.model_name, nested=True):
+                    mlflow.log_param("model_name", result.candidate.model_name)
+                    mlflow.log_params(result.candidate.params)
+                    mlflow.log_metrics({"fit_time_s": result.fit_time, "val_r2": result.score})
+            mlflow.log_param("best_model", best.candidate.model_name)
+            mlflow.log_params({f"best_{key}": value for key, value in best.candidate.params.items()})
+            mlflow.log_metric("best_val_r2", best.score)
+            trained_model = best.model
+        elif config.incremental:
+            if config.model_name_field != 'LinearRegressionModel':
+                raise ValueError(f"Incremental training is not supported for {config.model_name_field}")
+            model = IncrementalLinearRegressionModel(config.state_path)
+            ingested = load_column(config.watermark_column, data=data, data_path=data_path)
+            trained_model = model.train_model(X_train, y_train,
+                                              watermarks=ingested.loc[X_train.index],
+                                              ingested_watermarks=ingested,
+                                              **config.hyperparams)
+            mlflow.log_params({"incremental": True, "watermark_column": config.watermark_column})
         else:
-            logging.error(f"Model {config.model_name} not found")
-            raise ValueError(f"Model {config.model_name} not supported")
+            model = get_model(config.model_name_field)
+            # the model is logged below for every branch, autolog records the fit
+            mlflow.sklearn.autolog(log_models=False)
+            trained_model = model.train_model(X_train, y_train, **config.hyperparams)
+
+        # the MLflow deployer serves the "model" artifact of the run, whatever the branch
+        mlflow.sklearn.log_model(trained_model, "model")
+        export_compact_model(trained_model, X_train, config)
+        save_drift_reference(trained_model, X_train, config)
+        return trained_model
     except Exception as e:
         logging.error(f"Error in training model: {e}")
         raise e
@@ -0,0 +1,73 @@
+import logging
+from typing import Tuple
+from typing_extensions import Annotated
+
+import pandas as pd
+from zenml import step
+from sklearn.pipeline import Pipeline
+
+from src.data_cleaning import DataCleaning , DataPreProcessingStrategy , IndexSplitStrategy , load_fill_values
+from src.schema import FEATURE_COLUMNS , TARGET_COLUMN , ColumnSchema
+from .config import TextFeatureConfig
+from .instrumentation import instrumented
+from .ingest_data import IngestData
+
+
+@step
+@instrumented
+def train_text_model(data: pd.DataFrame | None = None,
+                     data_path: str | None = None,
+                     config: TextFeatureConfig = TextFeatureConfig()
+                     ) -> Tuple[
+    Annotated[Pipeline, 'text_model'],
+    Annotated[float, 'text_r2'],
+    Annotated[float, 'text_rmse']
+]:
+    """
+    Trains a linear regression on the numeric features and the hashed review text
+    The numeric columns are imputed with the values clean_df saved, the
+    text is hashed once for every row and the sparse matrix is split with
+    the same holdout as clean_df, so the scores compare with eval_model's.
+    The model is a Pipeline hashing the text itself, so it predicts from
+    rows holding the numeric features and the raw text.
+    Args:
+        data: pd.DataFrame | None: Raw data holding config.text_column
+        data_path: str | None: Path to read the raw data from when data is None
+        config: TextFeatureConfig: Text column, hashed columns and split
+    Returns:
+        Tuple[Pipeline, float, float]: Model, test R2 and RMSE
+    """
+    # deferred so that importing the pipelines stays cheap
+    import mlflow
+    from src.evaluation import MetricAccumulator
+    from src.model_dev import LinearRegressionModel
+    from src.text_features import HashedTextFeatures
+
+    try:
+        if data is None and data_path is None:
+            raise ValueError("Either data or data_path must be provided")
+        if data is None:
+            schema = ColumnSchema(usecols=FEATURE_COLUMNS + [TARGET_COLUMN, config.text_column])
+            data = IngestData(data_path, schema=schema).get_data()
+        processed = DataCleaning(data, DataPreProcessingStrategy(load_fill_values(config.fill_values_path))).handle_data()
+        processed[config.text_column] = data[config.text_column]
+        split = IndexSplitStrategy(test_size=config.test_size, random_state=config.random_state).split(
+            processed[FEATURE_COLUMNS], processed[TARGET_COLUMN])
+        train_rows, test_rows = split.train_index(), split.test_index()
+        del split
+
+        features = HashedTextFeatures(FEATURE_COLUMNS, config.text_column, config.n_features, config.n_jobs)
+        X = features.transform(processed)
+        y = processed[TARGET_COLUMN].to_numpy()
+        del processed
+        regressor = LinearRegressionModel().train_model(X[train_rows], y[train_rows])
+        scores = MetricAccumulator().update(y[test_rows], regressor.predict(X[test_rows])).scores()
+        logging.info(f"Text model on {X.shape[1]} features, {X.nnz} stored values: {scores}")
+
+        mlflow.log_params({"text_column": config.text_column, "text_n_features": config.n_features})
+        mlflow.log_metrics({f"text_{metric}": value for metric, value in scores.items()})
+        model = Pipeline([("features", features), ("regressor", regressor)])
+        return model , scores["R2"] , scores["RMSE"]
+    except Exception as e:
+        logging.error(f"Error in training text model: {e}")
+        raise e
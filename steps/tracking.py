@@ -0,0 +1,29 @@
+from functools import lru_cache
+
+from zenml.steps import BaseStep
+
+
+@lru_cache(maxsize=1)
+def experiment_tracker_name() -> str | None:
+    """
+    Resolves the experiment tracker of the active stack on first use
+    Initializing the ZenML client and stack is slow, so it is deferred until
+    a pipeline is composed instead of happening when steps are imported.
+    Returns:
+        str | None: Name of the active experiment tracker, None if the stack has none
+    """
+    from zenml.client import Client
+
+    tracker = Client().active_stack.experiment_tracker
+    return tracker.name if tracker is not None else None
+
+
+def with_experiment_tracker(step: BaseStep) -> BaseStep:
+    """
+    Returns a copy of the step that runs with the active experiment tracker
+    Args:
+        step: BaseStep: Step that logs to MLflow
+    Returns:
+        BaseStep: The configured step
+    """
+    return step.with_options(experiment_tracker=experiment_tracker_name())
@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# The steps run on a throwaway ZenML store and MLflow directory, set before
+# zenml is imported so the repository's .zen config is neither read nor
+# rewritten. Sources still resolve against the repository root.
+_SANDBOX = tempfile.mkdtemp(prefix="mlops-tests-")
+os.environ.setdefault("ZENML_CONFIG_PATH", os.path.join(_SANDBOX, "zenml"))
+os.environ.setdefault("ZENML_REPOSITORY_PATH", _SANDBOX)
+os.environ.setdefault("ZENML_CUSTOM_SOURCE_ROOT", os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ZENML_ANALYTICS_OPT_IN", "false")
+os.environ.setdefault("MLFLOW_TRACKING_URI", "file:" + os.path.join(_SANDBOX, "mlruns"))
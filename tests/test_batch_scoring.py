@@ -0,0 +1,56 @@
+import mlflow.sklearn
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from src.batch_scoring import BatchScorer, ResultWriter, score_batch
+from src.data_cleaning import DataPreProcessingStrategy
+from src.synthetic_data import generate_chunk, write_synthetic_olist
+
+
+@pytest.fixture(scope="module")
+def trained(tmp_path_factory):
+    root = tmp_path_factory.mktemp("batch_scoring")
+    strategy = DataPreProcessingStrategy()
+    train = strategy.handle_data(generate_chunk(0, 5_000, seed=3))
+    model = LinearRegression().fit(train.drop(columns="review_score"), train["review_score"])
+    mlflow.sklearn.save_model(model, str(root / "model"))
+    return model, str(root / "model"), strategy.fitted_fill_values, root
+
+
+@pytest.mark.parametrize("workers, suffix", [(0, ".csv"), (0, ".jsonl"), (2, ".parquet")])
+def test_score_file_keeps_input_order(trained, workers, suffix):
+    model, model_uri, fill_values, root = trained
+    input_path = write_synthetic_olist(str(root / "score.parquet"), 2_500, seed=5)
+    output_path = str(root / f"scored_{workers}{suffix}")
+
+    report = BatchScorer(model_uri, fill_values, batch_size=700, workers=workers).score_file(input_path, output_path)
+
+    raw = pd.read_parquet(input_path)
+    expected = score_batch(raw, model, fill_values)
+    if suffix == ".csv":
+        scored = pd.read_csv(output_path)
+    elif suffix == ".parquet":
+        scored = pd.read_parquet(output_path)
+    else:
+        scored = pd.read_json(output_path, lines=True)
+    assert report["rows"] == len(raw)
+    assert list(scored["order_id"]) == list(raw["order_id"])
+    np.testing.assert_allclose(scored["prediction"], expected["prediction"])
+
+
+def test_score_batch_uses_the_model_feature_order(trained):
+    model, _, fill_values, _ = trained
+    batch = generate_chunk(0, 50, seed=9)
+
+    result = score_batch(batch[batch.columns[::-1]], model, fill_values)
+
+    features = DataPreProcessingStrategy(fill_values).handle_data(batch)[list(model.feature_names_in_)]
+    assert list(result.columns) == ["order_id", "customer_id", "prediction"]
+    np.testing.assert_allclose(result["prediction"], model.predict(features))
+
+
+def test_writer_rejects_unknown_formats(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported"):
+        ResultWriter(str(tmp_path / "scored.xlsx"))
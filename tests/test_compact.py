@@ -0,0 +1,103 @@
+import struct
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeRegressor
+
+from src.compact_model import FORMAT_VERSION, CompactLinearPredictor, export_linear_model
+from src.data_cleaning import DataCleaning, IndexSplitStrategy
+from src.evaluation import MetricAccumulator
+from src.model_dev import LinearRegressionModel
+from src.synthetic_data import write_synthetic_olist
+from steps.clean_data import preprocessing_strategy
+from steps.config import CleanConfig
+from steps.ingest_data import IngestData
+
+TOLERANCE : float = 1e-3
+
+
+@pytest.fixture(scope="module")
+def raw_data(tmp_path_factory):
+    # read without a schema, so the columns come in as the inferred int64/float64
+    path = write_synthetic_olist(str(tmp_path_factory.mktemp("olist") / "olist.csv"), 20_000, seed=11)
+    return IngestData(path).get_data()
+
+
+def train_and_score(data, compact, tmp_path):
+    config = CleanConfig(compact=compact, fill_values_path=str(tmp_path / "fill_values.json"))
+    processed = DataCleaning(data, preprocessing_strategy(config)).handle_data()
+    split = DataCleaning(processed, IndexSplitStrategy(test_size=config.test_size,
+                                                        random_state=config.random_state)).handle_data()
+    X_train, y_train = split.train()
+    X_test, y_test = split.test()
+    model = LinearRegressionModel().train_model(X_train, y_train)
+    predictions = np.asarray(model.predict(X_test), dtype=np.float64)
+    return model, X_test, predictions, MetricAccumulator().update(y_test, predictions).scores()
+
+
+def test_compact_preprocessing_keeps_the_accuracy(raw_data, tmp_path):
+    _, X_default, default_predictions, default_scores = train_and_score(raw_data, False, tmp_path)
+    _, X_compact, compact_predictions, compact_scores = train_and_score(raw_data, True, tmp_path)
+
+    assert set(X_compact.dtypes) == {np.dtype(np.float32)}
+    assert X_compact.memory_usage(index=False).sum() < X_default.memory_usage(index=False).sum()
+    for metric in ("RMSE", "R2"):
+        assert compact_scores[metric] == pytest.approx(default_scores[metric], abs=TOLERANCE)
+    np.testing.assert_allclose(compact_predictions, default_predictions, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_compact_model_reproduces_predict_bit_for_bit(raw_data, tmp_path, compact):
+    model, X_test, predictions, _ = train_and_score(raw_data, compact, tmp_path)
+
+    export_linear_model(model, str(tmp_path / "model.olrm"), validation_X=X_test)
+    predictor = CompactLinearPredictor(str(tmp_path / "model.olrm"))
+
+    assert predictor.feature_names == list(X_test.columns)
+    assert np.array_equal(predictor.predict(X_test, impute=False), predictions)
+
+
+def test_compact_model_imputes_missing_features(raw_data, tmp_path):
+    model, X_test, _, _ = train_and_score(raw_data, False, tmp_path)
+    fill_values = {"product_weight_g": 750.0}
+    predictor = export_linear_model(model, str(tmp_path / "model.olrm"), fill_values=fill_values)
+
+    rows = X_test.iloc[:5].copy()
+    rows["product_weight_g"] = np.nan
+    filled = rows.fillna(fill_values)
+
+    assert np.array_equal(predictor.predict(rows), np.asarray(model.predict(filled), dtype=np.float64))
+
+
+def test_compact_model_checks_the_header_and_the_model(raw_data, tmp_path):
+    model, X_test, _, _ = train_and_score(raw_data, False, tmp_path)
+    path = tmp_path / "model.olrm"
+    export_linear_model(model, str(path))
+    artifact = bytearray(path.read_bytes())
+
+    artifact[4:6] = struct.pack("<H", FORMAT_VERSION + 1)
+    path.write_bytes(artifact)
+    with pytest.raises(ValueError, match="Unsupported compact model version"):
+        CompactLinearPredictor(str(path))
+    artifact[:4] = b"PK\x03\x04"
+    path.write_bytes(artifact)
+    with pytest.raises(ValueError, match="not a compact model artifact"):
+        CompactLinearPredictor(str(path))
+    with pytest.raises(ValueError, match="single-output linear model"):
+        export_linear_model(DecisionTreeRegressor().fit(X_test, np.zeros(len(X_test))), str(path))
+
+
+def test_compact_model_reorders_columns_and_loads_without_sklearn(raw_data, tmp_path):
+    model, X_test, predictions, _ = train_and_score(raw_data, False, tmp_path)
+    predictor = export_linear_model(model, str(tmp_path / "model.olrm"))
+
+    assert np.array_equal(predictor.predict(X_test[X_test.columns[::-1]], impute=False), predictions)
+    script = ("import sys; from src.compact_model import CompactLinearPredictor; "
+              f"CompactLinearPredictor({str(tmp_path / 'model.olrm')!r}); "
+              "print(sorted({'sklearn', 'pandas', 'mlflow'} & set(sys.modules)))")
+    loaded = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=Path(__file__).resolve().parents[1])
+    assert loaded.stdout.strip() == "[]"
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import train_test_split
+
+from src.data_cleaning import DataPreProcessingStrategy, IndexSplitStrategy, PartitionedPreProcessingStrategy
+from src.synthetic_data import generate_chunk
+
+
+def labelled_frame(n_rows=1_003, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 3)), columns=["a", "b", "c"], index=np.arange(n_rows) * 2 + 5)
+    y = pd.Series(rng.integers(1, 6, n_rows).astype(float), index=X.index, name="review_score")
+    return X, y
+
+
+@pytest.mark.parametrize("test_size", [0.2, 0.25])
+@pytest.mark.parametrize("random_state", [0, 42])
+def test_holdout_selects_the_rows_of_train_test_split(test_size, random_state):
+    X, y = labelled_frame()
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    split = IndexSplitStrategy(test_size=test_size, random_state=random_state).split(X, y)
+
+    for (X_split, y_split), (X_expected, y_expected) in ((split.train(), (X_train, y_train)),
+                                                         (split.test(), (X_test, y_test))):
+        pd.testing.assert_frame_equal(X_split, X_expected)
+        pd.testing.assert_series_equal(y_split, y_expected)
+
+
+@pytest.mark.parametrize("n_splits", [2, 5, 7])
+def test_kfold_folds_cover_every_row_once(n_splits):
+    X, y = labelled_frame()
+
+    split = IndexSplitStrategy("kfold", n_splits=n_splits).split(X, y)
+
+    test_rows = np.concatenate([split.test_index(k) for k in range(split.n_splits)])
+    assert np.array_equal(np.sort(test_rows), np.arange(len(X)))
+    for k in range(split.n_splits):
+        rows = np.concatenate([split.train_index(k), split.test_index(k)])
+        assert np.array_equal(np.sort(rows), np.arange(len(X)))
+        X_train, y_train = split.train(k)
+        assert X_train.index.equals(X.index[split.train_index(k)])
+        assert np.array_equal(y_train.to_numpy(), y.to_numpy()[split.train_index(k)])
+
+
+def test_time_split_tests_on_the_latest_rows():
+    X, y = labelled_frame()
+    times = pd.Series(pd.date_range("2017-01-01", periods=len(X), freq="h")).sample(frac=1, random_state=1)
+
+    split = IndexSplitStrategy("time", test_size=0.2, n_splits=1, time_values=times.to_numpy()).split(X, y)
+
+    train_times = times.to_numpy()[split.train_index()]
+    test_times = times.to_numpy()[split.test_index()]
+    assert train_times.max() < test_times.min()
+    assert len(test_times) == int(np.ceil(len(X) * 0.2))
+
+
+def test_handle_data_splits_off_the_label():
+    X, y = labelled_frame()
+    split = IndexSplitStrategy().handle_data(X.assign(review_score=y))
+    X_train, y_train = split.train()
+    assert list(X_train.columns) == ["a", "b", "c"]
+    assert y_train.name == "review_score"
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_partitioned_preprocessing_matches_one_pass_with_its_medians(compact):
+    raw = generate_chunk(0, 20_000, seed=2)
+    strategy = PartitionedPreProcessingStrategy(n_partitions=4, error_bound=0.005, compact=compact)
+
+    processed = strategy.handle_data(raw)
+
+    for col, median in strategy.fitted_fill_values.items():
+        values = np.sort(raw[col].dropna().to_numpy())
+        rank = np.searchsorted(values, median, "left"), np.searchsorted(values, median, "right")
+        assert rank[0] - 0.005 * len(values) <= len(values) / 2 <= rank[1] + 0.005 * len(values)
+    expected = DataPreProcessingStrategy(strategy.fitted_fill_values, compact=compact).handle_data(raw)
+    pd.testing.assert_frame_equal(processed, expected)
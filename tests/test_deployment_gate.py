@@ -0,0 +1,104 @@
+from typing import Tuple
+
+import mlflow
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator
+from sklearn.linear_model import LinearRegression
+from typing_extensions import Annotated
+from zenml import pipeline, step
+from zenml.enums import ExecutionStatus
+
+from src.deployment_gate import PerformanceProfile, gate_decision, profile_models, request_sample
+from steps.config import DeploymentTriggerConfig
+from steps.deployment_trigger import log_gate_decision, trigger_deployment
+
+BASELINE = PerformanceProfile(p50_ms=0.2, p99_ms=0.4, rows_per_sec=100_000.0, model_mb=0.01, predict_rss_mb=4.0)
+
+
+def test_gate_passes_a_comparable_candidate():
+    decision = gate_decision(0.30, BASELINE, baseline_accuracy=0.305, baseline=BASELINE)
+
+    assert decision.deploy
+    assert decision.reasons == []
+
+
+def test_gate_lists_every_failed_check():
+    candidate = PerformanceProfile(p50_ms=0.5, p99_ms=2.0, rows_per_sec=10_000.0, model_mb=0.1, predict_rss_mb=64.0)
+
+    decision = gate_decision(0.10, candidate, baseline_accuracy=0.30, baseline=BASELINE,
+                             min_accuracy=0.2, max_p99_ms=1.0, max_predict_rss_mb=32.0)
+
+    assert not decision.deploy
+    reasons = "\n".join(decision.reasons)
+    for expected in ("R2 0.1000 is below 0.2000", "p99 2.000 ms is above 1.000 ms",
+                     "scoring memory 64.0 MB is above 32.0 MB", "below the deployed 0.3000",
+                     "p50_ms 0.500", "p99_ms 2.000", "throughput", "model size", "scoring memory 64.0 MB is above 22.0 MB"):
+        assert expected in reasons
+    assert len(decision.reasons) == 9
+
+
+def test_gate_without_a_deployed_model_only_checks_the_limits():
+    slow = PerformanceProfile(p50_ms=50.0, p99_ms=90.0, rows_per_sec=1.0, model_mb=500.0, predict_rss_mb=900.0)
+
+    assert gate_decision(0.3, slow).deploy
+    assert gate_decision(0.3, slow, max_p99_ms=10.0).reasons == ["p99 90.000 ms is above 10.000 ms"]
+
+
+def test_profile_models_measures_every_model():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(500, 4)), columns=list("abcd"))
+    model = LinearRegression().fit(X, rng.normal(size=500))
+
+    profiles = profile_models([model, model], request_sample(X, 100), single_row_requests=20, min_seconds=0.01)
+
+    assert len(profiles) == 2
+    for profile in profiles:
+        assert 0 < profile.p50_ms <= profile.p99_ms
+        assert profile.rows_per_sec > 0 and profile.model_mb > 0 and profile.predict_rss_mb >= 0
+
+
+def test_gate_decision_is_logged_to_mlflow():
+    candidate = PerformanceProfile(p50_ms=0.5, p99_ms=2.0, rows_per_sec=10_000.0, model_mb=0.1, predict_rss_mb=4.0)
+    decision = gate_decision(0.1, candidate, min_accuracy=0.2)
+
+    with mlflow.start_run() as run:
+        log_gate_decision(decision)
+
+    logged = mlflow.get_run(run.info.run_id).data
+    assert logged.metrics["deployment_gate/candidate_r2"] == 0.1
+    assert logged.metrics["deployment_gate/candidate_p99_ms"] == 2.0
+    assert "deployment_gate/baseline_r2" not in logged.metrics
+    assert logged.tags["deployment_gate.deploy"] == "false"
+    assert logged.tags["deployment_gate.reasons"] == "R2 0.1000 is below 0.2000"
+
+
+@step
+def regression_data() -> Tuple[
+    Annotated[BaseEstimator, "model"],
+    Annotated[pd.DataFrame, "X_test"],
+    Annotated[pd.Series, "y_test"],
+]:
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 3)), columns=list("abc"))
+    y = pd.Series(X.to_numpy() @ [1.0, 2.0, 3.0])
+    return LinearRegression().fit(X, y), X, y
+
+
+@pipeline(enable_cache=False)
+def gate_pipeline(min_accuracy: float) -> None:
+    model, X_test, y_test = regression_data()
+    trigger_deployment(accuracy=0.5, model=model, X_test=X_test, y_test=y_test,
+                       config=DeploymentTriggerConfig(min_accuracy=min_accuracy, single_row_requests=20))
+
+
+def test_trigger_deployment_records_the_decision_as_step_metadata():
+    run = gate_pipeline(min_accuracy=0.9)
+
+    assert run.status == ExecutionStatus.COMPLETED
+    step_run = run.steps["trigger_deployment"]
+    assert step_run.outputs["output"][0].load() is False
+    gate = step_run.run_metadata["deployment_gate"]
+    assert gate["deploy"] is False
+    assert gate["reasons"] == ["R2 0.5000 is below 0.9000"]
+    assert gate["candidate_r2"] == 0.5
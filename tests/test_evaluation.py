@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score, root_mean_squared_error
+
+from src.evaluation import MetricAccumulator, RegressionMetrics, SegmentedEvaluation
+
+
+def labels(n_rows=10_000, seed=0):
+    rng = np.random.default_rng(seed)
+    # a large offset is where raw sums of squares would lose R2
+    y_true = 1e6 + rng.normal(size=n_rows)
+    return y_true, y_true + rng.normal(scale=0.3, size=n_rows)
+
+
+def assert_matches_sklearn(scores, y_true, y_pred):
+    assert scores["MSE"] == pytest.approx(mean_squared_error(y_true, y_pred), rel=1e-9)
+    assert scores["RMSE"] == pytest.approx(root_mean_squared_error(y_true, y_pred), rel=1e-9)
+    assert scores["MAE"] == pytest.approx(mean_absolute_error(y_true, y_pred), rel=1e-9)
+    assert scores["R2"] == pytest.approx(r2_score(y_true, y_pred), rel=1e-9)
+
+
+def test_uneven_batches_match_sklearn():
+    y_true, y_pred = labels()
+    accumulator = MetricAccumulator()
+    for start, stop in [(0, 1), (1, 1), (1, 37), (37, 5_000), (5_000, 10_000)]:
+        accumulator.update(y_true[start:stop], y_pred[start:stop])
+
+    assert accumulator.count == len(y_true)
+    assert_matches_sklearn(accumulator.scores(), y_true, y_pred)
+
+
+def test_merged_workers_match_sklearn():
+    y_true, y_pred = labels()
+    bounds = [0, 3, 1_000, 7_777, 10_000]
+    workers = [MetricAccumulator().update(y_true[start:stop], y_pred[start:stop])
+               for start, stop in zip(bounds, bounds[1:])]
+
+    merged = MetricAccumulator()
+    for worker in reversed(workers):
+        merged.merge(worker)
+
+    assert_matches_sklearn(merged.scores(), y_true, y_pred)
+    assert merged.merge(MetricAccumulator()).count == len(y_true)
+
+
+@pytest.mark.parametrize("chunksize", [None, 1, 999])
+def test_regression_metrics_match_sklearn(chunksize):
+    y_true, y_pred = labels(n_rows=3_000)
+    assert_matches_sklearn(RegressionMetrics(chunksize).calculate_scores(y_true, y_pred), y_true, y_pred)
+
+
+def test_constant_labels_follow_sklearn():
+    y_true = np.full(10, 4.0)
+
+    assert MetricAccumulator().update(y_true, y_true).r2 == r2_score(y_true, y_true)
+    assert MetricAccumulator().update(y_true, y_true + 1).r2 == r2_score(y_true, y_true + 1)
+
+
+def test_rejects_mismatched_and_empty_input():
+    with pytest.raises(ValueError, match="differ in length"):
+        MetricAccumulator().update([1.0, 2.0], [1.0])
+    with pytest.raises(ValueError, match="No rows"):
+        MetricAccumulator().update([], []).scores()
+
+
+def test_segment_metrics_match_each_segment_alone():
+    y_true, y_pred = labels(n_rows=2_000)
+    segments = np.random.default_rng(1).choice(["SP", "RJ", "MG"], size=len(y_true))
+
+    result = SegmentedEvaluation(segments).calculate_scores(y_true, y_pred)
+
+    assert set(result.index) == {"SP", "RJ", "MG", "ALL"}
+    for segment in ["SP", "RJ", "MG"]:
+        rows = segments == segment
+        assert result.loc[segment, "count"] == rows.sum()
+        assert_matches_sklearn(result.loc[segment], y_true[rows], y_pred[rows])
+    assert_matches_sklearn(result.loc["ALL"], y_true, y_pred)
+
+
+def test_bootstrap_intervals_do_not_depend_on_the_batch_size():
+    y_true, y_pred = labels(n_rows=500)
+    segments = np.where(np.arange(len(y_true)) % 3 == 0, "a", "b")
+
+    one_batch = SegmentedEvaluation(segments, n_resamples=40).calculate_scores(y_true, y_pred)
+    small_batches = SegmentedEvaluation(segments, n_resamples=40, max_batch_elements=3 * len(y_true)).calculate_scores(y_true, y_pred)
+
+    for metric in ["MSE", "RMSE", "MAE", "R2"]:
+        assert (one_batch[f"{metric}_lo"] <= one_batch[metric]).all()
+        assert (one_batch[metric] <= one_batch[f"{metric}_hi"]).all()
+    # resamples come from one generator in order, so batching only changes the layout
+    np.testing.assert_allclose(small_batches.to_numpy(), one_batch.to_numpy())
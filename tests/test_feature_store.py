@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from src.feature_store import FeatureStore
+from src.serving import PredictionServer, lookup_features
+
+COLUMNS = ["a", "b", "c"]
+
+
+def rows(ids, offset=0.0):
+    return np.array([[i + offset, 2 * i, -i] for i in ids], dtype=np.float32)
+
+
+def test_upsert_and_lookup(tmp_path):
+    store = FeatureStore.create(str(tmp_path / "store"), COLUMNS, capacity=8)
+
+    assert store.upsert([f"id{i}" for i in range(5)], rows(range(5))) == (0, 5)
+    # id1 is updated, and of its two rows the last one wins
+    assert store.upsert(["id1", "id7", "id1"], rows([1, 7, 1], offset=0.5)) == (1, 1)
+
+    features, found = store.lookup(["id1", "missing", "id7", "id4"])
+    assert found.tolist() == [True, False, True, True]
+    np.testing.assert_array_equal(features[found], np.vstack([rows([1, 7], offset=0.5), rows([4])]))
+    assert np.isnan(features[1]).all()
+    assert len(store) == 6
+
+
+def test_store_grows_and_survives_reopen(tmp_path):
+    path = str(tmp_path / "store")
+    store = FeatureStore.open_or_create(path, COLUMNS, capacity=2)
+    reader = FeatureStore(path)
+    ids = [f"customer{i}" for i in range(1_000)]
+    for start in range(0, len(ids), 128):
+        store.upsert(ids[start:start + 128], rows(range(start, min(start + 128, len(ids)))))
+
+    reopened = FeatureStore.open_or_create(path, COLUMNS)
+    assert len(reopened) == len(ids)
+    assert reopened.meta["capacity"] >= len(ids)
+    assert reopened.meta["count"] <= reopened.meta["n_slots"] / 2
+    features, found = reopened.lookup(ids)
+    assert found.all()
+    np.testing.assert_array_equal(features, rows(range(len(ids))))
+
+    reader.refresh()
+    assert reader.lookup(ids[-3:])[1].all()
+
+
+def test_open_or_create_rejects_other_columns(tmp_path):
+    FeatureStore.create(str(tmp_path / "store"), COLUMNS)
+    with pytest.raises(ValueError, match="columns"):
+        FeatureStore.open_or_create(str(tmp_path / "store"), ["a", "b"])
+
+
+def test_lookup_features_uses_the_model_order(tmp_path):
+    store = FeatureStore.create(str(tmp_path / "store"), COLUMNS)
+    store.upsert(["x", "y"], rows([1, 2]))
+
+    features, found = lookup_features(store, ["y", "z", "x"], ["c", "a", "b"])
+
+    assert found.tolist() == [True, False, True]
+    np.testing.assert_array_equal(features, [[-2, 2, 4], [-1, 1, 2]])
+    assert features.dtype == np.float64
+
+
+def test_server_scores_id_payloads_from_the_store(tmp_path):
+    store = FeatureStore.create(str(tmp_path / "store"), COLUMNS)
+    store.upsert(["x", "y"], rows([1, 2]))
+    model = LinearRegression().fit(rows(range(10)).astype(np.float64), np.arange(10.0))
+    model.feature_names_in_ = np.array(COLUMNS, dtype=object)
+
+    async def score():
+        server = PredictionServer(model, feature_store=store, max_wait=0)
+        await server.batcher.start()
+        try:
+            return await server._route("POST", "/invocations", json.dumps({"ids": ["y", "z", "x"]}).encode())
+        finally:
+            await server.batcher.stop()
+
+    status, response = asyncio.run(score())
+
+    assert status == "200 OK"
+    assert response["missing"] == ["z"]
+    assert response["predictions"][1] is None
+    np.testing.assert_allclose([response["predictions"][0], response["predictions"][2]], [2.0, 1.0])
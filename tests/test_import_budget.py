@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds `python run_pipeline.py --help` may take, interpreter start included.
+HELP_BUDGET_S : float = 1.5
+
+# Modules --help must not import, they take seconds.
+CLI_DEFERRED_MODULES : list[str] = ["zenml", "mlflow", "sklearn", "pandas", "pipelines.training_pipeline"]
+
+# Modules the steps import when they run, never when the pipelines are composed.
+PIPELINE_DEFERRED_MODULES : list[str] = [
+    "mlflow",
+    "sklearn",
+    "src.model_dev",
+    "src.model_sweep",
+    "src.evaluation",
+    "src.compact_model",
+    "src.batch_scoring",
+    "src.serving",
+]
+
+
+def loaded_modules(code: str, modules: list[str]) -> list[str]:
+    probe = code + f"\nimport json, sys\nprint(json.dumps([m for m in {modules!r} if m in sys.modules]))\n"
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", probe], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("script", ["run_pipeline.py", "run_deployment.py"])
+def test_help_is_within_budget(script):
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, "--help"], cwd=ROOT, check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    assert min(timings) < HELP_BUDGET_S
+
+
+@pytest.mark.parametrize("script", ["run_pipeline.py", "run_deployment.py"])
+def test_help_imports_no_heavy_module(script):
+    code = (f"import runpy, sys\nsys.argv = [{script!r}, '--help']\n"
+            f"try:\n    runpy.run_path({script!r}, run_name='__main__')\nexcept SystemExit:\n    pass")
+    assert loaded_modules(code, CLI_DEFERRED_MODULES) == []
+
+
+def test_pipeline_import_defers_the_step_modules():
+    code = "import pipelines.training_pipeline, pipelines.deployment_pipeline"
+    assert loaded_modules(code, PIPELINE_DEFERRED_MODULES) == []
@@ -0,0 +1,81 @@
+import asyncio
+import socket
+
+import numpy as np
+import pytest
+
+from src.load_test import LoadGenerator, LoadResult, synthetic_payloads
+from src.serving import PredictionServer
+
+
+class ConstantModel:
+    def predict(self, X):
+        return np.full(len(X), 4.0)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_against_server(scenario):
+    port = free_port()
+    server = PredictionServer(ConstantModel(), port=port, max_wait=0.001)
+
+    async def main():
+        serving = asyncio.create_task(server.serve())
+        await asyncio.sleep(0.1)
+        try:
+            return await scenario(f"http://127.0.0.1:{port}/invocations")
+        finally:
+            serving.cancel()
+            await asyncio.gather(serving, return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"rate": 0, "n_requests": 10}, "rate must be positive"),
+    ({"rate": 10}, "Either n_requests or duration"),
+    ({"rate": 10, "duration": 0.05}, "schedule no request"),
+    ({"rate": 10, "n_requests": 0}, "at least 1"),
+])
+def test_open_loop_rejects_an_empty_schedule(kwargs, message):
+    generator = LoadGenerator("http://127.0.0.1:1/invocations", synthetic_payloads(1))
+    with pytest.raises(ValueError, match=message):
+        asyncio.run(generator.run_open(**kwargs))
+
+
+def test_generator_needs_payloads_and_an_http_url():
+    with pytest.raises(ValueError, match="No request payloads"):
+        LoadGenerator("http://127.0.0.1:1/invocations", [])
+    with pytest.raises(ValueError, match="http://"):
+        LoadGenerator("https://127.0.0.1:1/invocations", synthetic_payloads(1))
+
+
+def test_closed_and_open_loops_count_every_request():
+    # every third body is malformed and answered with 400
+    payloads = synthetic_payloads(2, rows_per_request=3) + [b'{"instances": [[1.0]]}']
+
+    async def scenario(url):
+        generator = LoadGenerator(url, payloads, concurrency=4)
+        closed = await generator.run_closed(n_requests=30)
+        opened = await generator.run_open(rate=500, n_requests=30, poisson=True)
+        return closed.summary(), opened.summary()
+
+    closed, opened = run_against_server(scenario)
+
+    for summary, mode in [(closed, "closed"), (opened, "open")]:
+        assert summary["mode"] == mode
+        assert (summary["requests"], summary["ok"], summary["errors"]) == (30, 20, {"http_400": 10})
+        assert 0 < summary["p50_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+
+
+def test_histogram_buckets_every_latency():
+    result = LoadResult("closed", latencies_ms=[0.1, 0.5, 3.0, 9_000.0])
+
+    buckets = dict(result.histogram())
+
+    assert buckets["<= 0.5 ms"] == 2 and buckets["<= 5 ms"] == 1 and buckets["> 5000 ms"] == 1
+    assert sum(buckets.values()) == 4
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from src.model_dev import (IncrementalLinearRegressionModel, LinearRegressionModel, SufficientStatistics, iter_xy_chunks,
+                           linear_regression_from_statistics)
+
+
+def regression_data(n_rows=2_000, n_features=5, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(3.0, 2.0, size=(n_rows, n_features)),
+                     columns=[f"x{i}" for i in range(n_features)])
+    y = X.to_numpy() @ rng.normal(size=n_features) + 4.0 + rng.normal(scale=0.1, size=n_rows)
+    return X, y
+
+
+def streamed_statistics(X, y, chunksize=300):
+    stats = SufficientStatistics(X.shape[1], list(X.columns))
+    for X_chunk, y_chunk in iter_xy_chunks(X, y, chunksize):
+        stats.update(X_chunk, y_chunk)
+    return stats
+
+
+@pytest.mark.parametrize("fit_intercept", [True, False])
+def test_statistics_match_linear_regression(fit_intercept):
+    X, y = regression_data()
+    expected = LinearRegression(fit_intercept=fit_intercept).fit(X, y)
+
+    reg = linear_regression_from_statistics(streamed_statistics(X, y), fit_intercept=fit_intercept)
+
+    np.testing.assert_allclose(reg.coef_, expected.coef_, rtol=1e-9, atol=1e-9)
+    assert reg.intercept_ == pytest.approx(expected.intercept_, abs=1e-9)
+    np.testing.assert_allclose(reg.predict(X), expected.predict(X), rtol=1e-9)
+
+
+def test_statistics_reject_positive():
+    X, y = regression_data()
+    with pytest.raises(ValueError, match="positive"):
+        linear_regression_from_statistics(streamed_statistics(X, y), positive=True)
+
+
+def test_stream_training_matches_fit():
+    X, y = regression_data()
+    expected = LinearRegression(fit_intercept=False).fit(X, y)
+
+    reg = LinearRegressionModel().train_model_stream(iter_xy_chunks(X, y, 500), fit_intercept=False)
+
+    np.testing.assert_allclose(reg.predict(X), expected.predict(X), rtol=1e-9)
+
+
+def test_float32_features_are_fitted_in_float64():
+    X, y = regression_data()
+    expected = LinearRegression().fit(X, y)
+
+    reg = LinearRegressionModel().train_model(X.astype(np.float32), y)
+
+    np.testing.assert_allclose(reg.coef_, expected.coef_, rtol=1e-5)
+    assert reg.coef_.dtype == np.float64
+
+
+def test_incremental_refit_matches_a_full_refit(tmp_path):
+    X, y = regression_data(n_rows=3_000)
+    watermarks = pd.Series(pd.date_range("2018-01-01", periods=len(X), freq="min").astype(str))
+    state_path = str(tmp_path / "state.npz")
+    model = IncrementalLinearRegressionModel(state_path)
+
+    model.train_model(X.iloc[:1_000], y[:1_000], watermarks=watermarks[:1_000])
+    reg = model.train_model(X, y, watermarks=watermarks)
+    expected = LinearRegression().fit(X, y)
+
+    np.testing.assert_allclose(reg.coef_, expected.coef_, rtol=1e-9)
+    assert reg.intercept_ == pytest.approx(expected.intercept_, abs=1e-9)
+    assert SufficientStatistics.load(state_path).count == len(X)
+
+
+def test_incremental_rerun_is_a_no_op(tmp_path):
+    X, y = regression_data()
+    watermarks = np.arange(len(X))
+    state_path = tmp_path / "state.npz"
+    model = IncrementalLinearRegressionModel(str(state_path))
+    first = model.train_model(X, y, watermarks=watermarks)
+    saved = state_path.read_bytes()
+
+    second = model.train_model(X, y, watermarks=watermarks)
+
+    assert state_path.read_bytes() == saved
+    np.testing.assert_array_equal(second.coef_, first.coef_)
+    assert SufficientStatistics.load(str(state_path)).count == len(X)
+
+
+def test_incremental_skips_rows_held_out_of_an_earlier_run(tmp_path):
+    X, y = regression_data()
+    watermarks = np.arange(len(X))
+    train = np.arange(len(X)) % 5 != 0
+    model = IncrementalLinearRegressionModel(str(tmp_path / "state.npz"))
+
+    model.train_model(X[train], y[train], watermarks=watermarks[train], ingested_watermarks=watermarks)
+    reg = model.train_model(X, y, watermarks=watermarks)
+
+    expected = LinearRegression().fit(X[train], y[train])
+    np.testing.assert_allclose(reg.coef_, expected.coef_, rtol=1e-9)
+
+
+def test_incremental_rejects_missing_watermarks(tmp_path):
+    X, y = regression_data(n_rows=10)
+    watermarks = pd.Series([None] + ["2018-01-01"] * 9)
+    with pytest.raises(ValueError, match="missing"):
+        IncrementalLinearRegressionModel(str(tmp_path / "state.npz")).train_model(X, y, watermarks=watermarks)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.metrics import r2_score
+
+from src.data_cleaning import IndexSplitStrategy
+from src.model_sweep import SweepCandidate, cross_validate, expand_search_space, run_sweep
+
+
+def regression_data(n_rows=2_000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 4)), columns=list("abcd"))
+    y = pd.Series(X.to_numpy() @ [1.0, -2.0, 0.5, 0.0] + rng.normal(scale=0.5, size=n_rows), name="review_score")
+    return X, y
+
+
+def test_expand_search_space():
+    candidates = expand_search_space({"RidgeModel": {"alpha": [0.1, 10.0]}, "LinearRegressionModel": {}})
+
+    assert candidates == [SweepCandidate("RidgeModel", {"alpha": 0.1}), SweepCandidate("RidgeModel", {"alpha": 10.0}),
+                          SweepCandidate("LinearRegressionModel", {})]
+
+
+def test_sweep_refits_the_best_candidate_on_every_row():
+    X, y = regression_data()
+    candidates = expand_search_space({"RidgeModel": {"alpha": [1.0, 1e5]}})
+
+    results, best = run_sweep(X, y, candidates, n_jobs=2)
+
+    assert [result.candidate for result in results] == candidates
+    assert best.candidate.params == {"alpha": 1.0}
+    assert best.score == max(result.score for result in results)
+    np.testing.assert_allclose(best.model.coef_, Ridge(alpha=1.0).fit(X, y).coef_)
+
+
+def test_sweep_needs_a_candidate():
+    X, y = regression_data(n_rows=10)
+    with pytest.raises(ValueError, match="candidate"):
+        run_sweep(X, y, [])
+
+
+@pytest.mark.parametrize("params", [{}, {"fit_intercept": False}, {"positive": True}])
+def test_cross_validation_matches_sequential_fits(params):
+    X, y = regression_data()
+    split = IndexSplitStrategy("kfold", n_splits=3).split(X, y)
+
+    results = cross_validate(split, "LinearRegressionModel", params, n_jobs=2)
+
+    assert [result.fold for result in results] == [0, 1, 2]
+    for k, result in enumerate(results):
+        X_train, y_train = split.train(k)
+        X_test, y_test = split.test(k)
+        expected = LinearRegression(**params).fit(X_train, y_train).predict(X_test)
+        assert result.scores["R2"] == pytest.approx(r2_score(y_test, expected), abs=1e-9)
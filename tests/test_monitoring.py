@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.monitoring import PREDICTION_KEY, PSI_ALERT, SMALL_BATCH_ROWS, DriftMonitor, DriftReference
+
+
+def training_rows(n_rows=5_000, seed=0, shift=0.0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        "price": rng.lognormal(4, 1, n_rows) + shift,
+        "freight_value": rng.gamma(2.0, 10.0, n_rows),
+        # discrete, so values sit exactly on the bin edges
+        "product_photos_qty": rng.integers(1, 5, n_rows).astype(float),
+    })
+    X.loc[rng.random(n_rows) < 0.02, "freight_value"] = np.nan
+    return X, X["price"].to_numpy() / 100
+
+
+def test_batched_and_one_shot_updates_give_the_same_psi():
+    X, predictions = training_rows()
+    reference = DriftReference.build(X, predictions)
+    live, live_predictions = training_rows(3_001, seed=1, shift=20.0)
+    features = live.to_numpy()
+
+    one_shot = DriftMonitor(reference)
+    one_shot.update(features, live_predictions)
+    batched = DriftMonitor(reference)
+    # batch sizes on both sides of SMALL_BATCH_ROWS take both binning paths
+    bounds = np.r_[0, np.cumsum([1, SMALL_BATCH_ROWS, SMALL_BATCH_ROWS + 1, 7, 1_000]), len(live)]
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        batched.update(features[start:stop], live_predictions[start:stop])
+
+    assert batched.scores()["psi"] == one_shot.scores()["psi"]
+    for name, counts in one_shot.counts.items():
+        np.testing.assert_array_equal(batched.counts[name], counts)
+    assert (batched.rows, one_shot.rows) == (len(live), len(live))
+    assert "price" in one_shot.scores()["drifted"]
+
+
+@pytest.mark.parametrize("batch_rows", [SMALL_BATCH_ROWS, 5_000])
+def test_training_rows_reproduce_the_reference(batch_rows):
+    X, predictions = training_rows()
+    reference = DriftReference.build(X, predictions)
+    monitor = DriftMonitor(reference)
+    for start in range(0, len(X), batch_rows):
+        monitor.update(X.to_numpy()[start:start + batch_rows], predictions[start:start + batch_rows])
+
+    for name, counts in monitor.counts.items():
+        np.testing.assert_array_equal(counts, reference.counts[name])
+    assert max(monitor.scores()["psi"].values()) == 0.0 < PSI_ALERT
+
+
+def test_reference_round_trips_and_checks_the_features(tmp_path):
+    X, predictions = training_rows()
+    reference = DriftReference.build(X, predictions)
+    reference.save(str(tmp_path / "drift.json"))
+
+    loaded = DriftReference.load(str(tmp_path / "drift.json"))
+
+    assert loaded.feature_names == list(X.columns)
+    for name in list(X.columns) + [PREDICTION_KEY]:
+        np.testing.assert_array_equal(loaded.edges[name], reference.edges[name])
+        np.testing.assert_array_equal(loaded.counts[name], reference.counts[name])
+    assert DriftReference.load(str(tmp_path / "missing.json")) is None
+    with pytest.raises(ValueError, match="No reference histograms"):
+        DriftMonitor(reference, ["price", "review_count"])
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from src.profiling import Profiler, reset_peak_rss
+
+
+def allocate_mb(mb):
+    block = np.ones(mb * 1024 ** 2 // 8)
+    del block
+
+
+def test_nested_profiler_keeps_the_outer_peak():
+    with Profiler() as outer:
+        allocate_mb(200)
+        with Profiler() as inner:
+            allocate_mb(20)
+    assert outer.profile.peak_rss_growth_mb > 150
+    assert inner.profile.peak_rss_growth_mb < 100
+
+
+def test_inner_peak_reaches_the_outer_profiler():
+    with Profiler() as outer:
+        with Profiler() as inner:
+            allocate_mb(200)
+        with Profiler():
+            allocate_mb(1)
+    assert inner.profile.peak_rss_growth_mb > 150
+    assert outer.profile.peak_rss_growth_mb >= inner.profile.peak_rss_growth_mb
+    assert not Profiler._active
+
+
+def test_profiler_reports_growth_not_the_process_peak():
+    if not reset_peak_rss():
+        pytest.skip("the peak RSS cannot be reset on this platform")
+    allocate_mb(200)
+    with Profiler() as profiler:
+        allocate_mb(1)
+    assert profiler.profile.peak_rss_growth_mb < 100
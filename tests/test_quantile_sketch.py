@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from src.quantile_sketch import QuantileSketch
+
+QUANTILES : list[float] = [0.001, 0.1, 0.25, 0.5, 0.75, 0.9, 0.999]
+
+
+def assert_within_rank_error(sketch, values, eps):
+    values = np.sort(values)
+    n = len(values)
+    for q in QUANTILES:
+        estimate = sketch.quantile(q)
+        # any rank the estimate can take must reach the target within eps * n
+        low, high = np.searchsorted(values, estimate, "left"), np.searchsorted(values, estimate, "right")
+        target = q * n
+        assert low - eps * n <= target <= high + eps * n, (q, low, high, target)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_updates_stay_within_the_rank_error(seed):
+    eps = 0.005
+    values = np.random.default_rng(seed).lognormal(size=200_000)
+    sketch = QuantileSketch(eps, seed=seed)
+    for batch in np.array_split(values, 37):
+        sketch.update(batch)
+
+    assert sketch.count == len(values)
+    assert sketch.retained() < 4 * sketch.k
+    assert_within_rank_error(sketch, values, eps)
+
+
+def test_merged_sketches_stay_within_the_rank_error():
+    eps = 0.005
+    rng = np.random.default_rng(3)
+    # partitions with different distributions, like rows sorted by time
+    parts = [rng.normal(loc, size=size) for loc, size in [(0, 50_000), (5, 1), (-3, 80_000), (10, 7_000)]]
+    sketches = [QuantileSketch(eps, seed=i).update(part) for i, part in enumerate(parts)]
+
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged.merge(sketch)
+
+    assert merged.count == sum(len(part) for part in parts)
+    assert_within_rank_error(merged, np.concatenate(parts), eps)
+
+
+def test_small_inputs_are_exact_and_nan_is_skipped():
+    values = np.array([5.0, np.nan, 1.0, 3.0, np.nan, 2.0, 4.0])
+    sketch = QuantileSketch().update(values)
+
+    assert sketch.count == 5
+    assert sketch.median() == np.nanmedian(values)
+    assert np.isnan(QuantileSketch().update([np.nan]).median())
+    with pytest.raises(ValueError, match="eps"):
+        QuantileSketch(eps=1.0)
+
+
+def test_same_seed_gives_the_same_sketch():
+    values = np.random.default_rng(4).normal(size=30_000)
+    first, second = (QuantileSketch(0.01, seed=9).update(values) for _ in range(2))
+
+    assert [first.quantile(q) for q in QUANTILES] == [second.quantile(q) for q in QUANTILES]
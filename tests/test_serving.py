@@ -0,0 +1,165 @@
+import asyncio
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from src.schema import FEATURE_COLUMNS
+from src.serving import MicroBatcher, ModelVersion, PredictionServer, SharedModelPointer, parse_features
+
+
+class ConstantModel:
+    def __init__(self, value, gate=None):
+        self.value = value
+        self.gate = gate
+
+    def predict(self, X):
+        if self.gate is not None:
+            self.gate.wait(5)
+        return np.full(len(X), self.value, dtype=np.float64)
+
+
+class RowSumModel:
+    def predict(self, X):
+        X = np.asarray(X)
+        if (X < 0).any():
+            raise ValueError("negative feature")
+        return X.sum(axis=1)
+
+
+def features(rows=1):
+    return np.ones((rows, len(FEATURE_COLUMNS)))
+
+
+def test_parse_features_reads_every_payload_layout():
+    names = ["a", "b", "c"]
+    expected = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+    payloads = [
+        {"dataframe_split": {"columns": ["c", "a", "b"], "data": [[3, 1, 2], [6, 4, 5]]}},
+        {"dataframe_records": [{"a": 1, "b": 2, "c": 3}, {"c": 6, "b": 5, "a": 4}]},
+        {"instances": [[1, 2, 3], [4, 5, 6]]},
+        {"inputs": [[1, 2, 3], [4, 5, 6]]},
+    ]
+
+    for payload in payloads:
+        np.testing.assert_array_equal(parse_features(payload, names), expected)
+    assert parse_features({"instances": []}, names).shape == (0, 3)
+
+
+@pytest.mark.parametrize("payload, message", [
+    ({"instances": [[1.0, 2.0]]}, "Expected rows of 3 values"),
+    ({"instances": [[1.0, 2.0, 3.0], [1.0, 2.0]]}, "inhomogeneous"),
+    ({"instances": [[1.0, float("nan"), 3.0]]}, "finite"),
+    ({"rows": [[1.0, 2.0, 3.0]]}, "Expected dataframe_split"),
+])
+def test_parse_features_rejects_malformed_rows(payload, message):
+    with pytest.raises(ValueError, match=message):
+        parse_features(payload, ["a", "b", "c"])
+
+
+def test_malformed_requests_get_400_and_failures_stay_in_their_request():
+    server = PredictionServer(RowSumModel(), model_uri="v1", max_wait=0.05)
+
+    async def invoke(rows):
+        return await server._route("POST", "/invocations", json.dumps({"instances": rows}).encode())
+
+    async def scenario():
+        await server.batcher.start()
+        try:
+            malformed = await server._route("POST", "/invocations", b"{not json")
+            short_rows = await invoke([[1.0]])
+            # these three join one batch, only the negative row fails
+            batched = await asyncio.gather(invoke(features(2).tolist()), invoke((-features()).tolist()),
+                                           invoke((2 * features()).tolist()))
+            return malformed, short_rows, batched
+        finally:
+            await server.batcher.stop()
+
+    malformed, short_rows, (first, failing, third) = asyncio.run(scenario())
+
+    assert malformed[0] == short_rows[0] == "400 Bad Request"
+    assert first == ("200 OK", {"predictions": [len(FEATURE_COLUMNS)] * 2})
+    assert failing[0] == "500 Internal Server Error" and "negative" in failing[1]["error"]
+    assert third == ("200 OK", {"predictions": [2 * len(FEATURE_COLUMNS)]})
+
+
+def test_swap_applies_between_batches_and_rollback_restores():
+    gate = threading.Event()
+
+    async def scenario():
+        batcher = MicroBatcher(ModelVersion.of(ConstantModel(1.0, gate), "v1"), max_wait=0)
+        await batcher.start()
+        try:
+            in_flight = asyncio.create_task(batcher.predict(features()))
+            await asyncio.sleep(0.05)
+            batcher.swap(ModelVersion.of(ConstantModel(2.0), "v2"))
+            gate.set()
+            first = await in_flight
+            second = await batcher.predict(features())
+            batcher.rollback()
+            third = await batcher.predict(features())
+            return first, second, third, batcher
+        finally:
+            await batcher.stop()
+
+    first, second, third, batcher = asyncio.run(scenario())
+
+    assert (first[0], second[0], third[0]) == (1.0, 2.0, 1.0)
+    assert (batcher.active.uri, batcher.previous.uri) == ("v1", "v2")
+
+
+def test_rollback_needs_a_previous_model_and_swap_the_same_features():
+    batcher = MicroBatcher(ConstantModel(1.0))
+    with pytest.raises(ValueError, match="previous"):
+        batcher.rollback()
+    other = ModelVersion("v2", ConstantModel(2.0), FEATURE_COLUMNS[:3])
+    with pytest.raises(ValueError, match="expects"):
+        batcher.swap(other)
+    assert batcher.previous is None
+
+
+def test_workers_follow_swaps_and_rollbacks_through_the_pointer(tmp_path):
+    models = {"v1": ConstantModel(1.0), "v2": ConstantModel(2.0)}
+    loads = []
+
+    def loader(uri):
+        loads.append(uri)
+        return models[uri]
+
+    pointer = str(tmp_path / "model_pointer.json")
+    workers = [PredictionServer(models["v1"], model_uri="v1", loader=loader, model_pointer=pointer,
+                                watch_interval=0.02, max_wait=0) for _ in range(2)]
+
+    async def active_uris():
+        await asyncio.sleep(0.2)
+        return [worker.batcher.active.uri for worker in workers]
+
+    async def scenario():
+        for worker in workers:
+            await worker.batcher.start()
+        watchers = [asyncio.create_task(worker._watch()) for worker in workers]
+        try:
+            status, _ = await workers[0]._route("POST", "/models/swap",
+                                                json.dumps({"model_uri": "v2", "wait": True}).encode())
+            assert status == "200 OK"
+            after_swap = await active_uris()
+            loads_after_swap = len(loads)
+            status, _ = await workers[0]._route("POST", "/models/rollback", b"")
+            assert status == "200 OK"
+            after_rollback = await active_uris()
+            return after_swap, loads_after_swap, after_rollback
+        finally:
+            for watcher in watchers:
+                watcher.cancel()
+            for worker in workers:
+                await worker.batcher.stop()
+
+    after_swap, loads_after_swap, after_rollback = asyncio.run(scenario())
+
+    assert after_swap == ["v2", "v2"]
+    assert after_rollback == ["v1", "v1"]
+    # every worker loads the new model once, the rollback loads nothing
+    assert loads == ["v2", "v2"] and loads_after_swap == 2
+    assert SharedModelPointer(pointer).read() == "v1"
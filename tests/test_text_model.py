@@ -0,0 +1,36 @@
+import json
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+from zenml import pipeline
+from zenml.enums import ExecutionStatus
+
+from src.schema import FEATURE_COLUMNS, MEDIAN_IMPUTED_COLUMNS
+from src.synthetic_data import generate_chunk, write_synthetic_olist
+from steps.config import TextFeatureConfig
+from steps.text_model import train_text_model
+
+
+@pipeline(enable_cache=False)
+def text_model_pipeline(data_path: str, config: TextFeatureConfig) -> None:
+    train_text_model(data_path=data_path, config=config)
+
+
+def test_train_text_model_runs_in_a_pipeline(tmp_path):
+    data_path = write_synthetic_olist(str(tmp_path / "olist.parquet"), 5_000, seed=7)
+    fill_values_path = tmp_path / "fill_values.json"
+    fill_values_path.write_text(json.dumps({col: 1.0 for col in MEDIAN_IMPUTED_COLUMNS}))
+    config = TextFeatureConfig(n_features=2 ** 10, n_jobs=1, fill_values_path=str(fill_values_path))
+
+    run = text_model_pipeline(data_path=data_path, config=config)
+
+    assert run.status == ExecutionStatus.COMPLETED
+    outputs = run.steps["train_text_model"].outputs
+    model = outputs["text_model"][0].load()
+    assert isinstance(model, Pipeline)
+    assert np.isfinite(outputs["text_r2"][0].load())
+    rows = generate_chunk(0, 10, seed=7)
+    rows[MEDIAN_IMPUTED_COLUMNS] = rows[MEDIAN_IMPUTED_COLUMNS].fillna(1.0)
+    predictions = model.predict(rows[FEATURE_COLUMNS + [config.text_column]])
+    assert predictions.shape == (10,)
+    assert np.isfinite(predictions).all()